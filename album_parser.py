@@ -0,0 +1,288 @@
+import os
+import urllib.parse
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from typing import List, Optional
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+BASE_URL = "https://downloads.khinsider.com"
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif')
+# Chrome으로 불러올 때 페이지가 준비됐다고 보는 CSS 선택자 (모두 있어야 함)
+ALBUM_PAGE_READY = ('h2', 'a[href$=".mp3"]')
+TRACK_PAGE_READY = ('a[href$=".mp3"], a[href$=".flac"]',)
+LISTING_PAGE_READY = ('a[href*="/game-soundtracks/album/"]',)
+ALBUM_PATH = "/game-soundtracks/album/"
+
+
+@dataclass
+class ListingPage:
+    """알파벳/플랫폼 목록 페이지에서 추출한 정보
+
+    albums는 (앨범 URL, 목록 행의 텍스트) 목록이고, 행 텍스트(제목, 플랫폼,
+    종류, 연도)는 앨범이 바뀌었는지 판단하는 지문으로 사용합니다.
+    pages는 같은 목록의 다른 페이지 URL입니다.
+    """
+    albums: List[tuple] = field(default_factory=list)
+    pages: List[str] = field(default_factory=list)
+
+
+@dataclass
+class AlbumPage:
+    """앨범 페이지에서 추출한 정보"""
+    title: str
+    catalog: Optional[str] = None
+    images: List[str] = field(default_factory=list)
+    tracks: List[str] = field(default_factory=list)
+
+
+class _TableInfo:
+    """h2 뒤에 나오는 테이블의 셀 수, 플레이어 포함 여부, 링크 목록"""
+
+    def __init__(self):
+        self.cells = 0
+        self.has_audio = False
+        self.closed = False
+        self.anchors = []
+
+
+class _AlbumPageTarget:
+    """태그 시작/끝/텍스트 이벤트를 한 번만 받으면서 앨범 정보를 모으는 클래스
+
+    lxml의 parser target 인터페이스(start/end/data/close)를 그대로 따르므로
+    lxml이 있으면 lxml 파서에, 없으면 html.parser 어댑터에 연결해 사용합니다.
+    """
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+        self.title = None
+        self._title_parts = None
+        self.catalog = None
+        self._catalog_pending = False
+        self._catalog_parts = None
+        self._catalog_depth = 0
+        self.tracks = {}
+        self._tables = []
+        self._open_tables = []
+        self._album_table = None
+        self._table_decided = False
+        self._anchor = None
+
+    def start(self, tag, attrib):
+        if tag == 'h2' and self.title is None and self._title_parts is None:
+            self._title_parts = []
+        elif tag == 'b':
+            if self._catalog_parts is not None:
+                self._catalog_depth += 1
+            elif self._catalog_pending:
+                self._catalog_pending = False
+                self._catalog_parts = []
+                self._catalog_depth = 1
+        elif tag == 'a':
+            href = attrib.get('href') or ''
+            if href.endswith('.mp3'):
+                self.tracks.setdefault(urllib.parse.urljoin(self.base_url, href), None)
+            self._anchor = [href, []]
+        elif self.title is not None and not self._table_decided:
+            # h2 이후의 테이블만 이미지 테이블 후보로 추적
+            if tag == 'table':
+                table = _TableInfo()
+                self._tables.append(table)
+                self._open_tables.append(table)
+            elif tag == 'td':
+                for table in self._open_tables:
+                    table.cells += 1
+            elif tag == 'audio':
+                for table in self._open_tables:
+                    table.has_audio = True
+
+    def end(self, tag):
+        if tag == 'h2' and self._title_parts is not None and self.title is None:
+            self.title = ''.join(self._title_parts).strip()
+            self._title_parts = None
+        elif tag == 'b' and self._catalog_parts is not None:
+            self._catalog_depth -= 1
+            if self._catalog_depth == 0:
+                self.catalog = ''.join(self._catalog_parts).strip()
+                self._catalog_parts = None
+        elif tag == 'a' and self._anchor is not None:
+            for table in self._open_tables:
+                # 셀이 여러 개인 테이블은 이미지 테이블이 될 수 없으므로 링크를 모으지 않음
+                if table.cells <= 1:
+                    table.anchors.append((self._anchor[0], ''.join(self._anchor[1])))
+            self._anchor = None
+        elif tag == 'table' and self._open_tables:
+            self._open_tables.pop().closed = True
+            self._decide_album_table()
+
+    def data(self, text):
+        if self._title_parts is not None:
+            self._title_parts.append(text)
+        if self._catalog_parts is not None:
+            self._catalog_parts.append(text)
+        elif self.catalog is None and not self._catalog_pending and "Catalog Number:" in text:
+            self._catalog_pending = True
+        if self._anchor is not None:
+            self._anchor[1].append(text)
+
+    def close(self):
+        for table in self._open_tables:
+            table.closed = True
+        self._open_tables = []
+        self._decide_album_table()
+        return self
+
+    def _decide_album_table(self):
+        """문서 순서상 처음 만나는 테이블부터 판정 (플레이어 테이블이면 중단)"""
+        if self._table_decided:
+            return
+        for table in self._tables:
+            if not table.closed:
+                return
+            if table.has_audio:
+                self._table_decided = True
+                return
+            if table.cells == 1:
+                self._album_table = table
+                self._table_decided = True
+                return
+        self._tables = []
+
+    def result(self):
+        if self.title is None:
+            return None
+        images = []
+        if self._album_table:
+            for href, text in self._album_table.anchors:
+                # 빈 텍스트를 가진 링크만 선택 (공백이나 대괄호만 있는 경우도 포함)
+                if text.strip().replace('[', '').replace(']', '').strip() == '':
+                    if any(ext in href.lower() for ext in IMAGE_EXTENSIONS):
+                        images.append(href)
+            images.sort(key=lambda x: os.path.basename(x))
+        return AlbumPage(title=self.title, catalog=self.catalog, images=images,
+                         tracks=list(self.tracks))
+
+
+class _StdlibAdapter(HTMLParser):
+    """html.parser 이벤트를 target 인터페이스로 전달"""
+
+    def __init__(self, target):
+        super().__init__(convert_charrefs=True)
+        self.target = target
+
+    def handle_starttag(self, tag, attrs):
+        self.target.start(tag, dict(attrs))
+
+    def handle_startendtag(self, tag, attrs):
+        self.target.start(tag, dict(attrs))
+        self.target.end(tag)
+
+    def handle_endtag(self, tag):
+        self.target.end(tag)
+
+    def handle_data(self, data):
+        self.target.data(data)
+
+
+def available_backends():
+    return ['lxml', 'html.parser'] if etree is not None else ['html.parser']
+
+
+def _feed(target, html, backend=None):
+    backend = backend or available_backends()[0]
+    if backend == 'lxml':
+        parser = etree.HTMLParser(target=target)
+        parser.feed(html)
+        return parser.close()
+    adapter = _StdlibAdapter(target)
+    adapter.feed(html)
+    adapter.close()
+    return target.close()
+
+
+def parse_album_page(html, base_url=BASE_URL, backend=None):
+    """앨범 페이지 HTML을 한 번만 훑어 AlbumPage 반환 (제목이 없으면 None)"""
+    return _feed(_AlbumPageTarget(base_url), html, backend).result()
+
+
+class _LinkTarget:
+    """지정한 확장자로 끝나는 첫 번째 링크를 찾는 target"""
+
+    def __init__(self, ext):
+        self.ext = ext
+        self.link = None
+
+    def start(self, tag, attrib):
+        if tag == 'a' and self.link is None:
+            href = attrib.get('href') or ''
+            if href.endswith(self.ext):
+                self.link = href
+
+    def end(self, tag):
+        pass
+
+    def data(self, text):
+        pass
+
+    def close(self):
+        return self
+
+
+class _ListingTarget:
+    """목록 페이지의 앨범 링크와 행 텍스트, 같은 목록의 페이지 링크를 모으는 target"""
+
+    def __init__(self, page_url):
+        self.page_url = page_url
+        self.path = urllib.parse.urlsplit(page_url).path.rstrip('/')
+        self.albums = {}
+        self.pages = {}
+        self._row = None  # [앨범 URL, 텍스트 조각]
+
+    def start(self, tag, attrib):
+        if tag == 'tr':
+            self._row = [None, []]
+        elif tag == 'td' and self._row is not None:
+            self._row[1].append(' ')
+        elif tag == 'a':
+            href = attrib.get('href') or ''
+            url = urllib.parse.urljoin(self.page_url, href).split('#')[0]
+            parts = urllib.parse.urlsplit(url)
+            if ALBUM_PATH in parts.path:
+                if self._row is not None and self._row[0] is None:
+                    self._row[0] = url
+                else:
+                    self.albums.setdefault(url, '')
+            elif (parts.path.rstrip('/') == self.path and 'page=' in parts.query
+                  and url != self.page_url):
+                self.pages.setdefault(url, None)
+
+    def end(self, tag):
+        if tag == 'tr' and self._row is not None:
+            url, parts = self._row
+            if url:
+                self.albums[url] = ' '.join(''.join(parts).split())
+            self._row = None
+
+    def data(self, text):
+        if self._row is not None:
+            self._row[1].append(text)
+
+    def close(self):
+        return self
+
+    def result(self):
+        return ListingPage(albums=list(self.albums.items()), pages=list(self.pages))
+
+
+def parse_listing_page(html, page_url, backend=None):
+    """목록 페이지 HTML을 한 번만 훑어 ListingPage 반환 (트리를 만들지 않음)"""
+    return _feed(_ListingTarget(page_url), html, backend).result()
+
+
+def find_download_link(html, file_type, backend=None):
+    """트랙 페이지에서 형식(FLAC/MP3)에 맞는 직접 다운로드 링크 찾기"""
+    ext = ".flac" if file_type == "FLAC" else ".mp3"
+    return _feed(_LinkTarget(ext), html, backend).link
@@ -0,0 +1,722 @@
+import os
+import asyncio
+import itertools
+import functools
+import threading
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import aiohttp
+    from yarl import URL
+except ImportError:
+    aiohttp = None
+
+import file_transfer
+from file_transfer import DownloadStopped, PART_SUFFIX
+from page_fetcher import PageFetcher, DEFAULT_HEADERS, is_blocked_response, has_challenge_marker
+from album_parser import parse_album_page, find_download_link, ALBUM_PAGE_READY, TRACK_PAGE_READY
+from download_index import DownloadIndex
+from integrity import AlbumManifest, StreamHasher, IntegrityError, check_flac
+from metadata_cache import MetadataCache, DEFAULT_TTL
+from stage_metrics import StageTimer, maybe_span
+from driver_pool import get_driver_pool
+from host_policy import (async_call_with_retry, get_host_policy, classify_error, classify_status,
+                         parse_retry_after, RETRYABLE, CLIENT_ERROR, NETWORK_ERROR, OTHER_ERROR)
+from track_resolver import DEFAULT_RESOLVE_WORKERS
+from download_scheduler import DEFAULT_DOWNLOAD_WORKERS, FairSlots, DEFAULT_WEIGHT
+from bandwidth import get_bandwidth_limiter
+from downloader_core import DRIVER_WAIT_TIMEOUT, sanitize_filename
+from progress_events import LogMessage, FileStatus, FileProgress, TotalProgress, TotalFiles
+
+# 엔진 전체의 연결 수와 동시 파일 전송 수
+DEFAULT_MAX_CONNECTIONS = 1000
+DEFAULT_MAX_TRANSFERS = 256
+# 디스크 쓰기/해시를 맡는 스레드 수
+DEFAULT_DISK_WORKERS = 4
+# 한 번에 읽는 크기와, 모아서 디스크 스레드에 넘기는 크기 (전송당 메모리 상한)
+READ_SIZE = 64 * 1024
+WRITE_BUFFER_SIZE = 256 * 1024
+CONNECT_TIMEOUT = 30
+READ_TIMEOUT = 30
+
+
+def is_available():
+    """aiohttp가 설치되어 있으면 True"""
+    return aiohttp is not None
+
+
+def classify_client_error(error):
+    """aiohttp 예외를 host_policy의 오류 종류로 분류"""
+    if isinstance(error, aiohttp.ClientResponseError):
+        headers = error.headers or {}
+        return (classify_status(error.status) or OTHER_ERROR,
+                parse_retry_after(headers.get('retry-after')))
+    if isinstance(error, (aiohttp.ClientConnectionError, aiohttp.ClientPayloadError,
+                          asyncio.TimeoutError)):
+        return NETWORK_ERROR, None
+    return classify_error(error)
+
+
+def _write_chunk(f, data, hasher):
+    """디스크 스레드에서 쓰기와 해시 계산"""
+    f.write(data)
+    if hasher:
+        hasher.update(data)
+
+
+class AsyncEngine:
+    """모든 앨범이 공유하는 이벤트 루프, HTTP 연결 풀, 디스크 쓰기 스레드
+
+    루프는 별도 스레드에서 돌고, 앨범 작업(AsyncAlbumJob)은 그 위에서
+    코루틴으로 실행됩니다. 파일 쓰기와 해시 계산은 루프를 막지 않도록
+    작은 스레드 풀에 넘기고, 동시 파일 전송 수는 max_transfers로 제한합니다.
+    전송 슬롯은 스레드 엔진의 전역 슬롯과 같은 규칙(FairSlots)으로 앨범
+    가중치에 따라 나눕니다.
+    """
+
+    def __init__(self, max_connections=DEFAULT_MAX_CONNECTIONS, max_transfers=DEFAULT_MAX_TRANSFERS,
+                 disk_workers=DEFAULT_DISK_WORKERS):
+        if aiohttp is None:
+            raise RuntimeError("asyncio 엔진을 사용하려면 aiohttp가 필요합니다.")
+        self.max_connections = max_connections
+        self.max_transfers = max(1, max_transfers)
+        self.disk_executor = ThreadPoolExecutor(max_workers=disk_workers,
+                                                thread_name_prefix="async-disk")
+        self.loop = asyncio.new_event_loop()
+        self._session = None
+        self._slots = FairSlots(self.max_transfers)
+        self._transfer_cond = None
+        self._thread = threading.Thread(target=self._run_loop, name="async-engine", daemon=True)
+        self._thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro):
+        """코루틴을 엔진 루프에서 실행 (concurrent.futures.Future 반환)"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    async def get_session(self):
+        """공유 HTTP 세션 (루프 안에서 처음 호출할 때 생성)"""
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self.max_connections, limit_per_host=0,
+                                             ttl_dns_cache=300)
+            timeout = aiohttp.ClientTimeout(total=None, sock_connect=CONNECT_TIMEOUT,
+                                            sock_read=READ_TIMEOUT)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=timeout,
+                                                  headers=DEFAULT_HEADERS)
+        return self._session
+
+    def _condition(self):
+        if self._transfer_cond is None:
+            self._transfer_cond = asyncio.Condition()
+        return self._transfer_cond
+
+    async def acquire_transfer(self, job):
+        """job(앨범) 몫의 전송 슬롯을 기다림 (가중치에 따라 공평하게 배분)"""
+        cond = self._condition()
+        self._slots.enqueue(job)
+        try:
+            async with cond:
+                await cond.wait_for(lambda: self._slots.try_enter(job))
+        except BaseException:
+            self._slots.dequeue(job)
+            raise
+
+    async def release_transfer(self, job):
+        cond = self._condition()
+        self._slots.leave(job)
+        async with cond:
+            # 다음 차례가 어느 앨범인지는 기다리는 쪽에서 확인
+            cond.notify_all()
+
+    def _wake(self):
+        async def wake():
+            cond = self._condition()
+            async with cond:
+                cond.notify_all()
+
+        self.submit(wake())
+
+    def set_transfer_limit(self, limit):
+        """동시 파일 전송 수 변경 (기다리던 전송은 바로 다시 확인)"""
+        self.max_transfers = max(1, int(limit))
+        self._slots.resize(self.max_transfers)
+        self._wake()
+
+    def set_weight(self, job, weight):
+        """job(앨범)이 전송 슬롯에서 가져갈 몫의 가중치 변경"""
+        self._slots.set_weight(job, weight)
+        self._wake()
+
+    def forget(self, job):
+        self._slots.forget(job)
+
+    async def run_io(self, func, *args, **kwargs):
+        """블로킹 파일 작업을 디스크 스레드에서 실행"""
+        return await self.loop.run_in_executor(self.disk_executor,
+                                               functools.partial(func, *args, **kwargs))
+
+    def close(self, timeout=5.0):
+        """세션을 닫고 루프와 디스크 스레드 종료"""
+        async def shutdown():
+            if self._session is not None:
+                await self._session.close()
+
+        try:
+            self.submit(shutdown()).result(timeout)
+        except Exception as e:
+            print(f"=== asyncio 엔진 세션 종료 중 오류: {str(e)} ===")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
+        self.disk_executor.shutdown(wait=False)
+
+
+class AsyncAlbumJob:
+    """앨범 하나를 AsyncEngine 위에서 받는 작업
+
+    DownloaderThread와 같은 start()/stop()/is_alive()/join()과 진행 이벤트,
+    status/failed_files를 제공하므로 App과 CLI가 그대로 사용할 수 있습니다.
+    차단 페이지는 DownloaderThread처럼 공유 풀의 Chrome 드라이버로 불러옵니다
+    (브라우저 호출은 블로킹이므로 기본 스레드 풀에서 실행).
+    """
+
+    def __init__(self, album_url, download_folder, progress_callback, engine=None,
+                 resolve_workers=DEFAULT_RESOLVE_WORKERS,
+                 download_workers=DEFAULT_DOWNLOAD_WORKERS, verify_existing=False,
+                 cache_ttl=DEFAULT_TTL, preferred_format=None, verify_flac=False,
+                 weight=DEFAULT_WEIGHT):
+        self.album_url = album_url
+        self.download_folder = download_folder
+        self.progress_callback = progress_callback
+        self.engine = engine
+        self.resolve_workers = max(1, resolve_workers)
+        self.download_workers = max(1, download_workers)
+        self.verify_existing = verify_existing
+        self.cache_ttl = cache_ttl
+        self.preferred_format = preferred_format
+        self.verify_flac = verify_flac
+        self.daemon = True  # DownloaderThread와 같은 속성 (의미 없음)
+        self.is_running = True
+        self.status = None  # completed, stopped, failed
+        self.failed_files = 0
+        self.weight = weight  # 대역폭과 전송 슬롯을 나눌 때의 가중치
+        self.bandwidth = get_bandwidth_limiter()
+        self.index = None
+        self.cache = None
+        self.manifest = None
+        self.timer = StageTimer(album_url)
+        # 차단 시 Chrome으로 불러오는 경로와 챌린지 통과 쿠키 보관용
+        self.fetcher = PageFetcher(driver_factory=self._get_driver, is_running=lambda: self.is_running)
+        self.fetcher.timer = self.timer
+        self.driver_pool = get_driver_pool()
+        self._pooled = None
+        self._driver_lock = threading.Lock()
+        self._task = None
+        self._done = threading.Event()
+
+    @property
+    def driver(self):
+        return self._pooled.driver if self._pooled else None
+
+    # DownloaderThread와 같은 제어 메서드
+
+    def start(self):
+        if self.engine is None:
+            self.engine = get_async_engine()
+        self.engine.submit(self._run())
+
+    def is_alive(self):
+        return self.engine is not None and not self._done.is_set()
+
+    def join(self, timeout=None):
+        self._done.wait(timeout)
+
+    def stop(self):
+        """진행 중인 요청을 취소하고 받던 파일은 .part로 남김"""
+        if not self.is_running:
+            return
+        self.is_running = False
+        if self.engine is not None:
+            self.engine.loop.call_soon_threadsafe(self._cancel)
+        self._release_driver(discard=True)
+
+    def set_weight(self, weight):
+        """받는 도중에 가중치 변경 (대역폭 몫과 전송 슬롯 몫에 바로 적용)"""
+        self.weight = weight
+        self.bandwidth.set_weight(self, weight)
+        if self.engine is not None:
+            self.engine.set_weight(self, weight)
+
+    def _cancel(self):
+        if self._task is not None:
+            self._task.cancel()
+
+    def log(self, message):
+        self.progress_callback(LogMessage(message))
+
+    # Chrome 드라이버 (차단된 경우에만)
+
+    def _get_driver(self):
+        with self._driver_lock:
+            if self._pooled and self.driver_pool.needs_recycle(self._pooled):
+                self.driver_pool.release(self._pooled)
+                self._pooled = None
+            if self._pooled is None:
+                if not self.is_running:
+                    return None
+                self.log("🌐 일반 요청이 차단되거나 실패해 Chrome 드라이버로 전환합니다...")
+                with self.timer.span('driver_start'):
+                    self._pooled = self.driver_pool.acquire(timeout=DRIVER_WAIT_TIMEOUT)
+                if self._pooled is None:
+                    return None
+            self._pooled.pages += 1
+            return self._pooled.driver
+
+    def _release_driver(self, discard=False):
+        with self._driver_lock:
+            pooled, self._pooled = self._pooled, None
+        if pooled:
+            self.driver_pool.release(pooled, discard=discard)
+
+    # 페이지 요청
+
+    async def _get_page(self, url):
+        """aiohttp로 한 번 요청해 (상태 코드, 본문) 반환
+
+        챌린지가 아닌 429/5xx와 차단이 아닌 오류 응답은 예외로 전달합니다.
+        """
+        session = await self.engine.get_session()
+        with maybe_span(self.timer, 'page_fetch', url):
+            async with session.get(url) as response:
+                text = await response.text(errors='replace')
+                retryable = (classify_status(response.status) in RETRYABLE
+                             and not has_challenge_marker(text))
+                if retryable or not is_blocked_response(response.status, text):
+                    response.raise_for_status()
+        return response.status, text
+
+    async def _fetch(self, url, ready=()):
+        """PageFetcher.fetch()와 같은 규칙으로 HTML 반환 (차단되면 Chrome 사용)"""
+        fetcher = self.fetcher
+        if not fetcher.use_browser:
+            try:
+                status, text = await async_call_with_retry(
+                    url, lambda: self._get_page(url), lambda: self.is_running,
+                    timer=self.timer, classify=classify_client_error)
+                if not is_blocked_response(status, text):
+                    return text
+                print(f"=== 차단 응답 감지 ({status}), Chrome으로 전환: {url} ===")
+                if fetcher.driver_factory is None:
+                    raise IOError(f"차단된 응답 (HTTP {status}): {url}")
+                fetcher.use_browser = True
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                # 404 등 차단이 아닌 4xx는 Chrome으로 불러와도 같으므로 그대로 오류
+                if fetcher.driver_factory is None or classify_client_error(e)[0] == CLIENT_ERROR:
+                    raise
+                print(f"=== HTTP 요청 실패, Chrome으로 재시도: {url} - {str(e)} ===")
+
+        loop = asyncio.get_running_loop()
+        html = await loop.run_in_executor(None, fetcher.fetch_with_browser, url, ready)
+        # 챌린지 통과 쿠키를 aiohttp 세션에도 복사
+        session = await self.engine.get_session()
+        for cookie in fetcher.session.cookies:
+            session.cookie_jar.update_cookies({cookie.name: cookie.value}, URL(url))
+        return html
+
+    async def _load_album(self):
+        engine = self.engine
+        cache_key = f"album:{self.album_url}"
+        album = await engine.run_io(self.cache.get, cache_key) if self.cache else None
+        if album:
+            self.log("⚡ 캐시된 앨범 정보를 사용합니다.")
+            return album
+
+        loop = asyncio.get_running_loop()
+        album_html = await self._fetch(self.album_url, ALBUM_PAGE_READY)
+        with self.timer.span('parse', self.album_url):
+            page = await loop.run_in_executor(None, parse_album_page, album_html, self.album_url)
+        if not page:
+            return None
+
+        formats = ["MP3"]
+        if page.tracks:
+            track_html = await self._fetch(page.tracks[0], TRACK_PAGE_READY)
+            if await engine.run_io(find_download_link, track_html, "FLAC"):
+                formats.append("FLAC")
+
+        album = {
+            'title': page.title,
+            'catalog': page.catalog,
+            'images': page.images,
+            'tracks': page.tracks,
+            'formats': formats,
+        }
+        if self.cache:
+            await engine.run_io(self.cache.put, cache_key, album)
+        return album
+
+    async def _resolve_one(self, idx, track_url, file_type, slots):
+        """TrackResolver.resolve_one()과 같은 결과를 (번호, URL, 링크, 크기, 오류)로 반환"""
+        try:
+            async with slots:
+                with maybe_span(self.timer, 'resolve', track_url):
+                    link, size = await self._resolve_link(track_url, file_type)
+            return idx, track_url, link, size, None
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            return idx, track_url, None, 0, e
+
+    async def _resolve_link(self, track_url, file_type):
+        engine = self.engine
+        cache_key = f"track:{file_type}:{track_url}"
+        if self.cache:
+            cached = await engine.run_io(self.cache.get, cache_key)
+            if cached:
+                return cached['link'], cached['size']
+
+        html = await self._fetch(track_url, TRACK_PAGE_READY)
+        with maybe_span(self.timer, 'parse', track_url):
+            link = await engine.run_io(find_download_link, html, file_type)
+        size = await self._probe_size(link) if link else 0
+        if self.cache and link:
+            await engine.run_io(self.cache.put, cache_key, {'link': link, 'size': size})
+        return link, size
+
+    async def _probe_size(self, url):
+        """HEAD 요청으로 파일 크기 확인 (실패하면 0)"""
+        try:
+            session = await self.engine.get_session()
+            async with get_host_policy(url).async_slot(lambda: self.is_running):
+                with maybe_span(self.timer, 'probe', url):
+                    async with session.head(url, allow_redirects=True) as response:
+                        return int(response.headers.get('content-length', 0))
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+            return 0
+
+    # 파일 전송
+
+    async def _transfer(self, url, file_path, hasher, file_name):
+        """file_transfer.download()의 한 스트림 경로와 같은 .part 이어받기 (받은 바이트 반환)
+
+        구간 다운로드 정보가 남은 .part 파일은 이어받을 수 없으므로 처음부터 받습니다.
+        """
+        engine = self.engine
+        part_path = file_path + PART_SUFFIX
+        meta = await engine.run_io(file_transfer.load_part_meta, file_path)
+        if meta and (meta.get('url') != url or meta.get('segments')
+                     or not await engine.run_io(os.path.exists, part_path)):
+            await engine.run_io(file_transfer.discard_part, file_path)
+            meta = None
+
+        headers = {}
+        offset = 0
+        if meta:
+            offset = await engine.run_io(os.path.getsize, part_path)
+            if meta.get('size') and offset == meta['size']:
+                await engine.run_io(hasher.catch_up, part_path, offset)
+                await engine.run_io(file_transfer.finalize_part, file_path, meta['size'], self.timer)
+                return 0
+            headers['Range'] = f'bytes={offset}-'
+            headers.update(file_transfer.validator_headers(meta))
+
+        session = await engine.get_session()
+        async with session.get(url, headers=headers) as response:
+            # 이어받을 구간이 없으면(416) 응답을 닫은 뒤 처음부터 다시 받기
+            restart = response.status == 416
+            if not restart:
+                response.raise_for_status()
+
+                length = response.content_length or 0
+                if offset and response.status == 206:
+                    total_size = offset + length if length else meta.get('size', 0)
+                    mode = "ab"
+                    await engine.run_io(hasher.catch_up, part_path, offset)
+                else:
+                    offset = 0
+                    total_size = length
+                    mode = "wb"
+                    hasher.reset()
+                    await engine.run_io(file_transfer.save_part_meta, file_path,
+                                        file_transfer.new_part_meta(url, total_size, response))
+
+                downloaded = offset
+                f = await engine.run_io(open, part_path, mode, buffering=0)
+                try:
+                    buffer = bytearray()
+                    async for chunk in response.content.iter_chunked(READ_SIZE):
+                        if not self.is_running:
+                            raise DownloadStopped()
+                        buffer += chunk
+                        downloaded += len(chunk)
+                        if len(buffer) >= WRITE_BUFFER_SIZE:
+                            data = bytes(buffer)
+                            buffer.clear()
+                            await engine.run_io(_write_chunk, f, data, hasher)
+                        if total_size:
+                            self.progress_callback(FileProgress(file_name, downloaded, total_size))
+                        await self.bandwidth.async_throttle(self, len(chunk), lambda: self.is_running)
+                    if buffer:
+                        await engine.run_io(_write_chunk, f, bytes(buffer), hasher)
+                finally:
+                    await engine.run_io(f.close)
+
+        if restart:
+            await engine.run_io(file_transfer.discard_part, file_path)
+            return await self._transfer(url, file_path, hasher, file_name)
+
+        await engine.run_io(file_transfer.finalize_part, file_path, total_size, self.timer)
+        return downloaded - offset
+
+    async def _download_file(self, url, file_path):
+        """DownloaderThread.download_file()과 같은 상태 이벤트와 색인/목록 기록"""
+        engine = self.engine
+        file_name = os.path.basename(file_path)
+
+        if self.index and await engine.run_io(self.index.is_complete, url, file_path):
+            if self.manifest and not self.manifest.get(file_path):
+                sha256 = (await engine.run_io(self.index.lookup, url))['sha256']
+                await engine.run_io(self.manifest.add, file_path, url,
+                                    {'sha256': sha256} if sha256 else {})
+            self.progress_callback(FileStatus(file_name, "건너뜀"))
+            return True
+
+        self.progress_callback(FileStatus(file_name, "다운로드 중"))
+        hasher = StreamHasher()
+
+        async def transfer():
+            with self.timer.span('transfer', url) as span:
+                span['bytes'] = await self._transfer(url, file_path, hasher, file_name)
+
+        def on_retry(attempt, error, delay):
+            self.progress_callback(FileStatus(file_name, f"재시도 {attempt}"))
+            self.log(f"🔁 {file_name} - {str(error)} ({delay:.1f}초 후 재시도)")
+
+        await engine.acquire_transfer(self)
+        try:
+            await async_call_with_retry(url, transfer, lambda: self.is_running, on_retry,
+                                        timer=self.timer, classify=classify_client_error)
+        except DownloadStopped:
+            self.progress_callback(FileStatus(file_name, "중단됨"))
+            return False
+        except asyncio.CancelledError:
+            self.progress_callback(FileStatus(file_name, "중단됨"))
+            raise
+        except Exception:
+            if self.is_running:
+                raise
+            self.progress_callback(FileStatus(file_name, "중단됨"))
+            return False
+        finally:
+            await engine.release_transfer(self)
+
+        digests = hasher.hexdigests()
+        flac_md5 = None
+        if self.verify_flac and file_path.lower().endswith('.flac'):
+            try:
+                flac_md5 = await engine.run_io(check_flac, file_path)
+            except IntegrityError:
+                await engine.run_io(os.remove, file_path)
+                raise
+
+        if self.manifest:
+            await engine.run_io(self.manifest.add, file_path, url, digests, flac_md5)
+        if self.index:
+            await engine.run_io(self.index.record, url, file_path, sha256=digests.get('sha256'))
+        self.progress_callback(FileStatus(file_name, "완료"))
+        return True
+
+    async def _download_worker(self, queue, on_done):
+        """큐에서 큰 파일부터 꺼내 받음 (None을 받으면 종료)"""
+        while True:
+            _, _, job = await queue.get()
+            if job is None:
+                return
+            url, file_path = job
+            if not self.is_running:
+                on_done(file_path, False, None)
+                continue
+            try:
+                ok = await self._download_file(url, file_path)
+                on_done(file_path, ok, None)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                on_done(file_path, False, e)
+
+    # 앨범 처리 (DownloaderThread.run과 같은 순서)
+
+    async def _run(self):
+        self._task = asyncio.current_task()
+        tasks = []
+        engine = self.engine
+        try:
+            print(f"\n=== AsyncAlbumJob 실행 시작: {id(self)} ===")
+            self.bandwidth.register(self, self.weight)
+            engine.set_weight(self, self.weight)
+            if not self.is_running:
+                self.status = 'stopped'
+                return
+            self.index = await engine.run_io(DownloadIndex, self.download_folder,
+                                             verify=self.verify_existing)
+            self.cache = await engine.run_io(MetadataCache, self.download_folder, ttl=self.cache_ttl)
+
+            album = await self._load_album()
+            if not album:
+                self.log("⚠️ 앨범 제목을 찾을 수 없습니다.")
+                self.status = 'failed'
+                return
+
+            album_name = album['title']
+            catalog_text = album['catalog']
+            image_links = album['images']
+            track_links = album['tracks']
+            file_type = "FLAC" if "FLAC" in album['formats'] else "MP3"
+            if self.preferred_format in album['formats']:
+                file_type = self.preferred_format
+            elif self.preferred_format:
+                self.log(f"⚠️ {self.preferred_format} 형식이 없어 {file_type} 형식으로 받습니다.")
+            self.log(f"💿 앨범 제목: {album_name}")
+
+            if catalog_text:
+                self.log(f"📀 카탈로그 번호: {catalog_text}")
+                folder_name = f"{{{catalog_text}}} {album_name} [{file_type}]"
+            else:
+                self.log("⚠️ 카탈로그 번호를 찾을 수 없습니다.")
+                folder_name = f"{album_name} [{file_type}]"
+
+            album_folder = await engine.run_io(create_subfolder, self.download_folder, folder_name)
+            self.log(f"📁 저장 폴더: {os.path.basename(album_folder)}")
+            self.manifest = await engine.run_io(AlbumManifest, album_folder)
+
+            total_files = len(image_links) + len(track_links)
+            current_file = 0
+            self.log(f"\n🖼️ {len(image_links)}개의 앨범 커버 이미지를 찾았습니다.")
+            self.log(f"🔍 총 {len(track_links)}개의 {file_type} 트랙을 찾았습니다.")
+            self.log(f"📥 총 {total_files}개 파일 다운로드를 시작합니다...\n")
+            self.progress_callback(TotalFiles(total_files))
+
+            def on_file_done(file_path, ok, error):
+                nonlocal current_file
+                file_name = os.path.basename(file_path)
+                if error:
+                    self.failed_files += 1
+                    self.progress_callback(FileStatus(file_name, "실패"))
+                    self.log(f"❌ 다운로드 실패: {file_name} - {str(error)}")
+                elif not ok:
+                    self.progress_callback(FileStatus(file_name, "중단됨"))
+                else:
+                    current_file += 1
+                    self.progress_callback(TotalProgress(round(current_file / total_files * 100, 1)))
+
+            # 큰 파일부터 꺼내는 우선순위 큐와 앨범별 전송 작업
+            queue = asyncio.PriorityQueue()
+            counter = itertools.count()
+            workers = [asyncio.create_task(self._download_worker(queue, on_file_done))
+                       for _ in range(self.download_workers)]
+            tasks.extend(workers)
+
+            if image_links:
+                images_folder = await engine.run_io(create_subfolder, album_folder, "Scans")
+                for img_url in image_links:
+                    file_name = os.path.basename(urllib.parse.unquote(img_url.split('?')[0]))
+                    self.progress_callback(FileStatus(file_name, "대기 중"))
+                    queue.put_nowait((0, next(counter), (img_url, os.path.join(images_folder, file_name))))
+
+            # 트랙 페이지는 동시에 해석하고 풀리는 순서대로 큐에 넣음
+            slots = asyncio.Semaphore(self.resolve_workers)
+            resolvers = [asyncio.create_task(self._resolve_one(idx, url, file_type, slots))
+                         for idx, url in enumerate(track_links, 1)]
+            tasks.extend(resolvers)
+            for next_done in asyncio.as_completed(resolvers):
+                idx, track_url, download_link, size, error = await next_done
+                if error:
+                    self.log(f"[{idx}/{len(track_links)}] ⚠️ 트랙 페이지 로드 실패: {str(error)}")
+                if not download_link:
+                    self.failed_files += 1
+                    self.progress_callback(FileStatus(f"트랙 {idx}", "실패"))
+                    self.log(f"[{idx}/{len(track_links)}] ❌ 다운로드 가능한 파일을 찾을 수 없습니다.")
+                    continue
+                file_name = urllib.parse.unquote(os.path.basename(download_link))
+                self.progress_callback(FileStatus(file_name, "대기 중"))
+                queue.put_nowait((-size, next(counter), (download_link, os.path.join(album_folder, file_name))))
+
+            # 남은 파일을 모두 받은 뒤 작업 종료 (None은 가장 나중에 꺼내짐)
+            for _ in workers:
+                queue.put_nowait((float('inf'), next(counter), None))
+            await asyncio.gather(*workers)
+
+            if not self.is_running:
+                self.status = 'stopped'
+                return
+            self.progress_callback(TotalProgress(100.0))
+            self.log("\n✨ 모든 다운로드가 완료되었습니다!")
+            self.status = 'completed'
+            if not self.failed_files:
+                await engine.run_io(self.index.record_album, self.album_url, album_folder, total_files)
+
+        except asyncio.CancelledError:
+            self.status = 'stopped'
+        except Exception as e:
+            self.status = 'failed'
+            self.log(f"❌ 오류 발생: {str(e)}")
+            print(f"=== AsyncAlbumJob 실행 중 예외 발생: {id(self)} - {str(e)} ===")
+        finally:
+            for task in tasks:
+                task.cancel()
+            if tasks:
+                await asyncio.gather(*tasks, return_exceptions=True)
+            print(f"=== AsyncAlbumJob 실행 종료: {id(self)} ===")
+            self.bandwidth.unregister(self)
+            engine.forget(self)
+            for line in self.timer.finish():
+                self.log(line)
+            self.fetcher.close()
+            if self.index:
+                await engine.run_io(self.index.close)
+            if self.cache:
+                await engine.run_io(self.cache.close)
+            self._release_driver()
+            self._done.set()
+
+
+def create_subfolder(base_folder, subfolder_name):
+    """DownloaderThread.create_subfolder()와 같은 이름 정리 후 폴더 생성"""
+    folder_path = os.path.join(base_folder, sanitize_filename(subfolder_name))
+    os.makedirs(folder_path, exist_ok=True)
+    return folder_path
+
+
+# 모든 앨범이 공유하는 엔진
+_shared_engine = None
+_shared_lock = threading.Lock()
+_engine_settings = {'max_transfers': DEFAULT_MAX_TRANSFERS}
+
+
+def get_async_engine():
+    global _shared_engine
+    with _shared_lock:
+        if _shared_engine is None:
+            _shared_engine = AsyncEngine(max_transfers=_engine_settings['max_transfers'])
+        return _shared_engine
+
+
+def set_async_transfer_limit(limit):
+    """공유 엔진의 동시 파일 전송 수 변경"""
+    with _shared_lock:
+        _engine_settings['max_transfers'] = max(1, int(limit))
+        engine = _shared_engine
+    if engine:
+        engine.set_transfer_limit(limit)
+
+
+def shutdown_async_engine():
+    """프로그램 종료 시 공유 엔진 종료"""
+    global _shared_engine
+    with _shared_lock:
+        engine, _shared_engine = _shared_engine, None
+    if engine:
+        engine.close()
@@ -0,0 +1,198 @@
+import re
+import time
+import asyncio
+import threading
+from datetime import datetime
+
+# 동시 다운로드 슬롯과 대역폭을 같은 가중치로 나누도록 한 곳에서 정의
+from download_scheduler import DEFAULT_WEIGHT
+
+# 작업마다 쌓아 둘 수 있는 토큰 (몫의 몇 초 분량)
+BURST_SECONDS = 0.25
+# 이 시간 안에 데이터를 받은 작업끼리만 대역폭을 나눔
+ACTIVE_WINDOW = 1.0
+# 시간대 제한을 다시 확인하는 간격(초)
+SCHEDULE_CHECK_INTERVAL = 1.0
+
+_UNITS = {'': 1, 'B': 1, 'K': 1024, 'KB': 1024, 'M': 1024 ** 2, 'MB': 1024 ** 2,
+          'G': 1024 ** 3, 'GB': 1024 ** 3}
+_RATE_PATTERN = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([KMG]?B?)(?:/S)?\s*$')
+_RANGE_PATTERN = re.compile(r'^\s*(\d{1,2}):(\d{2})\s*-\s*(\d{1,2}):(\d{2})\s*=\s*(.+)$')
+
+
+def parse_rate(text):
+    """'2M', '500K', '1.5MB/s', '0' 같은 문자열을 초당 바이트로 변환 (0은 무제한)"""
+    if text is None or str(text).strip() == '':
+        return 0
+    match = _RATE_PATTERN.match(str(text).upper())
+    if not match:
+        raise ValueError(f"잘못된 대역폭 값: {text}")
+    return int(float(match.group(1)) * _UNITS[match.group(2)])
+
+
+def format_rate(rate):
+    if not rate:
+        return "무제한"
+    if rate >= 1024 ** 2:
+        return f"{rate / 1024 ** 2:.1f} MB/s"
+    return f"{rate / 1024:.0f} KB/s"
+
+
+def parse_schedule(text):
+    """'09:00-18:00=2M, 18:00-09:00=0' 을 [(시작 분, 끝 분, 초당 바이트)] 로 변환
+
+    끝 시각이 시작보다 이르면 자정을 넘기는 구간입니다. 빈 문자열은 빈 목록입니다.
+    """
+    schedule = []
+    for part in re.split(r'[,;]', text or ''):
+        if not part.strip():
+            continue
+        match = _RANGE_PATTERN.match(part)
+        if not match:
+            raise ValueError(f"잘못된 시간대 형식: {part.strip()} (예: 09:00-18:00=2M)")
+        start_h, start_m, end_h, end_m, rate = match.groups()
+        start = int(start_h) * 60 + int(start_m)
+        end = int(end_h) * 60 + int(end_m)
+        if start >= 24 * 60 or end > 24 * 60:
+            raise ValueError(f"잘못된 시각: {part.strip()}")
+        schedule.append((start, end, parse_rate(rate)))
+    return schedule
+
+
+def format_schedule(schedule):
+    """parse_schedule()의 반대 - [(시작 분, 끝 분, 초당 바이트)] 를 문자열로"""
+    return ", ".join(f"{start // 60:02d}:{start % 60:02d}-{end // 60:02d}:{end % 60:02d}={rate}"
+                     for start, end, rate in schedule)
+
+
+def scheduled_rate(schedule, when=None):
+    """when 시각에 해당하는 구간의 제한값 (해당 구간이 없으면 None)"""
+    when = when or datetime.now()
+    minute = when.hour * 60 + when.minute
+    for start, end, rate in schedule:
+        if start < end:
+            if start <= minute < end:
+                return rate
+        elif minute >= start or minute < end:
+            return rate
+    return None
+
+
+class _JobShare:
+    __slots__ = ('weight', 'tokens', 'last_fill', 'last_active')
+
+    def __init__(self, weight):
+        self.weight = weight
+        self.tokens = 0.0
+        self.last_fill = time.monotonic()
+        self.last_active = 0.0
+
+
+class BandwidthLimiter:
+    """모든 다운로드가 공유하는 바이트 단위 토큰 버킷
+
+    전체 제한을 최근 ACTIVE_WINDOW초 안에 데이터를 받은 작업(앨범)들에
+    가중치 비율로 나누고, 작업마다 자기 몫의 버킷에서 받은 바이트만큼
+    토큰을 씁니다. 그래서 파일이 많은 큰 앨범도 다른 앨범의 몫을 가져가지
+    못하고, 쉬는 작업의 몫은 곧 나머지 작업에 돌아갑니다.
+    schedule이 있으면 현재 시각에 해당하는 구간의 제한을 rate 대신 사용합니다.
+    """
+
+    def __init__(self, rate=0, schedule=None):
+        self.rate = rate
+        self.schedule = schedule or []
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._current = rate
+        self._checked = 0.0
+
+    def set_rate(self, rate):
+        """기본 제한 변경 (초당 바이트, 0은 무제한) - 받는 중인 파일에도 바로 적용"""
+        with self._lock:
+            self.rate = max(0, int(rate))
+            self._checked = 0.0
+
+    def set_schedule(self, schedule):
+        with self._lock:
+            self.schedule = list(schedule)
+            self._checked = 0.0
+
+    def current_rate(self):
+        """지금 적용되는 제한 (초당 바이트, 0은 무제한)"""
+        with self._lock:
+            return self._effective_rate(time.monotonic())
+
+    def _effective_rate(self, now):
+        if now - self._checked >= SCHEDULE_CHECK_INTERVAL:
+            self._checked = now
+            rate = scheduled_rate(self.schedule) if self.schedule else None
+            self._current = self.rate if rate is None else rate
+        return self._current
+
+    def register(self, job, weight=DEFAULT_WEIGHT):
+        with self._lock:
+            self._jobs[job] = _JobShare(max(0.01, float(weight)))
+
+    def unregister(self, job):
+        with self._lock:
+            self._jobs.pop(job, None)
+
+    def set_weight(self, job, weight):
+        with self._lock:
+            share = self._jobs.get(job)
+            if share:
+                share.weight = max(0.01, float(weight))
+
+    def reserve(self, job, nbytes):
+        """받은 nbytes를 기록하고 제한을 지키려면 기다려야 할 시간(초) 반환"""
+        with self._lock:
+            now = time.monotonic()
+            rate = self._effective_rate(now)
+            if rate <= 0:
+                return 0.0
+            share = self._jobs.get(job)
+            if share is None:
+                share = self._jobs[job] = _JobShare(DEFAULT_WEIGHT)
+            share.last_active = now
+            active_weight = sum(s.weight for s in self._jobs.values()
+                                if now - s.last_active < ACTIVE_WINDOW)
+            job_rate = rate * share.weight / active_weight
+            share.tokens = min(job_rate * BURST_SECONDS,
+                               share.tokens + (now - share.last_fill) * job_rate)
+            share.last_fill = now
+            share.tokens -= nbytes
+            return -share.tokens / job_rate if share.tokens < 0 else 0.0
+
+    def throttle(self, job, nbytes, is_running=lambda: True):
+        """받은 바이트만큼 필요한 시간 동안 대기 (중지되면 바로 반환)"""
+        delay = self.reserve(job, nbytes)
+        deadline = time.monotonic() + delay
+        while delay > 0 and is_running():
+            time.sleep(min(delay, 0.2))
+            delay = deadline - time.monotonic()
+
+    async def async_throttle(self, job, nbytes, is_running=lambda: True):
+        """throttle()의 asyncio 버전"""
+        delay = self.reserve(job, nbytes)
+        deadline = time.monotonic() + delay
+        while delay > 0 and is_running():
+            await asyncio.sleep(min(delay, 0.2))
+            delay = deadline - time.monotonic()
+
+
+# 모든 앨범(스레드)이 공유하는 대역폭 제한
+_limiter = BandwidthLimiter()
+
+
+def get_bandwidth_limiter():
+    return _limiter
+
+
+def set_bandwidth_limit(rate):
+    """전체 대역폭 제한 변경 (초당 바이트 또는 '2M' 같은 문자열, 0은 무제한)"""
+    _limiter.set_rate(parse_rate(rate) if isinstance(rate, str) else rate)
+
+
+def set_bandwidth_schedule(text):
+    """시간대별 제한 변경 (예: '09:00-18:00=2M'), 빈 문자열이면 해제"""
+    _limiter.set_schedule(parse_schedule(text))
@@ -0,0 +1,124 @@
+"""앨범 페이지 파서 벤치마크
+
+기존 BeautifulSoup 방식(여러 번 트리 순회)과 album_parser의 단일 패스 파서를
+비교합니다. 저장해 둔 앨범 페이지 HTML 파일을 인자로 주면 그 파일들을,
+없으면 합성한 대형 앨범 페이지를 사용합니다.
+
+    python benchmarks/bench_album_parser.py [album.html ...] [--tracks 500] [--repeat 20]
+"""
+import os
+import sys
+import time
+import argparse
+import urllib.parse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+import album_parser
+
+
+def generate_album_html(track_count=500, image_count=12):
+    """KHInsider 앨범 페이지와 같은 구조의 HTML 생성"""
+    nav = ''.join(f'<li><a href="/game-soundtracks/browse/{c}">{c}</a></li>' for c in "ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+    images = ''.join(
+        f'<div class="albumImage"><a href="https://vgmsite.com/soundtracks/test/{i:02d}.jpg" target="_blank">'
+        f'<img src="https://vgmsite.com/soundtracks/test/thumbs/{i:02d}.jpg"></a><br>[ ]</div>'
+        for i in range(1, image_count + 1))
+    rows = ''.join(
+        f'<tr><td class="clickable-row"><a href="/game-soundtracks/album/test/{i:03d}.mp3">{i}.</a></td>'
+        f'<td class="clickable-row"><a href="/game-soundtracks/album/test/{i:03d}.mp3">Track {i}</a></td>'
+        f'<td class="clickable-row"><a href="/game-soundtracks/album/test/{i:03d}.mp3">3:21</a></td>'
+        f'<td class="clickable-row"><a href="/game-soundtracks/album/test/{i:03d}.mp3">8.01 MB</a></td>'
+        f'<td class="playlistDownloadSong"><a href="/game-soundtracks/album/test/{i:03d}.mp3">get</a></td></tr>'
+        for i in range(1, track_count + 1))
+    return (
+        '<html><head><title>Test Album</title></head><body>'
+        f'<div id="header"><ul>{nav}</ul></div>'
+        '<div id="pageContent"><h2>Test Album (Original Soundtrack)</h2>'
+        '<p align="left">Platforms: <a href="/game-soundtracks/switch">Switch</a><br>'
+        'Year: <b>2024</b><br>Catalog Number: <b>TEST-00001</b><br>Published by: <b>Test</b></p>'
+        f'<table><tr><td>{images}</td></tr></table>'
+        '<table><tr><td><audio id="audio" controls></audio></td></tr></table>'
+        f'<table id="songlist"><tr><th>#</th><th>Song Name</th><th>Time</th><th>Size</th><th></th></tr>{rows}</table>'
+        '</div></body></html>')
+
+
+def legacy_parse(html):
+    """DownloaderThread에서 쓰던 BeautifulSoup 기반 파싱"""
+    soup = BeautifulSoup(html, "html.parser")
+    album_title = soup.select_one("h2")
+    if not album_title:
+        return None
+    catalog_text = None
+    for text in soup.stripped_strings:
+        if "Catalog Number:" in text:
+            element = soup.find(string=lambda t: t and "Catalog Number:" in t)
+            if element:
+                next_b = element.find_next('b')
+                if next_b:
+                    catalog_text = next_b.text.strip()
+                break
+    image_links = []
+    current = album_title
+    album_table = None
+    while current:
+        if current.name == 'table':
+            if current.find('audio'):
+                break
+            if len(current.find_all('td')) == 1:
+                album_table = current
+                break
+        current = current.find_next()
+    if album_table:
+        for a in album_table.find_all('a'):
+            if a.text.strip().replace('[', '').replace(']', '').strip() == '':
+                href = a.get('href', '')
+                if any(ext in href.lower() for ext in album_parser.IMAGE_EXTENSIONS):
+                    image_links.append(href)
+        image_links.sort(key=lambda x: os.path.basename(x))
+    track_links = set()
+    for a in soup.select("a"):
+        href = a.get("href", "")
+        if href.endswith(".mp3"):
+            track_links.add(urllib.parse.urljoin(album_parser.BASE_URL, href))
+    return album_parser.AlbumPage(album_title.text.strip(), catalog_text, image_links, sorted(track_links))
+
+
+def timed(func, html, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = func(html)
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="앨범 페이지 파서 벤치마크")
+    parser.add_argument('files', nargs='*', help="저장한 앨범 페이지 HTML 파일")
+    parser.add_argument('--tracks', type=int, default=500, help="합성 페이지의 트랙 수")
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    fixtures = []
+    for path in args.files:
+        with open(path, 'r', encoding='utf-8') as f:
+            fixtures.append((os.path.basename(path), f.read()))
+    if not fixtures:
+        fixtures.append((f"synthetic-{args.tracks}-tracks", generate_album_html(args.tracks)))
+
+    for name, html in fixtures:
+        print(f"== {name} ({len(html) / 1024:.0f} KB)")
+        base_time, expected = timed(legacy_parse, html, args.repeat)
+        print(f"  {'bs4 (legacy)':<14} {base_time * 1000:8.2f} ms")
+        for backend in album_parser.available_backends():
+            elapsed, result = timed(lambda h: album_parser.parse_album_page(h, backend=backend),
+                                    html, args.repeat)
+            same = (result is not None and expected is not None
+                    and (result.title, result.catalog, result.images, sorted(result.tracks))
+                    == (expected.title, expected.catalog, expected.images, expected.tracks))
+            print(f"  {backend:<14} {elapsed * 1000:8.2f} ms  x{base_time / elapsed:5.1f}"
+                  f"  {'일치' if same else '결과 불일치!'}")
+
+
+if __name__ == "__main__":
+    main()
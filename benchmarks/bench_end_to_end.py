@@ -0,0 +1,205 @@
+"""다운로더 전체 경로 벤치마크 (로컬 모의 서버 사용)
+
+별도 프로세스에서 benchmarks/mock_server.py 서버를 띄우고 DownloaderThread로
+앨범을 받으면서 앨범/분, MB/s, 파일별 첫 바이트까지 걸린 시간(TTFB),
+CPU 시간과 최대 메모리(RSS)를 측정합니다. 네트워크 조건은 서버 옵션으로 바꿉니다.
+
+    python benchmarks/bench_end_to_end.py --albums 6 --tracks 10 --flac-mb 4
+    python benchmarks/bench_end_to_end.py --latency 0.05 --bandwidth-mbps 20 --concurrent-albums 3
+    python benchmarks/bench_end_to_end.py --error-rate 0.02 --drop-rate 0.05 --json
+    python benchmarks/bench_end_to_end.py --engine async --albums 50 --concurrent-albums 50 --global-limit 400
+"""
+import gc
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import threading
+import statistics
+import multiprocessing
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from downloader_core import DownloaderThread
+from async_engine import AsyncAlbumJob, set_async_transfer_limit, shutdown_async_engine
+from download_scheduler import (set_global_download_limit, DEFAULT_DOWNLOAD_WORKERS,
+                                DEFAULT_GLOBAL_DOWNLOAD_LIMIT)
+from track_resolver import DEFAULT_RESOLVE_WORKERS
+from host_policy import configure_host_policies, MAX_RATE
+from bandwidth import set_bandwidth_limit
+from progress_events import FileStatus, FileProgress
+from file_transfer import PART_SUFFIX, META_SUFFIX
+from mock_server import MockKHInsiderServer, add_config_arguments, config_from_args, album_urls
+
+
+def _serve(config, port_queue):
+    server = MockKHInsiderServer(('127.0.0.1', 0), config)
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # 리눅스는 KB, macOS는 바이트 단위
+    return peak / 1024 / 1024 if sys.platform == 'darwin' else peak / 1024
+
+
+class TimingRecorder:
+    """파일별로 다운로드 시작과 첫 진행 이벤트 사이의 시간을 기록"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = {}
+        self.ttfb = []
+
+    def callback_for(self, album_url):
+        def callback(event):
+            key = (album_url, getattr(event, 'filename', None))
+            if isinstance(event, FileStatus) and event.status == "다운로드 중":
+                with self._lock:
+                    self._started[key] = time.perf_counter()
+            elif isinstance(event, FileProgress):
+                with self._lock:
+                    started = self._started.pop(key, None)
+                    if started is not None:
+                        self.ttfb.append(time.perf_counter() - started)
+        return callback
+
+
+def folder_bytes(root):
+    total = 0
+    for folder, _, files in os.walk(root):
+        for name in files:
+            # 색인/목록 파일과 받다 만 .part 파일은 제외
+            if not name.startswith('.') and not name.endswith((PART_SUFFIX, META_SUFFIX)):
+                total += os.path.getsize(os.path.join(folder, name))
+    return total
+
+
+def run_albums(urls, output, args, recorder):
+    """CLI와 같은 방식으로 최대 concurrent_albums개씩 앨범을 받고 결과 목록 반환"""
+    active, finished = [], []
+    pending = list(urls)
+    while pending or active:
+        while pending and len(active) < args.concurrent_albums:
+            url = pending.pop(0)
+            job_class = AsyncAlbumJob if args.engine == 'async' else DownloaderThread
+            worker = job_class(url, output, recorder.callback_for(url),
+                               resolve_workers=args.resolve_workers,
+                               download_workers=args.download_workers)
+            # 모의 서버의 오류 응답 때문에 Chrome을 띄우지 않도록 브라우저 전환을 끔
+            worker.fetcher.driver_factory = None
+            worker.daemon = True
+            worker.start()
+            active.append(worker)
+        active[0].join(timeout=0.05)
+        for worker in [w for w in active if not w.is_alive()]:
+            active.remove(worker)
+            finished.append(worker)
+    return finished
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="다운로더 전체 경로 벤치마크")
+    add_config_arguments(parser)
+    parser.add_argument('--concurrent-albums', type=int, default=2, help="동시에 받을 앨범 수")
+    parser.add_argument('--download-workers', type=int, default=DEFAULT_DOWNLOAD_WORKERS)
+    parser.add_argument('--resolve-workers', type=int, default=DEFAULT_RESOLVE_WORKERS)
+    parser.add_argument('--global-limit', type=int, default=DEFAULT_GLOBAL_DOWNLOAD_LIMIT)
+    parser.add_argument('--engine', choices=['thread', 'async'], default='thread',
+                        help="앨범별 스레드(thread) 또는 이벤트 루프 하나(async, aiohttp 필요)")
+    parser.add_argument('--max-rate', type=float, default=MAX_RATE,
+                        help="호스트별 최대 초당 요청 수 (로컬 측정에서는 크게 잡아 제한을 풂)")
+    parser.add_argument('--limit', default='0',
+                        help="다운로더 쪽 전체 대역폭 제한 (예: 20M, 0은 무제한)")
+    parser.add_argument('--keep', help="받은 파일을 지우지 않고 이 폴더에 남김")
+    parser.add_argument('--json', action='store_true', help="결과를 JSON 한 줄로 출력")
+    args = parser.parse_args()
+
+    config = config_from_args(args)
+    port_queue = multiprocessing.Queue()
+    server = multiprocessing.Process(target=_serve, args=(config, port_queue), daemon=True)
+    server.start()
+    base_url = f"http://127.0.0.1:{port_queue.get(timeout=10)}"
+    set_global_download_limit(args.global_limit)
+    set_async_transfer_limit(args.global_limit)
+    configure_host_policies(max_rate=args.max_rate)
+    set_bandwidth_limit(args.limit)
+
+    # 디버그 출력이 결과를 가리지 않도록 stderr로 보냄
+    out = sys.stdout
+    sys.stdout = sys.stderr
+
+    recorder = TimingRecorder()
+    tmp = None
+    try:
+        if args.keep:
+            output = args.keep
+        else:
+            tmp = tempfile.TemporaryDirectory()
+            output = tmp.name
+        cpu_start = time.process_time()
+        started = time.perf_counter()
+        workers = run_albums(album_urls(base_url, config), output, args, recorder)
+        elapsed = time.perf_counter() - started
+        cpu = time.process_time() - cpu_start
+        downloaded = folder_bytes(output)
+        statuses = [(w.status, w.failed_files) for w in workers]
+        # 스레드 객체 정리 시의 디버그 출력도 stderr로 가도록 여기서 해제
+        # (재시도한 예외의 traceback이 참조를 잡고 있을 수 있어 gc도 실행)
+        del workers
+        gc.collect()
+    finally:
+        shutdown_async_engine()
+        server.terminate()
+        if tmp:
+            tmp.cleanup()
+        sys.stdout = out
+
+    completed = sum(1 for status, failed in statuses if status == 'completed' and not failed)
+    result = {
+        'albums': len(statuses),
+        'completed_albums': completed,
+        'failed_files': sum(failed for _, failed in statuses),
+        'elapsed_s': round(elapsed, 3),
+        'albums_per_min': round(len(statuses) / elapsed * 60, 2),
+        'mb_per_s': round(downloaded / 1024 / 1024 / elapsed, 2),
+        'downloaded_mb': round(downloaded / 1024 / 1024, 1),
+        'ttfb_median_ms': round(statistics.median(recorder.ttfb) * 1000, 1) if recorder.ttfb else None,
+        'ttfb_p95_ms': round(percentile(recorder.ttfb, 0.95) * 1000, 1) if recorder.ttfb else None,
+        'cpu_s': round(cpu, 2),
+        'peak_rss_mb': round(peak_rss_mb(), 1) if resource else None,
+    }
+
+    if args.json:
+        out.write(json.dumps(result) + "\n")
+        return
+    print(f"== {result['albums']}개 앨범 x {config.tracks}트랙 "
+          f"(지연 {config.latency}s, 대역폭 {args.bandwidth_mbps or '무제한'} MB/s)")
+    print(f"  완료 앨범      {completed}/{result['albums']}  (실패 파일 {result['failed_files']})")
+    print(f"  경과 시간      {result['elapsed_s']:.2f} s")
+    print(f"  앨범/분        {result['albums_per_min']:.1f}")
+    print(f"  처리량         {result['mb_per_s']:.1f} MB/s  ({result['downloaded_mb']} MB)")
+    print(f"  TTFB           중앙값 {result['ttfb_median_ms']} ms  p95 {result['ttfb_p95_ms']} ms")
+    print(f"  CPU 시간       {result['cpu_s']:.2f} s")
+    print(f"  최대 RSS       {result['peak_rss_mb']} MB")
+
+
+if __name__ == "__main__":
+    main()
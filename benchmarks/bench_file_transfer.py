@@ -0,0 +1,118 @@
+"""파일 전송 경로 벤치마크
+
+별도 프로세스에서 띄운 로컬 HTTP 서버로부터 같은 파일을 받으면서, 예전 방식
+(iter_content 8 KB + 청크마다 바로 쓰기)과 file_transfer.download(적응형 읽기 크기
++ 버퍼 쓰기)의 처리량과 CPU 사용량을 비교합니다. 서버는 다른 프로세스이므로
+측정한 CPU 시간은 받는 쪽만의 비용입니다.
+
+    python benchmarks/bench_file_transfer.py [--size-mb 256] [--repeat 3]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+import multiprocessing
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import file_transfer
+from page_fetcher import create_session
+
+LEGACY_BLOCK_SIZE = 8192
+
+
+def serve(size, port_queue):
+    """size 바이트짜리 파일 하나를 제공하는 서버 (벤치마크 프로세스와 분리)"""
+    payload = os.urandom(1024 * 1024)
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/octet-stream')
+            self.send_header('Content-Length', str(size))
+            self.end_headers()
+            view = memoryview(payload)
+            remaining = size
+            while remaining:
+                n = min(remaining, len(payload))
+                self.wfile.write(view[:n])
+                remaining -= n
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    port_queue.put(server.server_address[1])
+    server.serve_forever()
+
+
+def legacy_download(session, url, file_path):
+    """예전 download_file과 같은 고정 8 KB 읽기 + 청크마다 쓰기"""
+    with session.get(url, stream=True, timeout=30) as response, open(file_path, "wb") as f:
+        for chunk in response.iter_content(chunk_size=LEGACY_BLOCK_SIZE):
+            if chunk:
+                f.write(chunk)
+
+
+def adaptive_download(session, url, file_path):
+    file_transfer.download(session, url, file_path, lambda: True)
+
+
+def measure(func, session, url, file_path, repeat):
+    """가장 빠른 회차의 (경과 시간, CPU 시간) 반환"""
+    best = None
+    for _ in range(repeat):
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        wall, cpu = time.perf_counter(), time.process_time()
+        func(session, url, file_path)
+        result = (time.perf_counter() - wall, time.process_time() - cpu)
+        if best is None or result[0] < best[0]:
+            best = result
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="파일 전송 경로 벤치마크")
+    parser.add_argument('--size-mb', type=int, default=256, help="받을 파일 크기(MB)")
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    size = args.size_mb * 1024 * 1024
+    # 구간 다운로드로 바뀌지 않도록 한 스트림 경로만 비교
+    file_transfer.SEGMENT_THRESHOLD = size + 1
+    file_transfer.should_segment.__defaults__ = (file_transfer.SEGMENT_THRESHOLD,)
+
+    port_queue = multiprocessing.Queue()
+    server = multiprocessing.Process(target=serve, args=(size, port_queue), daemon=True)
+    server.start()
+    url = f"http://127.0.0.1:{port_queue.get(timeout=10)}/bench.bin"
+
+    session = create_session()
+    results = {}
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            file_path = os.path.join(tmp, "bench.bin")
+            for name, func in (('iter_content 8K', legacy_download),
+                               ('adaptive', adaptive_download)):
+                elapsed, cpu = measure(func, session, url, file_path, args.repeat)
+                assert os.path.getsize(file_path) == size
+                results[name] = (elapsed, cpu)
+                gbits = size * 8 / 1e9
+                print(f"  {name:<16} {size / elapsed / 1024 / 1024:8.1f} MB/s"
+                      f"  CPU {cpu:6.2f}s  ({cpu / gbits:5.2f} CPU-s/Gbit)")
+    finally:
+        session.close()
+        server.terminate()
+
+    base_cpu = results['iter_content 8K'][1]
+    new_cpu = results['adaptive'][1]
+    print(f"  CPU 사용량 x{base_cpu / new_cpu:4.1f} 감소")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,342 @@
+"""KHInsider 구조를 흉내 내는 로컬 테스트 서버
+
+앨범 페이지(h2 제목, Catalog Number의 b 태그, 셀 하나짜리 이미지 테이블,
+.mp3 트랙 링크), 트랙 페이지(MP3/FLAC 직접 링크), 합성 음원/이미지 파일을
+생성해서 제공합니다. 지연 시간, 연결별 대역폭, 오류 응답과 전송 중 연결 끊김을
+설정할 수 있어 실제 사이트 없이 다운로더 전체 경로를 측정할 수 있습니다.
+
+    python benchmarks/mock_server.py --port 8000 --albums 20 --tracks 12 --latency 0.05
+    python khinsider_downloader.py http://127.0.0.1:8000/game-soundtracks/album/mock-album-001 -o out
+    python khinsider_downloader.py --sync http://127.0.0.1:8000/game-soundtracks/browse/M -o out
+"""
+import re
+import sys
+import time
+import random
+import hashlib
+import argparse
+import threading
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ALBUM_PATH = "/game-soundtracks/album/"
+LISTING_PATH = "/game-soundtracks/browse/"
+LISTING_PAGE_SIZE = 50
+FILE_PATH = "/soundtracks/"
+FILLER_SIZE = 64 * 1024
+WRITE_SIZE = 64 * 1024
+
+
+@dataclass
+class MockConfig:
+    """서버가 만들어 낼 앨범 구성과 네트워크 조건"""
+    albums: int = 10
+    tracks: int = 12
+    images: int = 3
+    flac_size: int = 8 * 1024 * 1024
+    mp3_size: int = 3 * 1024 * 1024
+    image_size: int = 512 * 1024
+    flac: bool = True
+    latency: float = 0.0  # 응답 전 지연(초)
+    bandwidth: int = 0  # 연결별 최대 전송 속도(바이트/초, 0이면 제한 없음)
+    error_rate: float = 0.0  # HTTP 500으로 응답할 확률
+    drop_rate: float = 0.0  # 파일 전송 도중 연결을 끊을 확률
+    seed: int = 0
+
+
+def album_slug(index):
+    return f"mock-album-{index:03d}"
+
+
+def album_urls(base_url, config):
+    return [f"{base_url}{ALBUM_PATH}{album_slug(i)}" for i in range(1, config.albums + 1)]
+
+
+def album_index(slug):
+    match = re.fullmatch(r"mock-album-(\d+)", slug)
+    return int(match.group(1)) if match else None
+
+
+def flac_header():
+    """STREAMINFO 블록 하나만 있는 FLAC 헤더 (오디오 MD5는 비워 둠)"""
+    return b"fLaC" + bytes([0x80, 0, 0, 34]) + bytes(34)
+
+
+class SyntheticFile:
+    """경로에서 정해지는 내용을 필요한 구간만 만들어 내는 가상 파일"""
+
+    def __init__(self, path, size):
+        self.size = size
+        self.etag = '"' + hashlib.md5(f"{path}:{size}".encode()).hexdigest() + '"'
+        seed = hashlib.sha256(path.encode()).digest()
+        self._filler = (seed * (FILLER_SIZE // len(seed) + 1))[:FILLER_SIZE]
+        self._header = flac_header() if path.endswith(".flac") else b""
+
+    def read(self, start, length):
+        out = bytearray()
+        position = start
+        end = min(start + length, self.size)
+        while position < end:
+            if position < len(self._header):
+                piece = self._header[position:end]
+            else:
+                offset = position % FILLER_SIZE
+                piece = self._filler[offset:offset + end - position]
+            out += piece
+            position += len(piece)
+        return bytes(out)
+
+
+class MockKHInsiderServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config):
+        super().__init__(address, MockHandler)
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.random_lock = threading.Lock()
+        self.stats_lock = threading.Lock()
+        self.requests = 0
+        self.bytes_sent = 0
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def chance(self, probability):
+        if probability <= 0:
+            return False
+        with self.random_lock:
+            return self.random.random() < probability
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "MockKHInsider/1.0"
+
+    def log_message(self, *args):
+        pass
+
+    @property
+    def config(self):
+        return self.server.config
+
+    def base_url(self):
+        host = self.headers.get('Host')
+        return f"http://{host}" if host else self.server.base_url
+
+    def do_HEAD(self):
+        self.handle_request(head=True)
+
+    def do_GET(self):
+        self.handle_request(head=False)
+
+    def handle_request(self, head):
+        with self.server.stats_lock:
+            self.server.requests += 1
+        if self.config.latency:
+            time.sleep(self.config.latency)
+        if self.server.chance(self.config.error_rate):
+            self.send_body(500, b"Internal Server Error", "text/plain", head)
+            return
+
+        path = self.path.split('?')[0]
+        if path.startswith(ALBUM_PATH):
+            parts = path[len(ALBUM_PATH):].split('/')
+            index = album_index(parts[0])
+            if index is not None and 1 <= index <= self.config.albums:
+                if len(parts) == 1 or parts[1] == '':
+                    self.send_html(self.album_page(index, parts[0]), head)
+                    return
+                if len(parts) == 2 and parts[1].endswith('.mp3'):
+                    self.send_html(self.track_page(parts[0], parts[1][:-4]), head)
+                    return
+        elif path.startswith(LISTING_PATH):
+            query = self.path.partition('?')[2]
+            page = re.search(r'(?:^|&)page=(\d+)', query)
+            self.send_html(self.listing_page(path, int(page.group(1)) if page else 1), head)
+            return
+        elif path.startswith(FILE_PATH):
+            size = self.file_size(path)
+            if size:
+                self.send_file(SyntheticFile(path, size), head)
+                return
+        self.send_body(404, b"Not Found", "text/plain", head)
+
+    def album_page(self, index, slug):
+        base = self.base_url()
+        images = ''.join(
+            f'<div class="albumImage"><a href="{base}{FILE_PATH}{slug}/Cover{i:02d}.jpg" target="_blank">'
+            f'<img src="{base}{FILE_PATH}{slug}/thumbs/Cover{i:02d}.jpg"></a><br>[ ]</div>'
+            for i in range(1, self.config.images + 1))
+        rows = ''.join(
+            f'<tr><td class="clickable-row"><a href="{ALBUM_PATH}{slug}/{i:02d}.mp3">{i}.</a></td>'
+            f'<td class="clickable-row"><a href="{ALBUM_PATH}{slug}/{i:02d}.mp3">Mock Track {i}</a></td>'
+            f'<td class="playlistDownloadSong"><a href="{ALBUM_PATH}{slug}/{i:02d}.mp3">get</a></td></tr>'
+            for i in range(1, self.config.tracks + 1))
+        return (
+            '<html><head><title>Mock Album</title></head><body><div id="pageContent">'
+            f'<h2>Mock Album {index}</h2>'
+            f'<p align="left">Year: <b>2024</b><br>Catalog Number: <b>MOCK-{index:05d}</b><br></p>'
+            f'<table><tr><td>{images}</td></tr></table>'
+            '<table><tr><td><audio id="audio" controls></audio></td></tr></table>'
+            f'<table id="songlist"><tr><th>#</th><th>Song Name</th><th></th></tr>{rows}</table>'
+            '</div></body></html>')
+
+    def listing_page(self, path, page):
+        """모든 앨범을 LISTING_PAGE_SIZE개씩 나눠 보여 주는 목록 페이지 (?page=N)"""
+        pages = max(1, -(-self.config.albums // LISTING_PAGE_SIZE))
+        first = (page - 1) * LISTING_PAGE_SIZE + 1
+        last = min(self.config.albums, first + LISTING_PAGE_SIZE - 1)
+        rows = ''.join(
+            f'<tr><td class="albumIcon"><a href="{ALBUM_PATH}{album_slug(i)}"><img src=""></a></td>'
+            f'<td><a href="{ALBUM_PATH}{album_slug(i)}">Mock Album {i}</a></td>'
+            f'<td>Mock Platform</td><td>Soundtrack</td><td>2024</td></tr>'
+            for i in range(first, last + 1))
+        links = ''.join(f'<a href="{path}?page={n}">{n}</a> ' for n in range(1, pages + 1))
+        return (
+            '<html><body><div id="pageContent">'
+            f'<table class="albumList"><tr><th></th><th>Album</th><th>Platform</th>'
+            f'<th>Type</th><th>Year</th></tr>{rows}</table>'
+            f'<div class="pagination">{links}</div></div></body></html>')
+
+    def track_page(self, slug, name):
+        base = self.base_url()
+        links = [f'<a href="{base}{FILE_PATH}{slug}/{name}.mp3">'
+                 '<span class="songDownloadLink">Click here to download as MP3</span></a>']
+        if self.config.flac:
+            links.append(f'<a href="{base}{FILE_PATH}{slug}/{name}.flac">'
+                         '<span class="songDownloadLink">Click here to download as FLAC</span></a>')
+        return f'<html><body><div id="pageContent"><p>{"".join(links)}</p></div></body></html>'
+
+    def file_size(self, path):
+        slug = path[len(FILE_PATH):].split('/')[0]
+        if album_index(slug) is None:
+            return 0
+        if path.endswith('.flac') and self.config.flac:
+            return self.config.flac_size
+        if path.endswith('.mp3'):
+            return self.config.mp3_size
+        if path.endswith('.jpg'):
+            return self.config.image_size
+        return 0
+
+    def send_html(self, html, head):
+        self.send_body(200, html.encode('utf-8'), "text/html; charset=utf-8", head)
+
+    def send_body(self, status, body, content_type, head):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+    def send_file(self, synthetic, head):
+        start, end = 0, synthetic.size - 1
+        status = 200
+        match = re.fullmatch(r"bytes=(\d*)-(\d*)", self.headers.get('Range', ''))
+        if_range = self.headers.get('If-Range')
+        if match and (if_range is None or if_range == synthetic.etag):
+            if match.group(1):
+                start = int(match.group(1))
+                if match.group(2):
+                    end = min(int(match.group(2)), end)
+            elif match.group(2):
+                start = max(0, synthetic.size - int(match.group(2)))
+            if start >= synthetic.size:
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{synthetic.size}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            status = 206
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'audio/flac' if self.path.endswith('.flac') else 'application/octet-stream')
+        self.send_header('Content-Length', str(end - start + 1))
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('ETag', synthetic.etag)
+        if status == 206:
+            self.send_header('Content-Range', f'bytes {start}-{end}/{synthetic.size}')
+        self.end_headers()
+        if head:
+            return
+
+        drop_at = None
+        if self.server.chance(self.config.drop_rate):
+            drop_at = start + (end - start + 1) // 2
+        position = start
+        began = time.monotonic()
+        while position <= end:
+            length = min(WRITE_SIZE, end - position + 1)
+            if drop_at is not None and position + length > drop_at:
+                # 전송 도중 연결 끊김 흉내
+                self.wfile.write(synthetic.read(position, drop_at - position))
+                self.close_connection = True
+                return
+            self.wfile.write(synthetic.read(position, length))
+            position += length
+            with self.server.stats_lock:
+                self.server.bytes_sent += length
+            if self.config.bandwidth:
+                ahead = (position - start) / self.config.bandwidth - (time.monotonic() - began)
+                if ahead > 0:
+                    time.sleep(ahead)
+
+
+def start_server(config=None, host='127.0.0.1', port=0):
+    """백그라운드 스레드에서 서버를 시작하고 서버 객체 반환 (shutdown()으로 종료)"""
+    server = MockKHInsiderServer((host, port), config or MockConfig())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def add_config_arguments(parser):
+    parser.add_argument('--albums', type=int, default=MockConfig.albums, help="앨범 수")
+    parser.add_argument('--tracks', type=int, default=MockConfig.tracks, help="앨범별 트랙 수")
+    parser.add_argument('--images', type=int, default=MockConfig.images, help="앨범별 이미지 수")
+    parser.add_argument('--flac-mb', type=float, default=MockConfig.flac_size / 1024 / 1024,
+                        help="FLAC 파일 크기(MB)")
+    parser.add_argument('--mp3-mb', type=float, default=MockConfig.mp3_size / 1024 / 1024,
+                        help="MP3 파일 크기(MB)")
+    parser.add_argument('--no-flac', action='store_true', help="트랙 페이지에 FLAC 링크를 넣지 않음")
+    parser.add_argument('--latency', type=float, default=0.0, help="응답 전 지연(초)")
+    parser.add_argument('--bandwidth-mbps', type=float, default=0.0,
+                        help="연결별 최대 전송 속도(MB/s, 0이면 제한 없음)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="HTTP 500 응답 확률")
+    parser.add_argument('--drop-rate', type=float, default=0.0, help="파일 전송 중 연결 끊김 확률")
+    parser.add_argument('--seed', type=int, default=0)
+
+
+def config_from_args(args):
+    return MockConfig(albums=args.albums, tracks=args.tracks, images=args.images,
+                      flac_size=int(args.flac_mb * 1024 * 1024),
+                      mp3_size=int(args.mp3_mb * 1024 * 1024), flac=not args.no_flac,
+                      latency=args.latency, bandwidth=int(args.bandwidth_mbps * 1024 * 1024),
+                      error_rate=args.error_rate, drop_rate=args.drop_rate, seed=args.seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="KHInsider 구조를 흉내 내는 로컬 테스트 서버")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+
+    server = MockKHInsiderServer((args.host, args.port), config_from_args(args))
+    print(f"서버 시작: {server.base_url}", file=sys.stderr)
+    for url in album_urls(server.base_url, server.config):
+        print(url)
+    sys.stdout.flush()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,278 @@
+import os
+import time
+import string
+import sqlite3
+import threading
+import urllib.parse
+
+from album_parser import BASE_URL, ALBUM_PATH, LISTING_PAGE_READY, parse_listing_page
+from page_fetcher import PageFetcher
+from driver_pool import get_driver_pool
+from progress_events import LogMessage
+
+CATALOG_FILE_NAME = ".khinsider_catalog.sqlite3"
+# 한 번의 동기화에서 불러올 최대 목록 페이지 수 (끝없는 페이지 링크 방지)
+DEFAULT_MAX_PAGES = 5000
+# 이어서 동기화할 때 남은 앨범을 DB에서 한 번에 읽는 개수
+PENDING_BATCH = 500
+DRIVER_WAIT_TIMEOUT = 120
+
+# 앨범 상태: 받을 필요 없음(seen) / 대기열에 넣었지만 아직 완료 기록이 없음(pending)
+SEEN = 'seen'
+PENDING = 'pending'
+
+
+def listing_urls(spec):
+    """동기화 대상 지정을 목록 페이지 URL 목록으로 변환
+
+    'letters'는 #과 A-Z 알파벳 목록 전체, 한 글자(또는 #)는 그 알파벳 목록,
+    http로 시작하면 그대로, 그 밖의 값은 플랫폼 이름(예: nintendo-switch)으로 봅니다.
+    """
+    spec = spec.strip()
+    if spec.lower() == 'letters':
+        return [listing_urls(letter)[0] for letter in ['#'] + list(string.ascii_uppercase)]
+    if spec.startswith(('http://', 'https://')):
+        return [spec]
+    if len(spec) == 1:
+        return [f"{BASE_URL}/game-soundtracks/browse/{urllib.parse.quote(spec.upper(), safe='')}"]
+    return [f"{BASE_URL}/game-soundtracks/{spec.strip('/')}"]
+
+
+def is_album_url(url):
+    return ALBUM_PATH in urllib.parse.urlsplit(url).path
+
+
+class CatalogSync:
+    """KHInsider 알파벳/플랫폼 목록을 훑어 새 앨범과 바뀐 앨범만 골라내는 크롤러
+
+    목록 페이지는 한 번에 하나씩 불러와 트리를 만들지 않는 파서로 훑고, 페이지의
+    결과(앨범 지문, 새로 찾은 페이지 링크, 페이지 완료 표시)를 한 트랜잭션으로
+    다운로드 루트의 SQLite 파일에 기록합니다. 아직 불러오지 않은 페이지(크롤
+    프런티어)와 앨범 목록은 DB에만 있으므로 앨범이 수만 개여도 메모리에는 현재
+    페이지 하나만 올라오고, 중간에 멈추면 남은 페이지부터 이어서 동기화합니다.
+
+    받을지 여부는 라이브러리 색인(DownloadIndex)의 앨범 완료 기록과 비교해 정합니다.
+    완료 기록이 없으면 새 앨범, 완료한 뒤 목록의 행(제목, 플랫폼, 연도 등)이
+    바뀌었으면 바뀐 앨범으로 보고 crawl()이 URL을 돌려줍니다.
+    """
+
+    def __init__(self, root, index, fetcher=None, max_pages=DEFAULT_MAX_PAGES,
+                 progress_callback=None, is_running=lambda: True):
+        os.makedirs(root, exist_ok=True)
+        self.path = os.path.join(root, CATALOG_FILE_NAME)
+        self.index = index
+        self.max_pages = max_pages
+        self.progress_callback = progress_callback
+        self.is_running = is_running
+        self.driver_pool = get_driver_pool()
+        self._pooled = None
+        self._driver_lock = threading.Lock()
+        self.fetcher = fetcher or PageFetcher(driver_factory=self._get_driver, is_running=is_running)
+        self.counts = {'pages': 0, 'failed_pages': 0, 'albums': 0, 'new': 0, 'changed': 0}
+        self.sync_pass = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS listings (
+                url TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                albums INTEGER NOT NULL DEFAULT 0,
+                crawled_at REAL
+            );
+            CREATE TABLE IF NOT EXISTS albums (
+                url TEXT PRIMARY KEY,
+                fingerprint TEXT NOT NULL,
+                synced_fingerprint TEXT,
+                queued_fingerprint TEXT,
+                status TEXT NOT NULL,
+                queued_pass INTEGER,
+                queued_at REAL,
+                last_seen REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS albums_status ON albums (status);
+            CREATE INDEX IF NOT EXISTS listings_status ON listings (status);
+        """)
+        self._conn.commit()
+
+    def log(self, message):
+        if self.progress_callback:
+            self.progress_callback(LogMessage(message))
+
+    # Chrome 드라이버 (목록 페이지가 차단된 경우에만)
+
+    def _get_driver(self):
+        with self._driver_lock:
+            if self._pooled and self.driver_pool.needs_recycle(self._pooled):
+                self.driver_pool.release(self._pooled)
+                self._pooled = None
+            if self._pooled is None:
+                if not self.is_running():
+                    return None
+                self._pooled = self.driver_pool.acquire(timeout=DRIVER_WAIT_TIMEOUT)
+                if self._pooled is None:
+                    return None
+            self._pooled.pages += 1
+            return self._pooled.driver
+
+    # 동기화 진행
+
+    def _meta(self, key, default=None):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def start(self, seeds):
+        """동기화 시작 (지난 동기화가 중간에 멈췄으면 남은 페이지부터 이어서)"""
+        with self._lock:
+            self.sync_pass = int(self._meta('pass', 0))
+            remaining = self._conn.execute(
+                "SELECT COUNT(*) FROM listings WHERE status = 'pending'").fetchone()[0]
+            if remaining:
+                resumed = True
+            else:
+                resumed = False
+                self.sync_pass += 1
+                self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('pass', ?)",
+                                   (str(self.sync_pass),))
+                self._conn.execute("DELETE FROM listings")
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO listings (url, status) VALUES (?, 'pending')",
+                [(url,) for url in seeds])
+            self._conn.commit()
+        if resumed:
+            self.log(f"🔄 지난 목록 동기화를 이어서 진행합니다 (남은 페이지 {remaining}개)")
+        return self
+
+    def crawl(self, requeue_pending=True):
+        """받아야 할 앨범 URL을 목록 페이지 순서대로 생성
+
+        requeue_pending이 True이면 지난번에 돌려줬지만 아직 완료 기록이 없는
+        앨범을 먼저 돌려줍니다 (대기열을 따로 저장하지 않는 명령줄용).
+        """
+        if requeue_pending:
+            yield from self._pending_albums()
+
+        while self.is_running() and self.counts['pages'] < self.max_pages:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT url FROM listings WHERE status = 'pending' ORDER BY rowid LIMIT 1").fetchone()
+            if not row:
+                break
+            page_url = row[0]
+            try:
+                html = self.fetcher.fetch(page_url, ready=LISTING_PAGE_READY)
+                listing = parse_listing_page(html, page_url)
+                del html
+            except Exception as e:
+                if not self.is_running():
+                    break
+                self.counts['failed_pages'] += 1
+                self.log(f"⚠️ 목록 페이지 로드 실패: {page_url} - {str(e)}")
+                with self._lock:
+                    self._finish_listing(page_url, 'failed', 0)
+                continue
+            wanted = self._apply_listing(page_url, listing)
+            self.counts['pages'] += 1
+            self.log(f"📄 목록 {page_url}: 앨범 {len(listing.albums)}개, 받을 앨범 {len(wanted)}개")
+            yield from wanted
+
+        if self.counts['pages'] >= self.max_pages and self.remaining_pages():
+            self.log(f"⚠️ 목록 페이지를 {self.max_pages}개까지 불러와 동기화를 멈춥니다 (다음에 이어서 진행)")
+
+    def remaining_pages(self):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM listings WHERE status = 'pending'").fetchone()[0]
+
+    def _pending_albums(self):
+        """지난번 동기화에서 돌려줬지만 아직 받지 못한 앨범"""
+        last = 0
+        while self.is_running():
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT rowid, url, queued_at FROM albums WHERE status = ? AND rowid > ?"
+                    " ORDER BY rowid LIMIT ?", (PENDING, last, PENDING_BATCH)).fetchall()
+            if not rows:
+                return
+            for rowid, url, queued_at in rows:
+                last = rowid
+                entry = self.index.album_entry(url)
+                if entry is None or entry['completed_at'] < (queued_at or 0):
+                    with self._lock:
+                        self._conn.execute("UPDATE albums SET queued_pass = ? WHERE url = ?",
+                                           (self.sync_pass, url))
+                    yield url
+
+    def _apply_listing(self, page_url, listing):
+        """목록 페이지 하나의 결과를 기록하고 받아야 할 앨범 URL 목록 반환"""
+        now = time.time()
+        wanted = []
+        with self._lock:
+            for album_url, fingerprint in listing.albums:
+                self.counts['albums'] += 1
+                row = self._conn.execute(
+                    "SELECT synced_fingerprint, queued_fingerprint, status, queued_pass, queued_at"
+                    " FROM albums WHERE url = ?", (album_url,)).fetchone()
+                if row and row[2] == PENDING and row[3] == self.sync_pass:
+                    # 이번 동기화에서 이미 돌려준 앨범 (여러 목록에 나오는 경우)
+                    continue
+                synced = row[0] if row else None
+                entry = self.index.album_entry(album_url)
+                if entry and row and row[2] == PENDING and entry['completed_at'] >= (row[4] or 0):
+                    # 지난번에 대기열에 넣은 뒤 완료됨
+                    synced = row[1]
+                elif entry and synced is None:
+                    # 동기화 기능 없이 받은 앨범은 지금 목록을 기준으로 삼음
+                    synced = fingerprint
+
+                if entry is None:
+                    kind = 'new'
+                elif synced != fingerprint:
+                    kind = 'changed'
+                else:
+                    kind = None
+
+                if kind:
+                    self.counts[kind] += 1
+                    wanted.append(album_url)
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO albums (url, fingerprint, synced_fingerprint,"
+                        " queued_fingerprint, status, queued_pass, queued_at, last_seen)"
+                        " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                        (album_url, fingerprint, synced, fingerprint, PENDING, self.sync_pass, now, now))
+                else:
+                    self._conn.execute(
+                        "INSERT OR REPLACE INTO albums (url, fingerprint, synced_fingerprint,"
+                        " status, last_seen) VALUES (?, ?, ?, ?, ?)",
+                        (album_url, fingerprint, synced, SEEN, now))
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO listings (url, status) VALUES (?, 'pending')",
+                [(url,) for url in listing.pages])
+            self._finish_listing(page_url, 'done', len(listing.albums), commit=False)
+            self._conn.commit()
+        return wanted
+
+    def _finish_listing(self, page_url, status, albums, commit=True):
+        self._conn.execute("UPDATE listings SET status = ?, albums = ?, crawled_at = ? WHERE url = ?",
+                           (status, albums, time.time(), page_url))
+        if commit:
+            self._conn.commit()
+
+    def summary(self):
+        c = self.counts
+        return (f"📚 목록 동기화: 페이지 {c['pages']}개 (실패 {c['failed_pages']}), "
+                f"목록 항목 {c['albums']}개 중 새 앨범 {c['new']}개, 바뀐 앨범 {c['changed']}개")
+
+    def close(self):
+        with self._driver_lock:
+            if self._pooled:
+                self.driver_pool.release(self._pooled)
+                self._pooled = None
+        self.fetcher.close()
+        with self._lock:
+            self._conn.close()
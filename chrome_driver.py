@@ -0,0 +1,31 @@
+import undetected_chromedriver as uc
+
+
+class SafeChrome(uc.Chrome):
+    """안전한 Chrome 드라이버 클래스"""
+    def __del__(self):
+        """소멸자에서 quit() 호출하지 않음"""
+        pass
+
+
+def create_driver_options():
+    """Chrome 옵션 생성"""
+    options = uc.ChromeOptions()
+    options.add_argument('--headless')
+    options.add_argument('--disable-gpu')
+    options.add_argument('--log-level=3')
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+    options.add_argument('--disable-browser-side-navigation')
+    options.add_argument('--disable-infobars')
+    options.add_argument('--disable-extensions')
+    options.add_argument('--disable-software-rasterizer')
+    options.add_argument('--disable-dev-tools')
+    options.add_argument('--disable-notifications')
+    options.add_argument('--disable-popup-blocking')
+    options.add_argument('--disable-save-password-bubble')
+    options.add_argument('--disable-translate')
+    options.add_argument('--disable-web-security')
+    options.add_argument('--disable-features=IsolateOrigins,site-per-process')
+    options.add_argument('--disable-site-isolation-trials')
+    return options
@@ -1,447 +1,46 @@
 import os
-import time
-import json
-import requests
-import urllib.parse
+import sys
 import threading
+import importlib.util
+import time
+from collections import OrderedDict
 import tkinter as tk
 from tkinter import ttk, filedialog, scrolledtext, messagebox
-from bs4 import BeautifulSoup
-import undetected_chromedriver as uc
-import re
 from datetime import datetime
-
-class SafeChrome(uc.Chrome):
-    """안전한 Chrome 드라이버 클래스"""
-    def __del__(self):
-        """소멸자에서 quit() 호출하지 않음"""
-        pass
-
-class DownloaderThread(threading.Thread):
-    def __init__(self, album_url, download_folder, progress_callback):
-        super().__init__()
-        self.album_url = album_url
-        self.download_folder = download_folder
-        self.progress_callback = progress_callback
-        self.is_running = True
-        self.driver = None
-        self._driver_lock = threading.Lock()
-        self._cleanup_event = threading.Event()
-        self._is_driver_quit = False
-        self._is_cleaning_up = False
-        self._driver_options = None
-        print(f"\n=== DownloaderThread 생성: {id(self)} ===")
-
-    def _create_driver_options(self):
-        """Chrome 옵션 생성"""
-        print(f"=== Chrome 옵션 생성: {id(self)} ===")
-        options = uc.ChromeOptions()
-        options.add_argument('--headless')
-        options.add_argument('--disable-gpu')
-        options.add_argument('--log-level=3')
-        options.add_argument('--no-sandbox')
-        options.add_argument('--disable-dev-shm-usage')
-        options.add_argument('--disable-browser-side-navigation')
-        options.add_argument('--disable-infobars')
-        options.add_argument('--disable-extensions')
-        options.add_argument('--disable-software-rasterizer')
-        options.add_argument('--disable-dev-tools')
-        options.add_argument('--disable-notifications')
-        options.add_argument('--disable-popup-blocking')
-        options.add_argument('--disable-save-password-bubble')
-        options.add_argument('--disable-translate')
-        options.add_argument('--disable-web-security')
-        options.add_argument('--disable-features=IsolateOrigins,site-per-process')
-        options.add_argument('--disable-site-isolation-trials')
-        return options
-
-    def sanitize_filename(self, filename):
-        # 윈도우에서 사용할 수 없는 특수문자 제거
-        # 파일/폴더명으로 사용할 수 없는 문자: \ / : * ? " < > |
-        sanitized = re.sub(r'[\\/:*?"<>|]', '_', filename)
-        # 연속된 공백과 언더스코어를 하나로 치환
-        sanitized = re.sub(r'[\s_]+', ' ', sanitized)
-        # 앞뒤 공백 제거
-        sanitized = sanitized.strip()
-        # 빈 문자열이면 기본값 사용
-        if not sanitized:
-            sanitized = "album"
-        return sanitized
-
-    def download_file(self, url, file_path):
-        response = requests.get(url, stream=True)
-        total_size = int(response.headers.get('content-length', 0))
-        block_size = 8192
-        downloaded = 0
-        
-        file_name = os.path.basename(file_path)
-        self.progress_callback(f"file_status:{file_name}:다운로드 중")
-        
-        with open(file_path, "wb") as f:
-            for chunk in response.iter_content(chunk_size=block_size):
-                if not self.is_running:
-                    self.progress_callback(f"file_status:{file_name}:중단됨")
-                    return False
-                if chunk:
-                    downloaded += len(chunk)
-                    f.write(chunk)
-                    if total_size:
-                        progress = (downloaded / total_size) * 100
-                        self.progress_callback(f"progress:{progress:.1f}")
-        
-        self.progress_callback(f"file_status:{file_name}:완료")
-        return True
-
-    def create_subfolder(self, base_folder, subfolder_name):
-        # 폴더명 정리
-        safe_name = self.sanitize_filename(subfolder_name)
-        folder_path = os.path.join(base_folder, safe_name)
-        os.makedirs(folder_path, exist_ok=True)
-        return folder_path
-
-    def download_images(self, soup, base_folder):
-        # 이미지 다운로드를 위한 하위 폴더 생성
-        images_folder = self.create_subfolder(base_folder, "Scans")
-        
-        # 앨범 커버 이미지 영역 찾기
-        # 1. h2 태그 (앨범 제목) 찾기
-        h2_element = soup.find('h2')
-        if not h2_element:
-            self.progress_callback("⚠️ 앨범 제목을 찾을 수 없습니다.")
-            return []
-            
-        # 2. h2 다음에 나오는 테이블들 중 단일 셀을 가진 테이블 찾기
-        current = h2_element
-        album_table = None
-        
-        while current:
-            if current.name == 'table':
-                # audio player 테이블인지 확인 (플레이어는 항상 이미지 테이블 다음에 옴)
-                audio_player = current.find('audio')
-                if audio_player:
-                    break
-                    
-                # 단일 셀을 가진 테이블 찾기
-                cells = current.find_all('td')
-                if len(cells) == 1:  # 하나의 셀만 있는 테이블
-                    album_table = current
-                    break
-            current = current.find_next()
-            
-        if not album_table:
-            self.progress_callback("⚠️ 앨범 커버 테이블을 찾을 수 없습니다.")
-            return []
-            
-        # 3. 테이블 내의 빈 텍스트 링크 찾기
-        image_links = []
-        for a in album_table.find_all('a'):
-            # 빈 텍스트를 가진 링크만 선택 (공백이나 대괄호만 있는 경우도 포함)
-            if a.text.strip().replace('[', '').replace(']', '').strip() == '':
-                href = a.get('href', '')
-                if any(ext in href.lower() for ext in ['.jpg', '.jpeg', '.png', '.gif', '.png']):
-                    image_links.append(href)
-    
-        if image_links:
-            self.progress_callback(f"🖼️ {len(image_links)}개의 앨범 커버 이미지를 찾았습니다.")
-            
-            # 이미지 순서대로 정렬 (파일명 기준)
-            image_links.sort(key=lambda x: os.path.basename(x))
-            
-            # 전체 파일 개수 계산 (이미지만)
-            total_files = len(image_links)
-            current_file = 0
-            
-            for idx, img_url in enumerate(image_links, 1):
-                if not self.is_running:
-                    self.driver.quit()
-                    return image_links
-
-                current_file += 1
-                total_progress = (current_file / total_files) * 100
-                self.progress_callback(f"total_progress:{total_progress:.1f}")
-
-                file_name = os.path.basename(urllib.parse.unquote(img_url.split('?')[0]))
-                file_path = os.path.join(images_folder, file_name)
-                
-                self.progress_callback(f"file_status:{file_name}:대기 중")
-                
-                try:
-                    if self.download_file(img_url, file_path):
-                        self.progress_callback(f"✅ 이미지 저장 완료: {file_name}")
-                        current_file += 1
-                        total_progress = (current_file / total_files) * 100
-                        self.progress_callback(f"total_progress:{total_progress:.1f}")
-                    else:
-                        self.progress_callback(f"file_status:{file_name}:중단됨")
-                except Exception as e:
-                    self.progress_callback(f"file_status:{file_name}:실패")
-                    self.progress_callback(f"❌ 이미지 다운로드 실패: {file_name} - {str(e)}")
-        else:
-            self.progress_callback("ℹ️ 다운로드할 이미지를 찾지 못했습니다.")
-            
-        return image_links
-
-    def quit_driver(self):
-        """드라이버를 안전하게 종료하는 메서드"""
-        if self._is_cleaning_up:
-            print(f"=== 드라이버 정리 중복 방지: {id(self)} ===")
-            return
-            
-        with self._driver_lock:
-            if self.driver and not self._is_driver_quit:
-                self._is_cleaning_up = True
-                try:
-                    print(f"=== 드라이버 종료 시작: {id(self)} ===")
-                    # 드라이버 종료 전에 모든 탭 닫기
-                    if hasattr(self.driver, 'window_handles'):
-                        for handle in self.driver.window_handles:
-                            try:
-                                self.driver.switch_to.window(handle)
-                                self.driver.close()
-                            except:
-                                pass
-                    
-                    # 드라이버 종료
-                    if hasattr(self.driver, 'quit'):
-                        try:
-                            self.progress_callback("🔄 Chrome 드라이버 종료 중...")
-                            # 드라이버의 내부 상태 초기화
-                            if hasattr(self.driver, '_driver'):
-                                self.driver._driver = None
-                            if hasattr(self.driver, '_service'):
-                                self.driver._service = None
-                            self.driver.quit()
-                            self.progress_callback("✅ Chrome 드라이버 종료 완료")
-                            print(f"=== 드라이버 quit() 완료: {id(self)} ===")
-                        except:
-                            self.progress_callback("⚠️ Chrome 드라이버 종료 중 오류 발생")
-                            print(f"=== 드라이버 quit() 실패: {id(self)} ===")
-                    self._is_driver_quit = True
-                except Exception as e:
-                    self.progress_callback(f"❌ 드라이버 종료 중 오류 발생: {str(e)}")
-                    print(f"=== 드라이버 종료 중 예외 발생: {id(self)} - {str(e)} ===")
-                finally:
-                    # 드라이버 객체의 모든 참조 제거
-                    print(f"=== 드라이버 참조 제거: {id(self)} ===")
-                    self.driver = None
-                    self._driver_options = None
-                    self._cleanup_event.set()
-                    self._is_cleaning_up = False
-                    # 가비지 컬렉션 유도
-                    import gc
-                    gc.collect()
-                    print(f"=== 가비지 컬렉션 완료: {id(self)} ===")
-
-    def stop(self):
-        """다운로드를 중지하고 리소스를 정리하는 메서드"""
-        if not self.is_running:
-            return
-            
-        self.is_running = False
-        self.quit_driver()
-        
-        try:
-            self._cleanup_event.wait(timeout=2.0)
-        except Exception as e:
-            print(f"정리 대기 중 오류 발생: {str(e)}")
-
-    def __del__(self):
-        """객체 소멸 시 리소스 정리"""
-        print(f"\n=== DownloaderThread 소멸 시작: {id(self)} ===")
-        if not self._is_cleaning_up:
-            print(f"=== DownloaderThread stop() 호출: {id(self)} ===")
-            self.stop()
-        print(f"=== DownloaderThread 소멸 완료: {id(self)} ===\n")
-
-    def run(self):
-        try:
-            print(f"\n=== DownloaderThread 실행 시작: {id(self)} ===")
-            # Chrome 옵션 생성
-            self._driver_options = self._create_driver_options()
-
-            # 웹 드라이버 실행
-            with self._driver_lock:
-                if not self._is_driver_quit and not self._is_cleaning_up:
-                    try:
-                        print(f"=== Chrome 드라이버 생성 시도: {id(self)} ===")
-                        self.driver = SafeChrome(options=self._driver_options)
-                        print(f"=== Chrome 드라이버 생성 완료: {id(self)} ===")
-                        self._cleanup_event.clear()
-                    except Exception as e:
-                        print(f"=== Chrome 드라이버 생성 실패: {id(self)} - {str(e)} ===")
-                        return
-
-            if not self.driver:
-                return
-
-            # 앨범 페이지 접속
-            self.driver.get(self.album_url)
-            time.sleep(2)
-
-            # 페이지 파싱
-            soup = BeautifulSoup(self.driver.page_source, "html.parser")
-            
-            # 앨범 제목과 카탈로그 번호 추출
-            album_title = soup.select_one("h2")
-            if not album_title:
-                self.progress_callback("⚠️ 앨범 제목을 찾을 수 없습니다.")
-                self.driver.quit()
-                return
-
-            album_name = album_title.text.strip()
-            self.progress_callback(f"💿 앨범 제목: {album_name}")
-            
-            # 카탈로그 번호 찾기
-            catalog_text = None
-            for text in soup.stripped_strings:
-                if "Catalog Number:" in text:
-                    element = soup.find(string=lambda t: t and "Catalog Number:" in t)
-                    if element:
-                        next_b = element.find_next('b')
-                        if next_b:
-                            catalog_text = next_b.text.strip()
-                        break
-
-            # 이미지 링크 수집
-            image_links = []
-            current = album_title
-            album_table = None
-            
-            while current:
-                if current.name == 'table':
-                    audio_player = current.find('audio')
-                    if audio_player:
-                        break
-                    cells = current.find_all('td')
-                    if len(cells) == 1:
-                        album_table = current
-                        break
-                current = current.find_next()
-                
-            if album_table:
-                for a in album_table.find_all('a'):
-                    if a.text.strip().replace('[', '').replace(']', '').strip() == '':
-                        href = a.get('href', '')
-                        if any(ext in href.lower() for ext in ['.jpg', '.jpeg', '.png', '.gif', '.png']):
-                            image_links.append(href)
-                image_links.sort(key=lambda x: os.path.basename(x))
-
-            # 음원 링크 수집 및 형식 확인
-            track_links = set()
-            for a in soup.select("a"):
-                href = a.get("href", "")
-                if href.endswith(".mp3"):
-                    track_links.add("https://downloads.khinsider.com" + href)
-            track_links = list(track_links)
-
-            # 첫 번째 트랙으로 FLAC 가용성 확인
-            file_type = "MP3"  # 기본값
-            if track_links:
-                self.driver.get(track_links[0])
-                time.sleep(1)
-                track_soup = BeautifulSoup(self.driver.page_source, "html.parser")
-                for a in track_soup.select("a"):
-                    if a.get("href", "").endswith(".flac"):
-                        file_type = "FLAC"
-                        break
-
-            # 앨범 폴더 생성
-            if catalog_text:
-                self.progress_callback(f"📀 카탈로그 번호: {catalog_text}")
-                folder_name = f"{{{catalog_text}}} {album_name} [{file_type}]"
-            else:
-                self.progress_callback("⚠️ 카탈로그 번호를 찾을 수 없습니다.")
-                folder_name = f"{album_name} [{file_type}]"
-
-            album_folder = self.create_subfolder(self.download_folder, folder_name)
-            self.progress_callback(f"📁 저장 폴더: {os.path.basename(album_folder)}")
-
-            # 전체 파일 개수 계산
-            total_files = len(image_links) + len(track_links)
-            current_file = 0
-            
-            # 진행 상황 출력
-            self.progress_callback(f"\n🖼️ {len(image_links)}개의 앨범 커버 이미지를 찾았습니다.")
-            self.progress_callback(f"🔍 총 {len(track_links)}개의 {file_type} 트랙을 찾았습니다.")
-            self.progress_callback(f"📥 총 {total_files}개 파일 다운로드를 시작합니다...\n")
-            self.progress_callback(f"total_files:{total_files}")  # 전체 파일 수 보고
-
-            # 이미지 다운로드
-            if image_links:
-                images_folder = self.create_subfolder(album_folder, "Scans")
-                for idx, img_url in enumerate(image_links, 1):
-                    if not self.is_running:
-                        self.driver.quit()
-                        return
-
-                    file_name = os.path.basename(urllib.parse.unquote(img_url.split('?')[0]))
-                    file_path = os.path.join(images_folder, file_name)
-                    
-                    self.progress_callback(f"file_status:{file_name}:대기 중")
-                    
-                    try:
-                        if self.download_file(img_url, file_path):
-                            current_file += 1
-                            total_progress = (current_file / total_files) * 100
-                            self.progress_callback(f"total_progress:{total_progress:.1f}")
-                    except Exception as e:
-                        self.progress_callback(f"file_status:{file_name}:실패")
-                        self.progress_callback(f"❌ 이미지 다운로드 실패: {file_name} - {str(e)}")
-
-            # 음원 다운로드
-            for idx, track_url in enumerate(track_links, 1):
-                if not self.is_running:
-                    self.driver.quit()
-                    return
-
-                self.driver.get(track_url)
-                time.sleep(1)
-
-                track_soup = BeautifulSoup(self.driver.page_source, "html.parser")
-                download_link = None
-
-                # 설정된 형식(FLAC/MP3)에 따라 다운로드 링크 찾기
-                for a in track_soup.select("a"):
-                    href = a.get("href", "")
-                    if file_type == "FLAC" and href.endswith(".flac"):
-                        download_link = href
-                        break
-                    elif file_type == "MP3" and href.endswith(".mp3"):
-                        download_link = href
-                        break
-
-                if not download_link:
-                    self.progress_callback(f"file_status:트랙 {idx}:실패")
-                    self.progress_callback(f"[{idx}/{len(track_links)}] ❌ 다운로드 가능한 파일을 찾을 수 없습니다.")
-                    continue
-
-                file_name = os.path.basename(download_link)
-                file_name = urllib.parse.unquote(file_name)
-                file_path = os.path.join(album_folder, file_name)
-                
-                self.progress_callback(f"file_status:{file_name}:대기 중")
-
-                if self.download_file(download_link, file_path):
-                    current_file += 1
-                    total_progress = (current_file / total_files) * 100
-                    self.progress_callback(f"total_progress:{total_progress:.1f}")
-                else:
-                    self.progress_callback(f"file_status:{file_name}:중단됨")
-
-            self.progress_callback("total_progress:100.0")
-            self.progress_callback("\n✨ 모든 다운로드가 완료되었습니다!")
-
-        except Exception as e:
-            self.progress_callback(f"❌ 오류 발생: {str(e)}")
-            print(f"=== DownloaderThread 실행 중 예외 발생: {id(self)} - {str(e)} ===")
-        finally:
-            print(f"=== DownloaderThread 실행 종료: {id(self)} ===")
-            self.quit_driver()
-            try:
-                self._cleanup_event.wait(timeout=2.0)
-                print(f"=== 정리 이벤트 대기 완료: {id(self)} ===")
-            except Exception as e:
-                print(f"=== 정리 이벤트 대기 실패: {id(self)} - {str(e)} ===")
+from downloader_core import DownloaderThread
+from driver_pool import set_driver_pool_size, shutdown_driver_pool
+from download_scheduler import set_global_download_limit, DEFAULT_GLOBAL_DOWNLOAD_LIMIT, DEFAULT_WEIGHT
+from bandwidth import get_bandwidth_limiter, parse_schedule, format_rate
+from progress_events import (ProgressChannel, LogMessage, FileStatus, FileProgress,
+                             TotalProgress, TotalFiles)
+from download_index import DownloadIndex
+from catalog_sync import CatalogSync, listing_urls, is_album_url
+from state_store import StateStore, import_legacy_state
+from work_queue import (WorkQueue, default_owner, parse_entry, DEFAULT_LEASE,
+                        WAITING, DOWNLOADING, COMPLETED, FAILED, STOPPED)
+
+DEFAULT_CONCURRENT_ALBUMS = 2
+# 앨범마다 스레드 하나(thread) 또는 모든 앨범을 이벤트 루프 하나에서(asyncio)
+ENGINE_THREAD = 'thread'
+ENGINE_ASYNC = 'asyncio'
+# async_engine은 aiohttp를 불러오는 데 시간이 걸리므로 처음 사용할 때 불러옴
+ENGINE_CHOICES = ((ENGINE_THREAD, ENGINE_ASYNC) if importlib.util.find_spec('aiohttp')
+                  else (ENGINE_THREAD,))
+# 진행 이벤트를 UI에 반영하는 간격(약 20fps)과 한 번에 처리할 최대 이벤트 수
+EVENT_PUMP_INTERVAL_MS = 50
+MAX_EVENTS_PER_FRAME = 500
+# 세션이 길어져도 UI 비용이 일정하도록 파일 목록과 로그의 최대 크기 제한
+MAX_FILE_ROWS = 1000
+MAX_LOG_LINES = 2000
+# 현재 적용 중인 대역폭 제한 표시를 갱신하는 간격 (시간대 제한이 바뀌는 것 반영)
+BANDWIDTH_LABEL_INTERVAL_MS = 1000
+# 대기열은 작업 대기열(SQLite)에 두고 화면에는 한 페이지씩만 표시
+QUEUE_PAGE_SIZE = 100
+QUEUE_REFRESH_MS = 1000
+# 받는 중인 앨범의 임대를 연장하는 간격(초)
+HEARTBEAT_INTERVAL = DEFAULT_LEASE / 3
+QUEUE_FILTERS = OrderedDict([('전체', None), ('대기', WAITING), ('받는 중', DOWNLOADING),
+                             ('완료', COMPLETED), ('실패', FAILED), ('중단', STOPPED)])
 
 class App:
     def __init__(self, root):
@@ -451,10 +50,21 @@ class App:
         
         # 프로그램 상태 변수
         self.is_closing = False
-        self.current_download = None
-        self.queue_info = {}
-        self.download_queue = []
-        self.state_file = "downloader_state.json"
+        self.active_downloads = {}  # 작업 ID -> DownloaderThread
+        self._status_check_scheduled = False
+        self.events = ProgressChannel()  # 작업 스레드 -> UI 진행 이벤트
+        self.file_rows = OrderedDict()  # (작업 ID, 파일명) -> 파일 목록 항목 ID
+        self.jobs = WorkQueue()  # 디스크 기반 작업 대기열
+        self.owner = default_owner()
+        self.running_jobs = {}  # 작업 ID -> 받는 중인 QueueJob (진행 표시는 여기에 먼저 반영)
+        self.stopping = set()  # 사용자가 중지한 작업 ID
+        self.queue_page = 0
+        self._last_heartbeat = 0.0
+        self.importing = False  # URL 목록 파일을 가져오는 중
+        self.queue_paused = False  # 중지 버튼을 누른 뒤에는 대기 중인 작업을 시작하지 않음
+        self.catalog_thread = None  # 목록 동기화 스레드
+        self.catalog_running = False
+        self.state = StateStore(max_log_lines=MAX_LOG_LINES, max_file_rows=MAX_FILE_ROWS)
         
         # 종료 이벤트 처리 추가
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
@@ -487,9 +97,51 @@ class App:
         self.folder_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=(5, 5))
         ttk.Button(folder_frame, text="폴더 선택", command=self.select_folder).pack(side=tk.LEFT)
 
+        # 동시 앨범 수와 전체 동시 연결 수 설정
+        self.album_slots_var = tk.IntVar(value=DEFAULT_CONCURRENT_ALBUMS)
+        self.connection_limit_var = tk.IntVar(value=DEFAULT_GLOBAL_DOWNLOAD_LIMIT)
+        ttk.Label(folder_frame, text="동시 앨범:").pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Spinbox(folder_frame, from_=1, to=8, width=4, textvariable=self.album_slots_var,
+                    command=self.process_next_download).pack(side=tk.LEFT, padx=(5, 0))
+        ttk.Label(folder_frame, text="전체 연결:").pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Spinbox(folder_frame, from_=1, to=32, width=4, textvariable=self.connection_limit_var,
+                    command=self.apply_connection_limit).pack(side=tk.LEFT, padx=(5, 0))
+
+        # 다운로드 엔진 (asyncio 엔진은 aiohttp가 있을 때만 선택 가능)
+        self.engine_var = tk.StringVar(value=ENGINE_THREAD)
+        ttk.Label(folder_frame, text="엔진:").pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Combobox(folder_frame, width=8, state='readonly', textvariable=self.engine_var,
+                     values=ENGINE_CHOICES).pack(side=tk.LEFT, padx=(5, 0))
+
+        # 전체 대역폭 제한, 시간대별 제한, 앨범 가중치
+        limit_frame = ttk.Frame(main_frame)
+        limit_frame.grid(row=2, column=0, sticky=(tk.W, tk.E), pady=5)
+        self.bandwidth_var = tk.DoubleVar(value=0)
+        self.schedule_var = tk.StringVar()
+        self.weight_var = tk.DoubleVar(value=DEFAULT_WEIGHT)
+        ttk.Label(limit_frame, text="대역폭(MB/s, 0=무제한):").pack(side=tk.LEFT)
+        bandwidth_box = ttk.Spinbox(limit_frame, from_=0, to=1000, increment=0.5, width=6,
+                                    textvariable=self.bandwidth_var, command=self.apply_bandwidth)
+        bandwidth_box.pack(side=tk.LEFT, padx=(5, 0))
+        bandwidth_box.bind('<Return>', lambda e: self.apply_bandwidth())
+        bandwidth_box.bind('<FocusOut>', lambda e: self.apply_bandwidth())
+        ttk.Label(limit_frame, text="시간대:").pack(side=tk.LEFT, padx=(10, 0))
+        schedule_entry = ttk.Entry(limit_frame, width=32, textvariable=self.schedule_var)
+        schedule_entry.pack(side=tk.LEFT, padx=(5, 0))
+        schedule_entry.bind('<Return>', lambda e: self.apply_bandwidth())
+        schedule_entry.bind('<FocusOut>', lambda e: self.apply_bandwidth())
+        ttk.Label(limit_frame, text="(예: 09:00-18:00=2M, 18:00-09:00=0)").pack(side=tk.LEFT, padx=(5, 0))
+        self.bandwidth_label = ttk.Label(limit_frame, text="")
+        self.bandwidth_label.pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Button(limit_frame, text="선택 항목에 적용",
+                   command=self.apply_weight).pack(side=tk.RIGHT)
+        ttk.Spinbox(limit_frame, from_=0.5, to=10, increment=0.5, width=5,
+                    textvariable=self.weight_var).pack(side=tk.RIGHT, padx=(5, 5))
+        ttk.Label(limit_frame, text="가중치:").pack(side=tk.RIGHT)
+
         # 대기열 프레임
         queue_frame = ttk.LabelFrame(main_frame, text="앨범 다운 대기열", padding="5")
-        queue_frame.grid(row=2, column=0, sticky=(tk.W, tk.E), pady=5)
+        queue_frame.grid(row=3, column=0, sticky=(tk.W, tk.E), pady=5)
         queue_frame.columnconfigure(0, weight=1)
         queue_frame.rowconfigure(0, weight=1)  # 트리뷰가 세로로 늘어날 수 있도록
 
@@ -508,10 +160,28 @@ class App:
         self.queue_tree.column('album', width=800, anchor='w')
         self.queue_tree.column('progress_text', width=200, anchor='center')
         self.queue_tree.column('#0', width=0, stretch=False)
+        self.queue_tree.bind('<<TreeviewSelect>>', self.on_queue_select)
+
+        # 대기열 페이지 이동, 상태 필터, 항목 관리
+        queue_nav = ttk.Frame(queue_frame)
+        queue_nav.grid(row=1, column=0, columnspan=2, sticky=(tk.W, tk.E), pady=(5, 0))
+        ttk.Button(queue_nav, text="◀", width=3, command=lambda: self.move_queue_page(-1)).pack(side=tk.LEFT)
+        ttk.Button(queue_nav, text="▶", width=3, command=lambda: self.move_queue_page(1)).pack(side=tk.LEFT)
+        self.queue_filter_var = tk.StringVar(value='전체')
+        filter_box = ttk.Combobox(queue_nav, width=8, state='readonly', textvariable=self.queue_filter_var,
+                                  values=list(QUEUE_FILTERS))
+        filter_box.pack(side=tk.LEFT, padx=(5, 0))
+        filter_box.bind('<<ComboboxSelected>>', lambda e: self.move_queue_page(None))
+        self.queue_page_label = ttk.Label(queue_nav, text="")
+        self.queue_page_label.pack(side=tk.LEFT, padx=(10, 0))
+        ttk.Button(queue_nav, text="완료 항목 정리", command=self.clear_finished).pack(side=tk.RIGHT)
+        ttk.Button(queue_nav, text="삭제", command=self.remove_selected).pack(side=tk.RIGHT, padx=(0, 5))
+        ttk.Button(queue_nav, text="다시 대기", command=self.requeue_selected).pack(side=tk.RIGHT, padx=(0, 5))
+        ttk.Button(queue_nav, text="URL 목록 파일 추가", command=self.import_url_file).pack(side=tk.RIGHT, padx=(0, 5))
 
         # 로그와 파일 목록을 포함하는 프레임
         content_frame = ttk.Frame(main_frame)
-        content_frame.grid(row=3, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), pady=5)
+        content_frame.grid(row=4, column=0, sticky=(tk.W, tk.E, tk.N, tk.S), pady=5)
         content_frame.columnconfigure(0, weight=2)  # 로그에 더 많은 공간
         content_frame.columnconfigure(1, weight=1)  # 파일 목록
         content_frame.rowconfigure(0, weight=1)
@@ -550,7 +220,7 @@ class App:
 
         # 진행 상태 바 프레임
         progress_frame = ttk.LabelFrame(main_frame, text="진행 상황", padding="5")
-        progress_frame.grid(row=4, column=0, sticky=(tk.W, tk.E), pady=5)
+        progress_frame.grid(row=5, column=0, sticky=(tk.W, tk.E), pady=5)
         
         # 현재 파일 진행 상태
         current_frame = ttk.Frame(progress_frame)
@@ -575,83 +245,241 @@ class App:
         self.stop_button = ttk.Button(progress_frame, text="중지", command=self.stop_download, state=tk.DISABLED)
         self.stop_button.grid(row=2, column=0, sticky=tk.E, pady=(5, 0))
 
-        # 다운로더 스레드
-        self.downloader = None
-
         # 창 크기 조절 가능하도록 설정
         main_frame.columnconfigure(0, weight=1)
-        main_frame.rowconfigure(3, weight=1)
+        main_frame.rowconfigure(4, weight=1)
 
         # 저장된 상태 불러오기
         self.load_state()
 
+        # 진행 이벤트 처리 루프 시작
+        self.root.after(EVENT_PUMP_INTERVAL_MS, self.pump_events)
+        self.root.after(BANDWIDTH_LABEL_INTERVAL_MS, self.refresh_bandwidth_label)
+        self.root.after(QUEUE_REFRESH_MS, self.queue_tick)
+
     def select_folder(self):
         folder = filedialog.askdirectory(title="다운로드 폴더 선택")
         if folder:
             self.folder_entry.delete(0, tk.END)
             self.folder_entry.insert(0, folder)
 
-    def update_log(self, message):
-        if message.startswith("progress:"):
-            progress = float(message.split(":")[1])
-            self.current_progress["value"] = progress
-        elif message.startswith("total_progress:"):
-            progress = float(message.split(":")[1])
-            self.total_progress["value"] = progress
-            # 현재 다운로드 중인 항목 찾아서 진행률 업데이트
-            for item in self.queue_tree.get_children():
-                if self.queue_info[item]['status'] == 'downloading':
-                    total_files = self.queue_info[item].get('total_files', 0)
-                    current_files = int(total_files * progress / 100)
-                    self.queue_tree.set(item, 'progress_text', 
-                        f"{progress:.1f}% [{current_files}/{total_files}]")
-                    break
-        elif message.startswith("file_status:"):
-            # file_status:파일명:상태 형식으로 메시지 처리
-            _, filename, status = message.split(":", 2)
-            self.update_file_status(filename, status)
-        elif message.startswith("total_files:"):
+    def apply_connection_limit(self):
+        """모든 앨범이 공유하는 동시 파일 다운로드 수 적용"""
+        try:
+            set_global_download_limit(self.connection_limit_var.get())
+            if 'async_engine' in sys.modules:
+                sys.modules['async_engine'].set_async_transfer_limit(self.connection_limit_var.get())
+        except (tk.TclError, ValueError):
+            pass
+
+    def apply_bandwidth(self):
+        """전체 대역폭 제한과 시간대별 제한 적용 (받는 중인 파일에도 바로 적용)"""
+        limiter = get_bandwidth_limiter()
+        try:
+            limiter.set_rate(max(0.0, float(self.bandwidth_var.get())) * 1024 * 1024)
+        except (tk.TclError, ValueError):
+            pass
+        try:
+            limiter.set_schedule(parse_schedule(self.schedule_var.get()))
+        except ValueError as e:
+            self.update_log(f"⚠️ {str(e)}")
+        self.refresh_bandwidth_label(reschedule=False)
+
+    def refresh_bandwidth_label(self, reschedule=True):
+        if self.is_closing:
+            return
+        self.bandwidth_label.config(text=f"현재: {format_rate(get_bandwidth_limiter().current_rate())}")
+        if reschedule:
+            self.root.after(BANDWIDTH_LABEL_INTERVAL_MS, self.refresh_bandwidth_label)
+
+    def current_weight(self):
+        try:
+            return max(0.1, float(self.weight_var.get()))
+        except (tk.TclError, ValueError):
+            return DEFAULT_WEIGHT
+
+    def apply_weight(self):
+        """선택한 대기열 항목의 가중치 변경 (받는 중인 앨범에도 바로 적용)"""
+        weight = self.current_weight()
+        for job_id in self.selected_jobs():
+            self.jobs.update(job_id, weight=weight)
+            if job_id in self.running_jobs:
+                self.running_jobs[job_id].weight = weight
+            downloader = self.active_downloads.get(job_id)
+            if downloader:
+                downloader.set_weight(weight)
+
+    def on_queue_select(self, event=None):
+        """선택한 항목의 가중치를 입력란에 표시"""
+        selection = self.selected_jobs()
+        job = self.jobs.get(selection[0]) if selection else None
+        if job:
+            self.weight_var.set(job.weight)
+
+    def max_concurrent_albums(self):
+        try:
+            return max(1, int(self.album_slots_var.get()))
+        except (tk.TclError, ValueError):
+            return DEFAULT_CONCURRENT_ALBUMS
+
+    def pump_events(self):
+        """작업 스레드가 보낸 진행 이벤트를 일정 간격으로 모아서 UI에 반영"""
+        for item, event in self.events.drain(limit=MAX_EVENTS_PER_FRAME):
+            self.handle_event(item, event)
+        if not self.is_closing:
+            self.state.flush()
+            self.root.after(EVENT_PUMP_INTERVAL_MS, self.pump_events)
+
+    def handle_event(self, item, event):
+        """진행 이벤트 하나 처리 (item은 이벤트를 보낸 작업 ID)"""
+        if isinstance(event, FileProgress):
+            if item == self.progress_job():
+                self.current_progress["value"] = event.percent
+        elif isinstance(event, TotalProgress):
+            if item == self.progress_job():
+                self.total_progress["value"] = event.percent
+            # 해당 항목의 진행률 업데이트
+            if item in self.running_jobs:
+                total_files = self.running_jobs[item].total_files
+                current_files = int(total_files * event.percent / 100)
+                self.set_queue_progress(item, f"{event.percent:.1f}% [{current_files}/{total_files}]")
+        elif isinstance(event, FileStatus):
+            self.update_file_status(event.filename, event.status, item)
+        elif isinstance(event, TotalFiles):
             # 전체 파일 수 저장 (기존 정보 유지)
-            _, total = message.split(":")
-            for item in self.queue_tree.get_children():
-                if self.queue_info[item]['status'] == 'downloading':
-                    self.queue_info[item].update({'total_files': int(total)})
-                    break
-        else:
-            # 새로운 다운로드 시작 시 구분선 추가
-            if message.startswith("💿 앨범 제목:") and self.log_text.get("1.0", tk.END).strip():
-                self.log_text.insert(tk.END, "\n" + "-" * 80 + "\n\n")
-            # 앨범 정보는 로그 텍스트에 표시
-            self.log_text.insert(tk.END, message + "\n")
-            self.log_text.see(tk.END)
-            
-            # 앨범 제목을 발견하면 대기열 항목 업데이트
-            if message.startswith("💿 앨범 제목:"):
-                album_name = message.replace("💿 앨범 제목: ", "").strip()
-                for item in self.queue_tree.get_children():
-                    if self.queue_info[item]['status'] == 'downloading':
-                        self.queue_tree.set(item, 'album', album_name)
-                        break
-            # 폴더명이 결정되면 대기열 항목 최종 업데이트
-            elif message.startswith("📁 저장 폴더:"):
-                folder_name = message.replace("📁 저장 폴더: ", "").strip()
-                for item in self.queue_tree.get_children():
-                    if self.queue_info[item]['status'] == 'downloading':
-                        self.queue_tree.set(item, 'album', folder_name)
-                        break
+            if item in self.running_jobs:
+                self.running_jobs[item].total_files = event.count
+                self.jobs.update(item, total_files=event.count)
+        elif isinstance(event, LogMessage):
+            self.update_log(event.text, item)
+
+    def update_log(self, message, item=None):
+        """로그 메시지 표시 (item은 메시지를 보낸 대기열 항목 ID)"""
+        # 새로운 다운로드 시작 시 구분선 추가
+        if message.startswith("💿 앨범 제목:") and self.log_text.get("1.0", tk.END).strip():
+            message = "\n" + "-" * 80 + "\n\n" + message
+        # 앨범 정보는 로그 텍스트에 표시
+        self.log_text.insert(tk.END, message + "\n")
+        self.trim_log()
+        self.log_text.see(tk.END)
+        self.state.append_log(message)
         
-        self.root.update_idletasks()
-
-    def update_file_status(self, filename, status):
-        # 파일이 이미 트리뷰에 있는지 확인
-        for item in self.tree.get_children():
-            if self.tree.item(item)['values'][0] == filename:
-                self.tree.set(item, 'status', status)
-                return
+        # 앨범 제목을 발견하면 대기열 항목 업데이트
+        if message.startswith("💿 앨범 제목:") and item in self.running_jobs:
+            album_name = message.replace("💿 앨범 제목: ", "").strip()
+            self.set_queue_album(item, album_name)
+        # 폴더명이 결정되면 대기열 항목 최종 업데이트
+        elif message.startswith("📁 저장 폴더:") and item in self.running_jobs:
+            folder_name = message.replace("📁 저장 폴더: ", "").strip()
+            self.set_queue_album(item, folder_name)
+
+    def set_queue_album(self, job_id, album_name):
+        self.running_jobs[job_id].album = album_name
+        self.jobs.update(job_id, album=album_name)
+        if self.queue_tree.exists(str(job_id)):
+            self.queue_tree.set(str(job_id), 'album', album_name)
+
+    def set_queue_progress(self, job_id, progress_text):
+        """받는 중인 작업의 진행 표시 (저장소에는 임대를 연장할 때 함께 기록)"""
+        self.running_jobs[job_id].progress_text = progress_text
+        if self.queue_tree.exists(str(job_id)):
+            self.queue_tree.set(str(job_id), 'progress_text', progress_text)
+
+    def selected_jobs(self):
+        return [int(iid) for iid in self.queue_tree.selection()]
+
+    def progress_job(self):
+        """진행 막대에 보여 줄 작업 (선택한 받는 중인 작업, 없으면 가장 먼저 시작한 작업)"""
+        for job_id in self.selected_jobs():
+            if job_id in self.running_jobs:
+                return job_id
+        return next(iter(self.running_jobs), None)
+
+    def refresh_queue_view(self):
+        """현재 페이지의 작업만 대기열 트리뷰에 표시 (행 구성이 같으면 값만 갱신)"""
+        counts = self.jobs.counts()
+        status = QUEUE_FILTERS.get(self.queue_filter_var.get())
+        total = counts[status] if status else sum(counts.values())
+        pages = max(1, -(-total // QUEUE_PAGE_SIZE))
+        self.queue_page = max(0, min(self.queue_page, pages - 1))
+        jobs = self.jobs.page(self.queue_page * QUEUE_PAGE_SIZE, QUEUE_PAGE_SIZE, status)
+
+        rows = []
+        for job in jobs:
+            live = self.running_jobs.get(job.id, job)
+            album = live.album or job.url.split("/album/")[-1].strip("/") or job.url
+            rows.append((str(job.id), (album, live.progress_text)))
+        if [iid for iid, _ in rows] == list(self.queue_tree.get_children()):
+            for iid, values in rows:
+                self.queue_tree.item(iid, values=values)
+        else:
+            selection = set(self.queue_tree.selection())
+            self.queue_tree.delete(*self.queue_tree.get_children())
+            for iid, values in rows:
+                self.queue_tree.insert('', 'end', iid=iid, values=values)
+            self.queue_tree.selection_set([iid for iid, _ in rows if iid in selection])
+
+        self.queue_page_label.config(
+            text=f"{self.queue_page + 1}/{pages} 페이지 · 대기 {counts[WAITING]} · "
+                 f"받는 중 {counts[DOWNLOADING]} · 완료 {counts[COMPLETED]} · "
+                 f"실패 {counts[FAILED]} · 중단 {counts[STOPPED]}")
+
+    def move_queue_page(self, step):
+        """이전/다음 페이지로 이동 (None이면 필터를 바꾼 것이므로 첫 페이지로)"""
+        self.queue_page = 0 if step is None else self.queue_page + step
+        self.refresh_queue_view()
+
+    def queue_tick(self):
+        """다른 스레드나 프로그램이 추가한 작업을 반영하고 빈 슬롯이 있으면 시작"""
+        if self.is_closing:
+            return
+        self.refresh_queue_view()
+        self.process_next_download()
+        self.root.after(QUEUE_REFRESH_MS, self.queue_tick)
+
+    def requeue_selected(self):
+        """선택한 실패/중단/완료 항목을 다시 대기 상태로"""
+        self.jobs.requeue(self.selected_jobs())
+        self.queue_paused = False
+        self.refresh_queue_view()
+        self.process_next_download()
+
+    def remove_selected(self):
+        """선택한 항목 삭제 (받는 중인 항목은 그대로 둠)"""
+        self.jobs.remove(self.selected_jobs())
+        self.refresh_queue_view()
+
+    def clear_finished(self):
+        removed = self.jobs.remove_finished()
+        self.update_log(f"🧹 완료한 항목 {removed}개를 대기열에서 정리했습니다.")
+        self.refresh_queue_view()
+
+    def trim_log(self):
+        """로그가 최대 줄 수를 넘으면 오래된 줄부터 삭제"""
+        line_count = int(self.log_text.index('end-1c').split('.')[0])
+        if line_count > MAX_LOG_LINES:
+            self.log_text.delete("1.0", f"{line_count - MAX_LOG_LINES + 1}.0")
+
+    def update_file_status(self, filename, status, job=None, persist=True):
+        if persist:
+            self.state.set_file(job, filename, status)
+
+        # 색인으로 파일 항목을 바로 찾아 상태 변경
+        key = (job, filename)
+        row = self.file_rows.get(key)
+        if row is not None:
+            self.tree.set(row, 'status', status)
+            return
         
         # 새로운 파일 추가
-        self.tree.insert('', 'end', values=(filename, status))
-        self.tree.see(self.tree.get_children()[-1])
+        row = self.tree.insert('', 'end', values=(filename, status))
+        self.file_rows[key] = row
+        self.tree.see(row)
+
+        # 최대 개수를 넘으면 가장 오래된 항목부터 삭제
+        while len(self.file_rows) > MAX_FILE_ROWS:
+            _, old_row = self.file_rows.popitem(last=False)
+            self.tree.delete(old_row)
 
     def start_download(self):
         if self.is_closing:  # 종료 중이면 새로운 다운로드 시작 안 함
@@ -660,6 +488,13 @@ class App:
         album_url = self.url_entry.get().strip()
         download_folder = self.folder_entry.get().strip()
 
+        # URL 없이 시작하면 중지했던 대기열을 다시 진행
+        if not album_url and self.jobs.counts()[WAITING]:
+            self.queue_paused = False
+            self.update_log("▶️ 대기열을 다시 시작합니다.")
+            self.process_next_download()
+            return
+
         if not album_url or not download_folder:
             self.update_log("❌ URL과 다운로드 폴더를 모두 입력해주세요.")
             return
@@ -670,177 +505,274 @@ class App:
             self.update_log(f"❌ 폴더 생성 실패: {str(e)}")
             return
 
-        # URL에서 앨범명 추출
-        album_name = album_url.split("/album/")[-1].strip("/")
-        if not album_name:
-            album_name = "다운로드 대기 중..."
-
-        # 대기열에 추가
-        item_id = self.queue_tree.insert('', 'end', values=(album_name, "대기 중"))
-        self.queue_info[item_id] = {
-            'total_files': 0,
-            'url': album_url,
-            'folder': download_folder,
-            'status': 'waiting'  # 상태 추가: waiting, downloading, completed, stopped
-        }
-        
-        # 현재 다운로드가 없으면 시작
-        if not self.current_download:
-            self.process_next_download()
-        
+        # 앨범 URL이 아니면 알파벳/플랫폼 목록으로 보고 목록 동기화
+        self.queue_paused = False
+        if is_album_url(album_url):
+            self.enqueue_album(album_url, download_folder)
+        else:
+            self.start_catalog_sync(album_url, download_folder)
+        self.state.set_setting('last_download_folder', download_folder)
+
         # URL 입력창 초기화
         self.url_entry.delete(0, tk.END)
 
+    def enqueue_album(self, album_url, download_folder):
+        """앨범을 대기열에 추가하고 빈 슬롯이 있으면 바로 시작"""
+        if self.is_closing:
+            return
+
+        job_id = self.jobs.enqueue(album_url, download_folder, weight=self.current_weight())
+        if job_id is None:
+            self.update_log(f"⚠️ 이미 대기열에 있는 앨범입니다: {album_url}")
+            return
+
+        # 새 항목이 보이도록 마지막 페이지로 이동한 뒤 빈 슬롯이 있으면 바로 시작
+        self.queue_filter_var.set('전체')
+        self.queue_page = sum(self.jobs.counts().values())
+        self.refresh_queue_view()
+        self.process_next_download()
+
+    def import_url_file(self):
+        """URL 목록 파일을 읽으면서 대기열에 추가 (별도 스레드, 한 줄에 'URL [가중치]')"""
+        download_folder = self.folder_entry.get().strip()
+        if not download_folder:
+            self.update_log("❌ 다운로드 폴더를 먼저 입력해주세요.")
+            return
+        if self.importing:
+            self.update_log("⚠️ 이미 URL 목록을 가져오는 중입니다.")
+            return
+        path = filedialog.askopenfilename(title="URL 목록 파일 선택",
+                                          filetypes=[("텍스트 파일", "*.txt"), ("모든 파일", "*.*")])
+        if not path:
+            return
+        self.importing = True
+        threading.Thread(target=self.run_import, args=(path, download_folder, self.current_weight()),
+                         name="url-import", daemon=True).start()
+
+    def run_import(self, path, download_folder, weight):
+        callback = self.events.callback_for(None)
+
+        def entries(f):
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    yield parse_entry(line, weight)
+
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                added = self.jobs.enqueue_many(
+                    entries(f), download_folder,
+                    on_batch=lambda added, read: callback(LogMessage(f"📥 {read}줄 읽음, {added}개 추가")),
+                    is_running=lambda: not self.is_closing)
+            callback(LogMessage(f"✅ URL 목록 가져오기 완료: {added}개 추가 ({os.path.basename(path)})"))
+        except Exception as e:
+            callback(LogMessage(f"❌ URL 목록 가져오기 실패: {str(e)}"))
+        finally:
+            self.importing = False
+
+    def start_catalog_sync(self, spec, download_folder):
+        """목록 페이지를 훑어 라이브러리에 없거나 바뀐 앨범을 대기열에 추가 (별도 스레드)"""
+        if self.catalog_thread and self.catalog_thread.is_alive():
+            self.update_log("⚠️ 이미 목록 동기화가 진행 중입니다.")
+            return
+        self.update_log(f"📚 목록 동기화를 시작합니다: {spec}")
+        self.catalog_running = True
+        self.catalog_thread = threading.Thread(target=self.run_catalog_sync,
+                                               args=(listing_urls(spec), download_folder,
+                                                     self.current_weight()),
+                                               name="catalog-sync", daemon=True)
+        self.catalog_thread.start()
+
+    def run_catalog_sync(self, seeds, download_folder, weight):
+        """목록 동기화 스레드 - 찾은 앨범은 작업 대기열에 바로 추가"""
+        callback = self.events.callback_for(None)
+        index = DownloadIndex(download_folder)
+        catalog = CatalogSync(download_folder, index, progress_callback=callback,
+                              is_running=lambda: self.catalog_running and not self.is_closing)
+        try:
+            catalog.start(seeds)
+            # 대기열은 저장소에 남아 있으므로 지난번에 넣은 앨범은 다시 넣지 않음
+            for album_url in catalog.crawl(requeue_pending=False):
+                self.jobs.enqueue(album_url, download_folder, weight=weight)
+            callback(LogMessage(catalog.summary()))
+        except Exception as e:
+            callback(LogMessage(f"❌ 목록 동기화 중 오류 발생: {str(e)}"))
+        finally:
+            catalog.close()
+            index.close()
+
     def process_next_download(self):
-        # 대기 중인 항목 찾기
-        next_item = None
-        for item in self.queue_tree.get_children():
-            if self.queue_info[item]['status'] == 'waiting':
-                next_item = item
-                break
+        """빈 슬롯 수만큼 대기 중인 항목을 시작"""
+        if self.is_closing or self.queue_paused:
+            return
 
-        if next_item:
-            # 현재 항목 정보 가져오기
-            item_info = self.queue_info[next_item]
-            album_url = item_info['url']
-            download_folder = item_info['folder']
-            
-            # 상태 업데이트
-            item_info['status'] = 'downloading'
-            self.queue_tree.set(next_item, 'progress_text', "0% [0/0]")
-            
+        # 동시에 Chrome이 필요할 수 있는 앨범 수만큼 드라이버를 풀에 유지
+        set_driver_pool_size(self.max_concurrent_albums())
+        started = False
+        while len(self.active_downloads) < self.max_concurrent_albums():
+            # 가장 먼저 추가된 작업을 가져옴 (임대를 연장하는 동안 이 프로그램이 받음)
+            job = self.jobs.claim(self.owner)
+            if job is None:
+                break
+            self.running_jobs[job.id] = job
+            self.set_queue_progress(job.id, "0% [0/0]")
+
+            job_class = DownloaderThread
+            if self.engine_var.get() == ENGINE_ASYNC:
+                import async_engine
+                async_engine.set_async_transfer_limit(self.connection_limit_var.get())
+                job_class = async_engine.AsyncAlbumJob
+            downloader = job_class(job.url, job.folder, self.events.callback_for(job.id),
+                                   weight=job.weight)
+            downloader.daemon = True
+            self.active_downloads[job.id] = downloader
+            downloader.start()
+            started = True
+
+        if started:
+            self.refresh_queue_view()
             self.stop_button.config(state=tk.NORMAL)
             self.current_progress["value"] = 0
             self.total_progress["value"] = 0
-
-            self.current_download = DownloaderThread(album_url, download_folder, self.update_log)
-            self.current_download.daemon = True
-            self.current_download.start()
-
-            # 다운로드 완료 체크
-            self.check_download_status()
+            # 다운로드 완료 체크 (이미 실행 중이면 새로 등록하지 않음)
+            if not self._status_check_scheduled:
+                self._status_check_scheduled = True
+                self.root.after(100, self.check_download_status)
 
     def check_download_status(self):
-        if self.current_download and self.current_download.is_alive():
-            self.root.after(100, self.check_download_status)
-        else:
-            # 다운로드 완료 시
-            if self.current_download:
-                # 드라이버 종료 확실히 하기
-                self.update_log("🔄 다운로드 완료, 리소스 정리 중...")
-                self.current_download.stop()
-                try:
-                    self.current_download.join(timeout=2.0)
-                except Exception as e:
-                    self.update_log(f"⚠️ 다운로드 스레드 종료 중 오류 발생: {str(e)}")
-                finally:
-                    self.current_download = None
-                    self.update_log("✅ 리소스 정리 완료")
-            
-            # 현재 다운로드 완료 처리
-            for item in self.queue_tree.get_children():
-                if self.queue_info[item]['status'] == 'downloading':
-                    # 완료 상태로 업데이트
-                    self.queue_info[item]['status'] = 'completed'
-                    self.queue_tree.set(item, 'progress_text', "완료")
-                    break
-            
-            # 다음 다운로드 처리
-            waiting_items = [item for item in self.queue_tree.get_children() 
-                           if self.queue_info[item]['status'] == 'waiting']
-            
-            if waiting_items:
-                self.process_next_download()
+        self._status_check_scheduled = False
+
+        # 끝난 스레드가 남긴 이벤트를 먼저 반영해야 최종 상태가 덮어써지지 않음
+        for item, event in self.events.drain():
+            self.handle_event(item, event)
+
+        # 끝난 다운로드 정리
+        for item, downloader in list(self.active_downloads.items()):
+            if downloader.is_alive():
+                continue
+            self.update_log("🔄 다운로드 완료, 리소스 정리 중...", item)
+            downloader.stop()
+            try:
+                downloader.join(timeout=2.0)
+            except Exception as e:
+                self.update_log(f"⚠️ 다운로드 스레드 종료 중 오류 발생: {str(e)}", item)
+            finally:
+                del self.active_downloads[item]
+                self.update_log("✅ 리소스 정리 완료", item)
+
+            # 작업 대기열에 결과 기록 (실패하면 시도 횟수가 남은 동안 나중에 다시 시도)
+            self.running_jobs.pop(item, None)
+            if item in self.stopping:
+                self.stopping.discard(item)
+                self.jobs.release(item, self.owner)
+            elif downloader.status == 'completed' and not downloader.failed_files:
+                self.jobs.ack(item, self.owner)
             else:
-                self.stop_button.config(state=tk.DISABLED)
+                self.jobs.nack(item, self.owner,
+                               error=f"{downloader.status} (실패한 파일 {downloader.failed_files}개)")
+            self.refresh_queue_view()
+
+        # 받는 중인 작업의 임대 연장 (임대가 만료되어 다른 작업자가 가져갔으면 중지)
+        if time.monotonic() - self._last_heartbeat >= HEARTBEAT_INTERVAL:
+            self._last_heartbeat = time.monotonic()
+            for item, job in self.running_jobs.items():
+                if item in self.stopping:
+                    continue
+                if not self.jobs.heartbeat(item, self.owner, progress_text=job.progress_text,
+                                           total_files=job.total_files):
+                    self.update_log("⚠️ 작업 임대가 만료되어 다른 작업자에게 넘어갔습니다. 중지합니다.", item)
+                    self.stopping.add(item)
+                    self.active_downloads[item].stop()
+
+        # 빈 슬롯에 다음 다운로드 시작
+        self.process_next_download()
+
+        if self.active_downloads:
+            if not self._status_check_scheduled:
+                self._status_check_scheduled = True
+                self.root.after(100, self.check_download_status)
+        else:
+            self.stop_button.config(state=tk.DISABLED)
 
     def stop_download(self):
-        if self.current_download and self.current_download.is_alive():
-            self.current_download.stop()
-            self.update_log("⏹️ 다운로드를 중지합니다...")
-            # 현재 항목 상태 업데이트
-            for item in self.queue_tree.get_children():
-                if self.queue_info[item]['status'] == 'downloading':
-                    self.queue_info[item]['status'] = 'stopped'
-                    self.queue_tree.set(item, 'progress_text', "중단됨")
-                    break
-            self.stop_button.config(state=tk.DISABLED)
+        if self.catalog_running:
+            self.catalog_running = False
+            self.update_log("⏹️ 목록 동기화를 중지합니다...")
+        self.queue_paused = True
+        if not self.active_downloads:
+            return
+        self.update_log("⏹️ 다운로드를 중지합니다...")
+        for item, downloader in self.active_downloads.items():
+            if downloader.is_alive():
+                downloader.stop()
+            # 항목 상태 업데이트 (대기열에는 스레드가 끝날 때 기록)
+            self.stopping.add(item)
+            self.set_queue_progress(item, "중단됨")
+        self.stop_button.config(state=tk.DISABLED)
 
     def save_state(self):
-        """프로그램 상태를 파일에 저장"""
+        """설정을 기록하고 저장소에 남은 변경 사항 커밋"""
         try:
-            state = {
-                'queue_info': {},
-                'log_content': self.log_text.get("1.0", tk.END),
-                'file_list': [],
-                'last_download_folder': self.folder_entry.get(),
-                'save_time': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-            }
-
-            # 대기열 정보 저장
-            for item in self.queue_tree.get_children():
-                values = self.queue_tree.item(item)['values']
-                info = self.queue_info.get(item, {})
-                state['queue_info'][item] = {
-                    'album': values[0],
-                    'progress_text': values[1],
-                    'url': info.get('url', ''),
-                    'folder': info.get('folder', ''),
-                    'status': info.get('status', ''),
-                    'total_files': info.get('total_files', 0)
-                }
-
-            # 파일 목록 저장
-            for item in self.tree.get_children():
-                values = self.tree.item(item)['values']
-                state['file_list'].append({
-                    'filename': values[0],
-                    'status': values[1]
-                })
-
-            # 상태 파일 저장
-            with open(self.state_file, 'w', encoding='utf-8') as f:
-                json.dump(state, f, ensure_ascii=False, indent=2)
-
+            self.state.set_setting('last_download_folder', self.folder_entry.get())
+            self.state.set_setting('max_albums', self.max_concurrent_albums())
+            self.state.set_setting('connection_limit', self.connection_limit_var.get())
+            self.state.set_setting('engine', self.engine_var.get())
+            self.state.set_setting('bandwidth_mbps', self.bandwidth_var.get())
+            self.state.set_setting('bandwidth_schedule', self.schedule_var.get())
+            self.state.set_setting('save_time', datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+            self.state.flush(force=True)
         except Exception as e:
             print(f"상태 저장 중 오류 발생: {str(e)}")
 
     def load_state(self):
-        """저장된 프로그램 상태 불러오기"""
+        """저장된 프로그램 상태 불러오기 (대기열 전체와 최근 로그/파일만)"""
         try:
-            if not os.path.exists(self.state_file):
-                return
+            if self.state.is_empty() and import_legacy_state(self.state):
+                print("=== 이전 상태 파일(downloader_state.json)을 새 저장소로 옮김 ===")
 
-            with open(self.state_file, 'r', encoding='utf-8') as f:
-                state = json.load(f)
+            settings = self.state.settings()
 
             # 로그 내용 복원
             self.log_text.delete("1.0", tk.END)
-            self.log_text.insert("1.0", state.get('log_content', ''))
+            for message in self.state.recent_log():
+                self.log_text.insert(tk.END, message + "\n")
+            self.trim_log()
 
             # 마지막 다운로드 폴더 복원
-            last_folder = state.get('last_download_folder', '')
+            last_folder = settings.get('last_download_folder', '')
             if last_folder and os.path.exists(last_folder):
                 self.folder_entry.insert(0, last_folder)
 
-            # 대기열 정보 복원
-            for item_id, info in state.get('queue_info', {}).items():
-                item = self.queue_tree.insert('', 'end', 
-                    values=(info['album'], info['progress_text']))
-                self.queue_info[item] = {
-                    'url': info['url'],
-                    'folder': info['folder'],
-                    'status': info['status'],
-                    'total_files': info['total_files']
-                }
+            # 동시 다운로드 설정 복원
+            self.album_slots_var.set(settings.get('max_albums', DEFAULT_CONCURRENT_ALBUMS))
+            self.connection_limit_var.set(settings.get('connection_limit', DEFAULT_GLOBAL_DOWNLOAD_LIMIT))
+            self.apply_connection_limit()
+            if settings.get('engine') in ENGINE_CHOICES:
+                self.engine_var.set(settings['engine'])
+            self.bandwidth_var.set(settings.get('bandwidth_mbps', 0))
+            self.schedule_var.set(settings.get('bandwidth_schedule', ''))
+            self.apply_bandwidth()
+
+            # 이전 버전의 대기열은 작업 대기열로 옮김 (ID를 유지해 파일 목록과 연결)
+            legacy_queue = self.state.legacy_queue_items()
+            for info in legacy_queue:
+                # 강제 종료 등으로 정리되지 못한 항목은 중단된 것으로 표시
+                status = STOPPED if info['status'] == DOWNLOADING else info['status']
+                progress_text = "중단됨" if status == STOPPED else info['progress_text']
+                self.jobs.restore(info['id'], info['url'], info['folder'], status,
+                                  weight=info['weight'], album=info['album'],
+                                  progress_text=progress_text, total_files=info['total_files'])
+            if legacy_queue:
+                self.state.clear_legacy_queue()
+                print(f"=== 대기열 항목 {len(legacy_queue)}개를 작업 대기열로 옮김 ===")
+            self.refresh_queue_view()
 
             # 파일 목록 복원
-            for file_info in state.get('file_list', []):
-                self.tree.insert('', 'end', 
-                    values=(file_info['filename'], file_info['status']))
+            for job, filename, status in self.state.recent_files():
+                self.update_file_status(filename, status, job, persist=False)
 
             # 저장 시간 표시
-            save_time = state.get('save_time', '')
+            save_time = settings.get('save_time', '')
             if save_time:
                 self.log_text.insert(tk.END, 
                     f"\n\n마지막 저장 시간: {save_time}\n" + "-" * 80 + "\n")
@@ -856,27 +788,32 @@ class App:
             self.save_state()
             
             print("2. 현재 다운로드 상태 확인")
-            if self.current_download and self.current_download.is_alive():
-                print(f"   - 다운로드 스레드 상태: {self.current_download.is_alive()}")
-                print(f"   - 드라이버 상태: {self.current_download.driver is not None}")
+            for item, downloader in list(self.active_downloads.items()):
+                if not downloader.is_alive():
+                    continue
+                print(f"   - 다운로드 스레드 상태: {downloader.is_alive()}")
+                print(f"   - 드라이버 상태: {downloader.driver is not None}")
                 print("   - 다운로드 중지 시도")
-                self.current_download.stop()
+                downloader.stop()
+            for item, downloader in list(self.active_downloads.items()):
                 try:
                     print("   - 스레드 종료 대기")
-                    self.current_download.join(timeout=2.0)
+                    downloader.join(timeout=2.0)
                 except Exception as e:
                     print(f"   - 스레드 종료 중 오류: {str(e)}")
-                finally:
-                    print("   - 다운로드 객체 정리")
-                    self.current_download = None
+                # 받던 작업은 중단된 것으로 기록 (다음에 '다시 대기'로 이어받기)
+                self.jobs.release(item, self.owner)
+            print("   - 다운로드 객체 정리")
+            self.active_downloads.clear()
+            print("   - Chrome 드라이버 풀과 asyncio 엔진 종료")
+            shutdown_driver_pool()
+            if 'async_engine' in sys.modules:
+                sys.modules['async_engine'].shutdown_async_engine()
             
             print("3. 대기열 상태 확인")
-            for item in self.queue_tree.get_children():
-                status = self.queue_info[item]['status']
-                print(f"   - 항목 상태: {status}")
-                if status == 'downloading':
-                    print("   - 다운로드 중인 항목 발견")
-                    self.queue_info[item]['status'] = 'stopped'
+            print(f"   - 작업 상태: {self.jobs.counts()}")
+            self.jobs.close()
+            self.state.close()
             
             print("4. UI 리소스 정리")
             self.stop_button.config(state=tk.DISABLED)
@@ -901,8 +838,7 @@ class App:
             return
             
         # 다운로드 중인 항목이 있는지 확인
-        has_active_downloads = any(info['status'] in ['downloading', 'waiting'] 
-                                 for info in self.queue_info.values())
+        has_active_downloads = bool(self.active_downloads) or self.jobs.counts()[WAITING] > 0
         
         print(f"2. 활성 다운로드 상태: {has_active_downloads}")
         
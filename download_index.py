@@ -0,0 +1,109 @@
+import os
+import time
+import sqlite3
+import threading
+
+from integrity import file_digests
+
+INDEX_FILE_NAME = ".khinsider_index.sqlite3"
+
+
+class DownloadIndex:
+    """이미 받은 파일을 기록하는 라이브러리 색인 (다운로드 루트의 SQLite 파일)
+
+    원본 URL마다 최종 경로, 크기, 수정 시각, SHA-256 해시를 저장합니다.
+    기본적으로 크기와 수정 시각이 그대로면 완료된 파일로 보고, verify=True이면
+    파일을 다시 해시해 저장된 값과 비교합니다.
+    """
+
+    def __init__(self, root, verify=False):
+        os.makedirs(root, exist_ok=True)
+        self.path = os.path.join(root, INDEX_FILE_NAME)
+        self.verify = verify
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS files (
+                url TEXT PRIMARY KEY,
+                path TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime REAL NOT NULL,
+                sha256 TEXT,
+                updated_at REAL NOT NULL
+            )
+        """)
+        # 모든 파일을 받은 앨범 (목록 동기화에서 새 앨범인지 판단할 때 사용)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS albums (
+                url TEXT PRIMARY KEY,
+                folder TEXT NOT NULL,
+                files INTEGER NOT NULL,
+                completed_at REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    def lookup(self, url):
+        """URL에 대한 기록을 dict로 반환 (없으면 None)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT path, size, mtime, sha256 FROM files WHERE url = ?", (url,)).fetchone()
+        if not row:
+            return None
+        return {'path': row[0], 'size': row[1], 'mtime': row[2], 'sha256': row[3]}
+
+    def is_complete(self, url, file_path):
+        """file_path에 이미 완료된 파일이 있으면 True"""
+        entry = self.lookup(url)
+        if not entry or os.path.abspath(entry['path']) != os.path.abspath(file_path):
+            return False
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return False
+        if stat.st_size != entry['size']:
+            return False
+        if not self.verify:
+            # 빠른 확인: 크기와 수정 시각만 비교
+            return abs(stat.st_mtime - entry['mtime']) < 1.0
+        if not entry['sha256']:
+            return False
+        return file_digests(file_path, ('sha256',))['sha256'] == entry['sha256']
+
+    def record(self, url, file_path, sha256=None):
+        """다운로드를 마친 파일 기록 (sha256은 받으면서 계산한 값, 파일을 다시 읽지 않음)"""
+        stat = os.stat(file_path)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO files (url, path, size, mtime, sha256, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (url, os.path.abspath(file_path), stat.st_size, stat.st_mtime, sha256, time.time()))
+            self._conn.commit()
+
+    def record_album(self, album_url, folder, files):
+        """앨범의 모든 파일을 받았음을 기록"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO albums (url, folder, files, completed_at) VALUES (?, ?, ?, ?)",
+                (album_url, os.path.abspath(folder), files, time.time()))
+            self._conn.commit()
+
+    def album_entry(self, album_url):
+        """완료한 앨범 기록을 dict로 반환 (기록이 없거나 폴더가 없어졌으면 None)"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT folder, files, completed_at FROM albums WHERE url = ?", (album_url,)).fetchone()
+        if not row or not os.path.isdir(row[0]):
+            return None
+        return {'folder': row[0], 'files': row[1], 'completed_at': row[2]}
+
+    def forget(self, url):
+        with self._lock:
+            self._conn.execute("DELETE FROM files WHERE url = ?", (url,))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,204 @@
+import heapq
+import itertools
+import threading
+from contextlib import contextmanager
+
+DEFAULT_DOWNLOAD_WORKERS = 4
+DEFAULT_GLOBAL_DOWNLOAD_LIMIT = 8
+
+DEFAULT_WEIGHT = 1.0
+
+
+class FairSlots:
+    """작업(앨범) 가중치에 비례해 동시 다운로드 슬롯을 나누는 카운터
+
+    슬롯이 비면 기다리는 작업 가운데 (사용 중인 슬롯 수 / 가중치)가 가장
+    작은 작업이 먼저 가져갑니다. 그래서 다운로드 스레드가 많은 앨범이라도
+    다른 앨범의 몫을 차지하지 못하고, 가중치 2인 앨범은 1인 앨범보다 두 배의
+    슬롯을 씁니다. 상태만 관리하므로 스레드(slot)와 asyncio 쪽 모두에서
+    enqueue / try_enter / leave 로 같은 규칙을 씁니다.
+    """
+
+    def __init__(self, limit):
+        self.limit = max(1, int(limit))
+        self._active = {}
+        self._waiting = {}
+        self._weights = {}
+        self._total = 0
+        # try_enter를 slot()의 조건 변수 안에서도 부르므로 재진입 가능한 락 사용
+        self._lock = threading.RLock()
+        self._cond = threading.Condition(self._lock)
+
+    def resize(self, limit):
+        """슬롯 수 변경 (기다리는 작업에 바로 적용, 초과한 슬롯은 반환될 때 줄어듦)"""
+        with self._cond:
+            self.limit = max(1, int(limit))
+            self._cond.notify_all()
+
+    def set_weight(self, job, weight):
+        with self._cond:
+            self._weights[job] = max(0.01, float(weight))
+            self._cond.notify_all()
+
+    def forget(self, job):
+        """끝난 작업의 가중치 정보 삭제"""
+        with self._cond:
+            self._weights.pop(job, None)
+
+    def _ratio(self, job):
+        return self._active.get(job, 0) / self._weights.get(job, DEFAULT_WEIGHT)
+
+    def enqueue(self, job):
+        with self._lock:
+            self._waiting[job] = self._waiting.get(job, 0) + 1
+
+    def dequeue(self, job):
+        """슬롯을 받지 않고 기다리기를 그만둠"""
+        with self._cond:
+            self._drop_waiting(job)
+            self._cond.notify_all()
+
+    def _drop_waiting(self, job):
+        count = self._waiting.get(job, 0) - 1
+        if count > 0:
+            self._waiting[job] = count
+        else:
+            self._waiting.pop(job, None)
+
+    def try_enter(self, job):
+        """job의 차례이고 빈 슬롯이 있으면 슬롯을 잡고 True (enqueue 한 뒤 호출)"""
+        with self._lock:
+            if self._total >= self.limit:
+                return False
+            ratio = self._ratio(job)
+            if any(self._ratio(other) < ratio for other in self._waiting if other is not job):
+                return False
+            self._drop_waiting(job)
+            self._active[job] = self._active.get(job, 0) + 1
+            self._total += 1
+            return True
+
+    def leave(self, job):
+        with self._cond:
+            count = self._active.get(job, 0) - 1
+            if count > 0:
+                self._active[job] = count
+            else:
+                self._active.pop(job, None)
+            self._total -= 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, job):
+        """스레드에서 job 몫의 슬롯을 잡고 블록이 끝나면 반환"""
+        self.enqueue(job)
+        with self._cond:
+            while not self.try_enter(job):
+                self._cond.wait(0.5)
+        try:
+            yield
+        finally:
+            self.leave(job)
+
+
+# 모든 앨범(스레드)이 공유하는 동시 다운로드 슬롯
+_global_slots = FairSlots(DEFAULT_GLOBAL_DOWNLOAD_LIMIT)
+
+
+def set_global_download_limit(limit):
+    """전체 앨범에 걸친 동시 다운로드 수 변경 (기다리는 파일부터 바로 적용)"""
+    _global_slots.resize(limit)
+
+
+def set_slot_weight(job, weight):
+    """job(앨범)이 전체 슬롯에서 가져갈 몫의 가중치 변경"""
+    _global_slots.set_weight(job, weight)
+
+
+def forget_slot_weight(job):
+    _global_slots.forget(job)
+
+
+class DownloadJob:
+    """다운로드할 파일 하나"""
+
+    def __init__(self, url, file_path, size_hint=0):
+        self.url = url
+        self.file_path = file_path
+        self.size_hint = size_hint or 0
+
+
+class DownloadScheduler:
+    """앨범 안의 파일들을 여러 작업 스레드로 동시에 받는 스케줄러
+
+    대기 중인 작업 가운데 크기가 큰 파일부터 꺼내 시작하므로 큰 FLAC이
+    마지막에 홀로 남아 전체 완료를 늦추는 일을 줄입니다. 파일마다
+    전역 슬롯을 하나씩 잡아 여러 앨범이 동시에 돌아도 전체 동시 다운로드
+    수가 제한되고, 슬롯은 job(앨범)의 가중치에 따라 공평하게 나뉩니다.
+    """
+
+    def __init__(self, download_func, max_workers=DEFAULT_DOWNLOAD_WORKERS,
+                 on_done=None, is_running=lambda: True, job=None):
+        self.download_func = download_func
+        self.job = job if job is not None else self
+        self.max_workers = max(1, max_workers)
+        self.on_done = on_done
+        self.is_running = is_running
+        self._heap = []
+        self._counter = itertools.count()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._workers = []
+
+    def start(self):
+        for i in range(self.max_workers):
+            worker = threading.Thread(target=self._worker, name=f"download-worker-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+        return self
+
+    def submit(self, url, file_path, size_hint=0):
+        job = DownloadJob(url, file_path, size_hint)
+        with self._cond:
+            heapq.heappush(self._heap, (-job.size_hint, next(self._counter), job))
+            self._cond.notify()
+        return job
+
+    def close(self):
+        """더 이상 작업을 추가하지 않음"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def join(self):
+        """남은 작업이 모두 끝날 때까지 대기"""
+        self.close()
+        for worker in self._workers:
+            worker.join()
+
+    def _next_job(self):
+        with self._cond:
+            while not self._heap and not self._closed:
+                self._cond.wait()
+            if not self._heap:
+                return None
+            return heapq.heappop(self._heap)[2]
+
+    def _worker(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            if not self.is_running():
+                self._finish(job, False, None)
+                continue
+            with _global_slots.slot(self.job):
+                try:
+                    ok = self.download_func(job.url, job.file_path)
+                    self._finish(job, ok, None)
+                except Exception as e:
+                    self._finish(job, False, e)
+
+    def _finish(self, job, ok, error):
+        if self.on_done:
+            self.on_done(job, ok, error)
@@ -0,0 +1,403 @@
+import os
+import re
+import urllib.parse
+import threading
+from page_fetcher import PageFetcher
+from track_resolver import TrackResolver, DEFAULT_RESOLVE_WORKERS
+from album_parser import parse_album_page, find_download_link, ALBUM_PAGE_READY, TRACK_PAGE_READY
+from download_scheduler import (DownloadScheduler, DEFAULT_DOWNLOAD_WORKERS, set_slot_weight,
+                                forget_slot_weight, DEFAULT_WEIGHT)
+from bandwidth import get_bandwidth_limiter
+import file_transfer
+from file_transfer import DownloadStopped
+from download_index import DownloadIndex
+from integrity import AlbumManifest, StreamHasher, IntegrityError, check_flac
+from metadata_cache import MetadataCache, DEFAULT_TTL
+from stage_metrics import StageTimer
+from driver_pool import get_driver_pool
+from host_policy import call_with_retry
+from progress_events import LogMessage, FileStatus, FileProgress, TotalProgress, TotalFiles
+
+DRIVER_WAIT_TIMEOUT = 120  # 풀의 드라이버가 모두 사용 중일 때 기다리는 최대 시간(초)
+
+
+def sanitize_filename(filename):
+    # 윈도우에서 사용할 수 없는 특수문자 제거
+    # 파일/폴더명으로 사용할 수 없는 문자: \ / : * ? " < > |
+    sanitized = re.sub(r'[\\/:*?"<>|]', '_', filename)
+    # 연속된 공백과 언더스코어를 하나로 치환
+    sanitized = re.sub(r'[\s_]+', ' ', sanitized)
+    # 앞뒤 공백 제거
+    sanitized = sanitized.strip()
+    # 빈 문자열이면 기본값 사용
+    if not sanitized:
+        sanitized = "album"
+    return sanitized
+
+
+class DownloaderThread(threading.Thread):
+    def __init__(self, album_url, download_folder, progress_callback,
+                 resolve_workers=DEFAULT_RESOLVE_WORKERS,
+                 download_workers=DEFAULT_DOWNLOAD_WORKERS, verify_existing=False,
+                 cache_ttl=DEFAULT_TTL, preferred_format=None, verify_flac=False,
+                 weight=DEFAULT_WEIGHT):
+        super().__init__()
+        self.album_url = album_url
+        self.download_folder = download_folder
+        self.progress_callback = progress_callback
+        self.is_running = True
+        self.driver = None
+        self._driver_lock = threading.Lock()
+        self._cleanup_event = threading.Event()
+        self._is_driver_quit = False
+        self._is_cleaning_up = False
+        self.driver_pool = get_driver_pool()
+        self._pooled = None  # 풀에서 빌린 PooledDriver
+        self.timer = StageTimer(album_url)  # 단계별 시간 측정
+        self.fetcher = PageFetcher(driver_factory=self._get_driver, is_running=lambda: self.is_running)
+        self.fetcher.timer = self.timer
+        self.resolver = TrackResolver(self.fetcher, max_workers=resolve_workers, timer=self.timer)
+        self.download_workers = download_workers
+        self.verify_existing = verify_existing
+        self.index = None
+        self.manifest = None
+        self.verify_flac = verify_flac  # 받은 FLAC의 STREAMINFO 검사
+        self.cache = None
+        self.cache_ttl = cache_ttl
+        self.preferred_format = preferred_format  # None이면 FLAC 우선 자동 선택
+        self.status = None  # completed, stopped, failed
+        self.failed_files = 0
+        self.weight = weight  # 대역폭과 전체 다운로드 슬롯을 나눌 때의 가중치
+        self.bandwidth = get_bandwidth_limiter()
+        print(f"\n=== DownloaderThread 생성: {id(self)} ===")
+
+    def _get_driver(self):
+        """차단 응답을 받았을 때만 공유 풀에서 Chrome 드라이버를 빌림 (호출 한 번이 페이지 하나)"""
+        with self._driver_lock:
+            if self._pooled and self.driver_pool.needs_recycle(self._pooled):
+                # 오래 쓴 드라이버는 앨범 도중이라도 반납하고 새로 빌림
+                self.driver_pool.release(self._pooled)
+                self._pooled = None
+                self.driver = None
+            if self.driver:
+                self._pooled.pages += 1
+                return self.driver
+            if self._is_driver_quit or self._is_cleaning_up or not self.is_running:
+                return None
+            print(f"=== Chrome 드라이버 대여 시도: {id(self)} ===")
+            self.log("🌐 일반 요청이 차단되거나 실패해 Chrome 드라이버로 전환합니다...")
+            with self.timer.span('driver_start'):
+                self._pooled = self.driver_pool.acquire(timeout=DRIVER_WAIT_TIMEOUT)
+            if self._pooled is None:
+                print(f"=== Chrome 드라이버 대여 실패: {id(self)} ===")
+                return None
+            print(f"=== Chrome 드라이버 대여 완료: {id(self)} ===")
+            self.driver = self._pooled.driver
+            self._pooled.pages += 1
+            self._cleanup_event.clear()
+            return self.driver
+
+    def sanitize_filename(self, filename):
+        return sanitize_filename(filename)
+
+    def set_weight(self, weight):
+        """받는 도중에 가중치 변경 (대역폭 몫과 전체 슬롯 몫에 바로 적용)"""
+        self.weight = weight
+        self.bandwidth.set_weight(self, weight)
+        set_slot_weight(self, weight)
+
+    def throttle(self, nbytes):
+        self.bandwidth.throttle(self, nbytes, lambda: self.is_running)
+
+    def download_file(self, url, file_path):
+        file_name = os.path.basename(file_path)
+
+        # 색인에 완료 기록이 있고 파일이 그대로면 건너뜀
+        if self.index and self.index.is_complete(url, file_path):
+            if self.manifest and not self.manifest.get(file_path):
+                # 이전 버전에서 받은 파일은 색인의 해시로 목록에 추가
+                sha256 = self.index.lookup(url)['sha256']
+                self.manifest.add(file_path, url, {'sha256': sha256} if sha256 else {})
+            self.progress_callback(FileStatus(file_name, "건너뜀"))
+            return True
+
+        self.progress_callback(FileStatus(file_name, "다운로드 중"))
+
+        # .part 파일로 받고 완료 시 이름 변경 (남아 있는 .part 파일은 이어받기)
+        hasher = StreamHasher()
+
+        def transfer():
+            with self.timer.span('transfer', url) as span:
+                span['bytes'] = file_transfer.download(self.fetcher.session, url, file_path,
+                                       lambda: self.is_running,
+                                       lambda done, total: self.progress_callback(
+                                           FileProgress(file_name, done, total)),
+                                       timeout=self.fetcher.timeout, hasher=hasher,
+                                       timer=self.timer, throttle=self.throttle)
+
+        def on_retry(attempt, error, delay):
+            self.progress_callback(FileStatus(file_name, f"재시도 {attempt}"))
+            self.log(f"🔁 {file_name} - {str(error)} ({delay:.1f}초 후 재시도)")
+
+        # 일시적인 오류는 호스트 정책에 따라 백오프 후 재시도 (받은 부분은 이어받기)
+        try:
+            call_with_retry(url, transfer, lambda: self.is_running, on_retry, timer=self.timer)
+        except DownloadStopped:
+            self.progress_callback(FileStatus(file_name, "중단됨"))
+            return False
+        except Exception:
+            if self.is_running:
+                raise
+            # 재시도를 기다리는 중에 중지됨
+            self.progress_callback(FileStatus(file_name, "중단됨"))
+            return False
+
+        digests = hasher.hexdigests()
+        flac_md5 = None
+        if self.verify_flac and file_path.lower().endswith('.flac'):
+            try:
+                flac_md5 = check_flac(file_path)
+            except IntegrityError:
+                # 손상된 파일은 남기지 않아야 다음 실행 때 다시 받음
+                os.remove(file_path)
+                raise
+
+        if self.manifest:
+            self.manifest.add(file_path, url, digests, flac_md5)
+        if self.index:
+            self.index.record(url, file_path, sha256=digests.get('sha256'))
+        self.progress_callback(FileStatus(file_name, "완료"))
+        return True
+
+    def log(self, message):
+        """로그 메시지 이벤트 전달"""
+        self.progress_callback(LogMessage(message))
+
+    def create_subfolder(self, base_folder, subfolder_name):
+        # 폴더명 정리
+        safe_name = self.sanitize_filename(subfolder_name)
+        folder_path = os.path.join(base_folder, safe_name)
+        os.makedirs(folder_path, exist_ok=True)
+        return folder_path
+
+    def quit_driver(self, discard=False):
+        """빌린 드라이버를 풀에 반납 (discard면 진행 중인 페이지 로드를 끊도록 종료)"""
+        if self._is_cleaning_up:
+            print(f"=== 드라이버 정리 중복 방지: {id(self)} ===")
+            return
+
+        with self._driver_lock:
+            if self._pooled and not self._is_driver_quit:
+                self._is_cleaning_up = True
+                try:
+                    if discard:
+                        self.log("🔄 Chrome 드라이버 종료 중...")
+                    print(f"=== 드라이버 반납 시작: {id(self)} ===")
+                    self.driver_pool.release(self._pooled, discard=discard)
+                    if discard:
+                        self.log("✅ Chrome 드라이버 종료 완료")
+                    self._is_driver_quit = True
+                except Exception as e:
+                    self.log(f"❌ 드라이버 반납 중 오류 발생: {str(e)}")
+                    print(f"=== 드라이버 반납 중 예외 발생: {id(self)} - {str(e)} ===")
+                finally:
+                    self._pooled = None
+                    self.driver = None
+                    self._cleanup_event.set()
+                    self._is_cleaning_up = False
+            else:
+                # 드라이버를 빌리지 않은 경우 바로 정리 완료 처리
+                self._cleanup_event.set()
+
+    def stop(self):
+        """다운로드를 중지하고 리소스를 정리하는 메서드"""
+        if not self.is_running:
+            return
+            
+        self.is_running = False
+        # 사용 중인 페이지 로드를 바로 끊기 위해 풀에 돌려주지 않고 종료
+        self.quit_driver(discard=True)
+        
+        try:
+            self._cleanup_event.wait(timeout=2.0)
+        except Exception as e:
+            print(f"정리 대기 중 오류 발생: {str(e)}")
+
+    def __del__(self):
+        """객체 소멸 시 리소스 정리"""
+        print(f"\n=== DownloaderThread 소멸 시작: {id(self)} ===")
+        if not self._is_cleaning_up:
+            print(f"=== DownloaderThread stop() 호출: {id(self)} ===")
+            self.stop()
+        print(f"=== DownloaderThread 소멸 완료: {id(self)} ===\n")
+
+    def _load_album(self):
+        """앨범 페이지를 불러와 파싱 (캐시에 있으면 네트워크 요청 없이 사용)"""
+        album = self.cache.get(f"album:{self.album_url}") if self.cache else None
+        if album:
+            self.log("⚡ 캐시된 앨범 정보를 사용합니다.")
+            return album
+
+        # 앨범 페이지 접속 (차단 시에만 Chrome 사용)
+        album_html = self.fetcher.fetch(self.album_url, ready=ALBUM_PAGE_READY)
+
+        # 페이지를 한 번만 훑어 제목, 카탈로그 번호, 이미지, 트랙 링크 추출
+        with self.timer.span('parse', self.album_url):
+            page = parse_album_page(album_html, self.album_url)
+        if not page:
+            return None
+        track_links = page.tracks
+
+        # 첫 번째 트랙으로 FLAC 가용성 확인
+        formats = ["MP3"]
+        if track_links:
+            if find_download_link(self.fetcher.fetch(track_links[0], ready=TRACK_PAGE_READY), "FLAC"):
+                formats.append("FLAC")
+
+        album = {
+            'title': page.title,
+            'catalog': page.catalog,
+            'images': page.images,
+            'tracks': page.tracks,
+            'formats': formats,
+        }
+        if self.cache:
+            self.cache.put(f"album:{self.album_url}", album)
+        return album
+
+    def run(self):
+        try:
+            print(f"\n=== DownloaderThread 실행 시작: {id(self)} ===")
+            self.bandwidth.register(self, self.weight)
+            set_slot_weight(self, self.weight)
+            # 이미 받은 파일 색인 (다운로드 루트에 저장)
+            self.index = DownloadIndex(self.download_folder, verify=self.verify_existing)
+
+            # 파싱한 앨범/트랙 정보 캐시
+            self.cache = MetadataCache(self.download_folder, ttl=self.cache_ttl)
+            self.resolver.cache = self.cache
+
+            album = self._load_album()
+            if not album:
+                self.log("⚠️ 앨범 제목을 찾을 수 없습니다.")
+                self.status = 'failed'
+                return
+
+            album_name = album['title']
+            catalog_text = album['catalog']
+            image_links = album['images']
+            track_links = album['tracks']
+            file_type = "FLAC" if "FLAC" in album['formats'] else "MP3"
+            if self.preferred_format in album['formats']:
+                file_type = self.preferred_format
+            elif self.preferred_format:
+                self.log(f"⚠️ {self.preferred_format} 형식이 없어 {file_type} 형식으로 받습니다.")
+            self.log(f"💿 앨범 제목: {album_name}")
+
+            # 앨범 폴더 생성
+            if catalog_text:
+                self.log(f"📀 카탈로그 번호: {catalog_text}")
+                folder_name = f"{{{catalog_text}}} {album_name} [{file_type}]"
+            else:
+                self.log("⚠️ 카탈로그 번호를 찾을 수 없습니다.")
+                folder_name = f"{album_name} [{file_type}]"
+
+            album_folder = self.create_subfolder(self.download_folder, folder_name)
+            self.log(f"📁 저장 폴더: {os.path.basename(album_folder)}")
+            # 파일별 크기와 해시 목록 (앨범 폴더에 저장)
+            self.manifest = AlbumManifest(album_folder)
+
+            # 전체 파일 개수 계산
+            total_files = len(image_links) + len(track_links)
+            progress_lock = threading.Lock()
+            current_file = 0
+            
+            # 진행 상황 출력
+            self.log(f"\n🖼️ {len(image_links)}개의 앨범 커버 이미지를 찾았습니다.")
+            self.log(f"🔍 총 {len(track_links)}개의 {file_type} 트랙을 찾았습니다.")
+            self.log(f"📥 총 {total_files}개 파일 다운로드를 시작합니다...\n")
+            self.progress_callback(TotalFiles(total_files))  # 전체 파일 수 보고
+
+            def on_file_done(job, ok, error):
+                nonlocal current_file
+                file_name = os.path.basename(job.file_path)
+                if error:
+                    with progress_lock:
+                        self.failed_files += 1
+                    self.progress_callback(FileStatus(file_name, "실패"))
+                    self.log(f"❌ 다운로드 실패: {file_name} - {str(error)}")
+                elif not ok:
+                    self.progress_callback(FileStatus(file_name, "중단됨"))
+                else:
+                    with progress_lock:
+                        current_file += 1
+                        total_progress = (current_file / total_files) * 100
+                    self.progress_callback(TotalProgress(round(total_progress, 1)))
+
+            # 여러 파일을 동시에 받는 스케줄러 (큰 파일부터 시작)
+            scheduler = DownloadScheduler(self.download_file, max_workers=self.download_workers,
+                                          on_done=on_file_done,
+                                          is_running=lambda: self.is_running, job=self).start()
+            try:
+                # 이미지 다운로드
+                if image_links:
+                    images_folder = self.create_subfolder(album_folder, "Scans")
+                    for img_url in image_links:
+                        file_name = os.path.basename(urllib.parse.unquote(img_url.split('?')[0]))
+                        file_path = os.path.join(images_folder, file_name)
+                        self.progress_callback(FileStatus(file_name, "대기 중"))
+                        scheduler.submit(img_url, file_path)
+
+                # 음원 다운로드 (트랙 페이지는 스레드 풀에서 동시에 해석)
+                resolved = self.resolver.resolve(track_links, file_type, lambda: self.is_running)
+                for idx, track_url, download_link, size, error in resolved:
+                    if error:
+                        self.log(f"[{idx}/{len(track_links)}] ⚠️ 트랙 페이지 로드 실패: {str(error)}")
+
+                    if not download_link:
+                        with progress_lock:
+                            self.failed_files += 1
+                        self.progress_callback(FileStatus(f"트랙 {idx}", "실패"))
+                        self.log(f"[{idx}/{len(track_links)}] ❌ 다운로드 가능한 파일을 찾을 수 없습니다.")
+                        continue
+
+                    file_name = os.path.basename(download_link)
+                    file_name = urllib.parse.unquote(file_name)
+                    file_path = os.path.join(album_folder, file_name)
+
+                    self.progress_callback(FileStatus(file_name, "대기 중"))
+                    scheduler.submit(download_link, file_path, size_hint=size)
+            finally:
+                scheduler.join()
+
+            if not self.is_running:
+                self.status = 'stopped'
+                return
+
+            self.progress_callback(TotalProgress(100.0))
+            self.log("\n✨ 모든 다운로드가 완료되었습니다!")
+            self.status = 'completed'
+            if not self.failed_files:
+                self.index.record_album(self.album_url, album_folder, total_files)
+
+        except Exception as e:
+            self.status = 'failed'
+            self.log(f"❌ 오류 발생: {str(e)}")
+            print(f"=== DownloaderThread 실행 중 예외 발생: {id(self)} - {str(e)} ===")
+        finally:
+            print(f"=== DownloaderThread 실행 종료: {id(self)} ===")
+            self.bandwidth.unregister(self)
+            forget_slot_weight(self)
+            for line in self.timer.finish():
+                self.log(line)
+            self.fetcher.close()
+            if self.index:
+                self.index.close()
+            if self.cache:
+                self.cache.close()
+            self.quit_driver()
+            try:
+                self._cleanup_event.wait(timeout=2.0)
+                print(f"=== 정리 이벤트 대기 완료: {id(self)} ===")
+            except Exception as e:
+                print(f"=== 정리 이벤트 대기 실패: {id(self)} - {str(e)} ===")
@@ -0,0 +1,229 @@
+import time
+import threading
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+DEFAULT_POOL_SIZE = 2
+DEFAULT_MAX_PAGES = 300
+DEFAULT_MAX_RSS_MB = 1500
+DEFAULT_SPARE = 1
+
+
+def create_chrome():
+    """헤드리스 Chrome 드라이버 생성 (Chrome이 필요할 때만 불러옴)"""
+    from chrome_driver import SafeChrome, create_driver_options
+    return SafeChrome(options=create_driver_options())
+
+
+def quit_driver(driver):
+    """열린 탭을 모두 닫고 드라이버 종료 (오류는 무시)"""
+    try:
+        for handle in list(getattr(driver, 'window_handles', [])):
+            try:
+                driver.switch_to.window(handle)
+                driver.close()
+            except Exception:
+                pass
+        driver.quit()
+    except Exception as e:
+        print(f"=== 드라이버 종료 중 오류: {str(e)} ===")
+
+
+def driver_rss_mb(driver):
+    """드라이버가 띄운 Chrome 프로세스들의 메모리 합계(MB), 확인할 수 없으면 None"""
+    if psutil is None:
+        return None
+    pid = getattr(driver, 'browser_pid', None)
+    if pid is None:
+        process = getattr(getattr(driver, 'service', None), 'process', None)
+        pid = getattr(process, 'pid', None)
+    if pid is None:
+        return None
+    try:
+        root = psutil.Process(pid)
+        processes = [root] + root.children(recursive=True)
+        return sum(p.memory_info().rss for p in processes) / 1024 / 1024
+    except psutil.Error:
+        return None
+
+
+class PooledDriver:
+    """풀에서 빌려준 드라이버와 사용 기록"""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+        self.created_at = time.monotonic()
+
+
+class DriverPool:
+    """여러 앨범이 돌려 쓰는 Chrome 드라이버 풀
+
+    처음 드라이버를 요청하면 하나를 만들어 빌려주고, 다음 앨범이 기다리지
+    않도록 spare개를 백그라운드에서 미리 띄워 둡니다. 반납된 드라이버는
+    응답이 없거나 max_pages 페이지를 넘었거나 메모리가 max_rss_mb를 넘으면
+    종료하고 새로 만듭니다. close()는 프로그램 종료 시 한 번만 호출합니다.
+    """
+
+    def __init__(self, size=DEFAULT_POOL_SIZE, max_pages=DEFAULT_MAX_PAGES,
+                 max_rss_mb=DEFAULT_MAX_RSS_MB, spare=DEFAULT_SPARE, factory=create_chrome):
+        self.size = max(1, size)
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self.spare = spare
+        self.factory = factory
+        self._cond = threading.Condition()
+        self._idle = []
+        self._count = 0  # 빌려준 것 + 대기 중 + 만드는 중인 드라이버 수
+        self._warming = 0
+        self._closed = False
+
+    def resize(self, size):
+        with self._cond:
+            self.size = max(1, int(size))
+            self._cond.notify_all()
+
+    def acquire(self, timeout=None):
+        """드라이버 하나를 빌림 (모두 사용 중이면 반납될 때까지 대기, 실패 시 None)"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._cond:
+                while True:
+                    if self._closed:
+                        return None
+                    if self._idle:
+                        pooled = self._idle.pop()
+                        break
+                    if self._count < self.size:
+                        self._count += 1
+                        pooled = None
+                        break
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        return None
+                    self._cond.wait(remaining)
+            if pooled is None:
+                break
+
+            # 응답 확인은 잠금 밖에서 (멈춘 드라이버가 다른 앨범의 반납/대기를 막지 않도록)
+            healthy = self._is_healthy(pooled)
+            with self._cond:
+                if healthy and not self._closed:
+                    self._start_spares()
+                    return pooled
+                self._discard(pooled)
+
+        pooled = self._create()
+        if pooled:
+            with self._cond:
+                self._start_spares()
+        return pooled
+
+    def release(self, pooled, discard=False):
+        """빌린 드라이버 반납 (discard이거나 오래 쓴 드라이버는 종료)"""
+        # 메모리 확인도 드라이버 프로세스를 조회하므로 잠금 밖에서
+        recycle = discard or self.needs_recycle(pooled)
+        with self._cond:
+            if not recycle and not self._closed and self._count <= self.size:
+                self._idle.append(pooled)
+                self._cond.notify()
+                return
+            self._count -= 1
+            self._cond.notify()
+        print(f"=== 풀 드라이버 교체 (페이지 {pooled.pages}개 사용) ===")
+        quit_driver(pooled.driver)
+
+    def needs_recycle(self, pooled):
+        if self.max_pages and pooled.pages >= self.max_pages:
+            return True
+        if self.max_rss_mb:
+            rss = driver_rss_mb(pooled.driver)
+            if rss is not None and rss > self.max_rss_mb:
+                return True
+        return False
+
+    def close(self):
+        """대기 중인 드라이버를 모두 종료 (빌려준 드라이버는 반납될 때 종료)"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._count -= len(idle)
+            self._cond.notify_all()
+        for pooled in idle:
+            quit_driver(pooled.driver)
+
+    def _create(self):
+        """드라이버 생성 (실패하면 자리를 돌려주고 None)"""
+        try:
+            print("=== 풀 드라이버 생성 ===")
+            return PooledDriver(self.factory())
+        except Exception as e:
+            print(f"=== 풀 드라이버 생성 실패: {str(e)} ===")
+            with self._cond:
+                self._count -= 1
+                self._cond.notify()
+            return None
+
+    def _start_spares(self):
+        """다음 요청에 바로 줄 수 있도록 여분 드라이버를 백그라운드에서 생성 (_cond 보유 중 호출)"""
+        while len(self._idle) + self._warming < self.spare and self._count < self.size:
+            self._count += 1
+            self._warming += 1
+            threading.Thread(target=self._warm_one, name="driver-warmup", daemon=True).start()
+
+    def _warm_one(self):
+        pooled = self._create()
+        with self._cond:
+            self._warming -= 1
+            if pooled is None:
+                return
+            if self._closed:
+                self._count -= 1
+            else:
+                self._idle.append(pooled)
+                self._cond.notify()
+                return
+        quit_driver(pooled.driver)
+
+    def _is_healthy(self, pooled):
+        """간단한 명령으로 드라이버가 응답하는지 확인"""
+        try:
+            pooled.driver.current_url
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, pooled):
+        """응답하지 않는 드라이버 제거 (_cond 보유 중 호출)"""
+        self._count -= 1
+        threading.Thread(target=quit_driver, args=(pooled.driver,), daemon=True).start()
+
+
+# 모든 앨범(스레드)이 공유하는 드라이버 풀
+_shared_pool = None
+_shared_lock = threading.Lock()
+
+
+def get_driver_pool():
+    global _shared_pool
+    with _shared_lock:
+        if _shared_pool is None:
+            _shared_pool = DriverPool()
+        return _shared_pool
+
+
+def set_driver_pool_size(size):
+    """공유 드라이버 풀의 최대 크기 변경 (보통 동시 앨범 수와 같게)"""
+    get_driver_pool().resize(size)
+
+
+def shutdown_driver_pool():
+    """프로그램 종료 시 공유 풀의 드라이버를 모두 종료"""
+    global _shared_pool
+    with _shared_lock:
+        pool, _shared_pool = _shared_pool, None
+    if pool:
+        pool.close()
@@ -0,0 +1,347 @@
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from urllib3.exceptions import ProtocolError, ReadTimeoutError, DecodeError
+from stage_metrics import maybe_span
+
+# 읽기 크기는 관측한 속도에 맞춰 이 범위에서 조절 (초당 읽기 횟수를 일정하게 유지)
+MIN_CHUNK_SIZE = 16 * 1024
+MAX_CHUNK_SIZE = 1024 * 1024
+INITIAL_CHUNK_SIZE = 64 * 1024
+TARGET_READS_PER_SECOND = 50
+CHUNK_ADJUST_INTERVAL = 0.25
+# 한 스트림으로 받을 때 파일 쓰기 버퍼 크기
+WRITE_BUFFER_SIZE = 1024 * 1024
+# 완료한 파일을 최종 이름으로 바꾸기 전에 fsync
+FSYNC_ON_FINALIZE = True
+
+# 이 크기 이상이고 서버가 Range 요청을 지원하면 여러 구간으로 나눠 받음
+SEGMENT_THRESHOLD = 32 * 1024 * 1024
+DEFAULT_SEGMENTS = 4
+MIN_SEGMENT_SIZE = 8 * 1024 * 1024
+
+# 받는 중인 파일과 이어받기 정보 파일 확장자
+PART_SUFFIX = ".part"
+META_SUFFIX = ".part.json"
+# 구간 다운로드 진행 상황을 사이드카에 기록하는 간격
+CHECKPOINT_BYTES = 4 * 1024 * 1024
+
+
+class DownloadStopped(Exception):
+    """사용자가 다운로드를 중지함"""
+
+
+class PartChanged(Exception):
+    """서버 파일이 바뀌어 받던 .part 파일을 이어받을 수 없음"""
+
+
+class ChunkSizer:
+    """관측한 속도에 맞춰 한 번에 읽을 크기를 조절
+
+    빠른 연결에서는 읽기 크기를 키워 파이썬 반복과 시스템 호출 수를 줄이고,
+    느린 연결에서는 작게 유지해 진행률 갱신과 중지 요청이 늦어지지 않게 합니다.
+    크기는 2의 거듭제곱으로 맞춰 버퍼 경계에 정렬되도록 합니다.
+    """
+
+    def __init__(self, initial=INITIAL_CHUNK_SIZE, minimum=MIN_CHUNK_SIZE,
+                 maximum=MAX_CHUNK_SIZE, reads_per_second=TARGET_READS_PER_SECOND):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.reads_per_second = reads_per_second
+        self.size = max(minimum, min(initial, maximum))
+        self._window_start = time.monotonic()
+        self._window_bytes = 0
+
+    def record(self, nbytes):
+        """읽은 바이트 수를 기록하고 구간마다 읽기 크기 재계산"""
+        self._window_bytes += nbytes
+        now = time.monotonic()
+        elapsed = now - self._window_start
+        if elapsed < CHUNK_ADJUST_INTERVAL:
+            return
+        wanted = self._window_bytes / elapsed / self.reads_per_second
+        size = self.minimum
+        while size < wanted and size < self.maximum:
+            size *= 2
+        self.size = size
+        self._window_start = now
+        self._window_bytes = 0
+
+
+def iter_chunks(response, sizer=None):
+    """응답 본문을 sizer가 정한 크기로 읽어서 반환 (iter_content와 같은 예외 변환)"""
+    sizer = sizer or ChunkSizer()
+    raw = response.raw
+    while True:
+        try:
+            chunk = raw.read(sizer.size, decode_content=True)
+        except ProtocolError as e:
+            raise requests.exceptions.ChunkedEncodingError(e)
+        except DecodeError as e:
+            raise requests.exceptions.ContentDecodingError(e)
+        except ReadTimeoutError as e:
+            raise requests.exceptions.ConnectionError(e)
+        if not chunk:
+            return
+        sizer.record(len(chunk))
+        yield chunk
+
+
+def supports_ranges(response):
+    """응답 헤더로 Range 요청 지원 여부 확인"""
+    return response.headers.get('accept-ranges', '').lower() == 'bytes'
+
+
+def should_segment(total_size, response, threshold=SEGMENT_THRESHOLD):
+    return total_size >= threshold and supports_ranges(response)
+
+
+def split_ranges(total_size, segments=DEFAULT_SEGMENTS, min_segment_size=MIN_SEGMENT_SIZE):
+    """전체 크기를 (시작, 끝) 바이트 구간 목록으로 분할 (끝 포함)"""
+    count = max(1, min(segments, total_size // max(1, min_segment_size)))
+    step = -(-total_size // count)
+    return [(start, min(start + step, total_size) - 1) for start in range(0, total_size, step)]
+
+
+def verify_size(file_path, expected_size):
+    """기록된 파일 크기가 예상 크기와 같은지 확인"""
+    actual = os.path.getsize(file_path)
+    if expected_size and actual != expected_size:
+        raise IOError(f"파일 크기 불일치: {actual} / {expected_size} bytes")
+
+
+def load_part_meta(file_path):
+    """이어받기 정보 읽기 (없거나 손상되면 None)"""
+    try:
+        with open(file_path + META_SUFFIX, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_part_meta(file_path, meta):
+    """이어받기 정보를 임시 파일에 쓴 뒤 교체해 원자적으로 저장"""
+    meta_path = file_path + META_SUFFIX
+    tmp_path = meta_path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(meta, f, ensure_ascii=False)
+    os.replace(tmp_path, meta_path)
+
+
+def discard_part(file_path):
+    """받던 .part 파일과 이어받기 정보 삭제"""
+    for path in (file_path + PART_SUFFIX, file_path + META_SUFFIX):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def finalize_part(file_path, expected_size, timer=None):
+    """크기를 확인하고 디스크에 기록한 뒤 .part 파일을 최종 파일명으로 원자적으로 교체"""
+    part_path = file_path + PART_SUFFIX
+    verify_size(part_path, expected_size)
+    if FSYNC_ON_FINALIZE:
+        # 이름을 바꾸기 전에 내용을 디스크에 써야 정전 후에도 빈 파일이 남지 않음
+        with maybe_span(timer, 'fsync'), open(part_path, "rb+") as f:
+            os.fsync(f.fileno())
+    os.replace(part_path, file_path)
+    try:
+        os.remove(file_path + META_SUFFIX)
+    except FileNotFoundError:
+        pass
+
+
+def validator_headers(meta):
+    """서버 파일이 그대로일 때만 Range가 적용되도록 If-Range 헤더 구성"""
+    validator = meta.get('etag') or meta.get('last_modified')
+    return {'If-Range': validator} if validator else {}
+
+
+def new_part_meta(url, total_size, response):
+    return {
+        'url': url,
+        'size': total_size,
+        'etag': response.headers.get('etag'),
+        'last_modified': response.headers.get('last-modified'),
+    }
+
+
+def download(session, url, file_path, is_running, on_progress=None, timeout=30,
+             segments=DEFAULT_SEGMENTS, hasher=None, timer=None, throttle=None):
+    """url을 file_path로 다운로드 (.part 파일로 받고 완료 시 이름 변경)
+
+    이전에 받다 만 .part 파일과 이어받기 정보가 있으면 Range 요청으로 이어서
+    받습니다. 중지하면 DownloadStopped를 던지고 .part 파일은 남겨둡니다.
+    hasher(integrity.StreamHasher)를 주면 받는 바이트로 해시를 함께 계산하고,
+    timer(stage_metrics.StageTimer)를 주면 fsync 시간을 기록합니다.
+    throttle(바이트 수)는 청크를 받을 때마다 호출되며 대역폭 제한만큼 대기합니다.
+    이번 호출에서 네트워크로 받은 바이트 수를 반환합니다.
+    """
+    meta = load_part_meta(file_path)
+    part_path = file_path + PART_SUFFIX
+    if meta and (meta.get('url') != url or not os.path.exists(part_path)):
+        discard_part(file_path)
+        meta = None
+
+    if meta and meta.get('segments'):
+        try:
+            return download_segmented(session, url, file_path, meta, is_running, on_progress,
+                                      timeout, hasher, timer, throttle)
+        except PartChanged:
+            discard_part(file_path)
+            meta = None
+
+    headers = {}
+    offset = 0
+    if meta:
+        offset = os.path.getsize(part_path)
+        if meta.get('size') and offset == meta['size']:
+            if hasher:
+                hasher.catch_up(part_path, offset)
+            finalize_part(file_path, meta['size'], timer)
+            return 0
+        headers['Range'] = f'bytes={offset}-'
+        headers.update(validator_headers(meta))
+
+    response = session.get(url, headers=headers, stream=True, timeout=timeout)
+    if response.status_code == 416:
+        # 이어받을 구간이 없음 - 처음부터 다시 받기
+        response.close()
+        discard_part(file_path)
+        offset = 0
+        response = session.get(url, stream=True, timeout=timeout)
+    response.raise_for_status()
+
+    length = int(response.headers.get('content-length', 0))
+    if offset and response.status_code == 206:
+        total_size = offset + length if length else meta.get('size', 0)
+        mode = "ab"
+        if hasher:
+            # 이미 받은 앞부분만 읽어서 해시를 맞춘 뒤 이어서 계산
+            hasher.catch_up(part_path, offset)
+    else:
+        offset = 0
+        total_size = length
+        mode = "wb"
+        meta = new_part_meta(url, total_size, response)
+        if hasher:
+            hasher.reset()
+
+        # 큰 파일은 Range 요청으로 나눠서 병렬 다운로드
+        if should_segment(total_size, response):
+            response.close()
+            meta['segments'] = [[start, end, 0] for start, end in split_ranges(total_size, segments)]
+            with open(part_path, "wb") as f:
+                f.truncate(total_size)
+            save_part_meta(file_path, meta)
+            return download_segmented(session, url, file_path, meta, is_running, on_progress,
+                                      timeout, hasher, timer, throttle)
+        save_part_meta(file_path, meta)
+
+    downloaded = offset
+    with response, open(part_path, mode, buffering=WRITE_BUFFER_SIZE) as f:
+        for chunk in iter_chunks(response):
+            if not is_running():
+                raise DownloadStopped()
+            if chunk:
+                downloaded += len(chunk)
+                f.write(chunk)
+                if hasher:
+                    hasher.update(chunk)
+                if on_progress and total_size:
+                    on_progress(downloaded, total_size)
+                if throttle:
+                    throttle(len(chunk))
+
+    finalize_part(file_path, total_size, timer)
+    return downloaded - offset
+
+
+def download_segmented(session, url, file_path, meta, is_running, on_progress=None, timeout=30,
+                       hasher=None, timer=None, throttle=None):
+    """Range 요청으로 구간별 병렬 다운로드 후 미리 할당한 .part 파일의 위치에 기록
+
+    meta['segments']의 [시작, 끝, 받은 바이트] 목록을 주기적으로 저장하므로
+    중지 후 다시 호출하면 각 구간의 남은 부분만 받습니다. 해시는 순서대로
+    도착하는 첫 구간에서 계산하고, 나머지 구간은 모두 받은 뒤 디스크에서 읽습니다.
+    """
+    part_path = file_path + PART_SUFFIX
+    total_size = meta['size']
+    seg_list = meta['segments']
+    validator = validator_headers(meta)
+    lock = threading.Lock()
+    failed = threading.Event()
+    downloaded = sum(seg[2] for seg in seg_list)
+    resuming = downloaded > 0
+    already_downloaded = downloaded
+    last_checkpoint = downloaded
+
+    def checkpoint():
+        with lock:
+            save_part_meta(file_path, meta)
+
+    def fetch_range(seg):
+        nonlocal downloaded, last_checkpoint
+        start, end, done = seg
+        if start + done > end:
+            return
+        headers = {'Range': f'bytes={start + done}-{end}'}
+        headers.update(validator)
+        with session.get(url, headers=headers, stream=True, timeout=timeout) as response:
+            if response.status_code >= 400:
+                response.raise_for_status()
+            if response.status_code == 200 and resuming:
+                raise PartChanged()
+            if response.status_code != 206:
+                raise IOError(f"Range 요청이 거부되었습니다 (HTTP {response.status_code})")
+            # 첫 구간만 파일 순서대로 도착하므로 받는 중에 해시 계산
+            seg_hasher = hasher if hasher and start == 0 else None
+            if seg_hasher:
+                seg_hasher.catch_up(part_path, done)
+            # 구간마다 별도 파일 핸들로 자기 위치에 기록 (버퍼 없이 바로 OS에 전달)
+            with open(part_path, "r+b", buffering=0) as f:
+                f.seek(start + done)
+                for chunk in iter_chunks(response):
+                    if not is_running() or failed.is_set():
+                        raise DownloadStopped()
+                    if chunk:
+                        f.write(chunk)
+                        if seg_hasher:
+                            seg_hasher.update(chunk)
+                        with lock:
+                            seg[2] += len(chunk)
+                            downloaded += len(chunk)
+                            current = downloaded
+                            save_now = current - last_checkpoint >= CHECKPOINT_BYTES
+                            if save_now:
+                                last_checkpoint = current
+                        if save_now:
+                            checkpoint()
+                        if on_progress:
+                            on_progress(current, total_size)
+                        if throttle:
+                            throttle(len(chunk))
+
+    try:
+        with ThreadPoolExecutor(max_workers=len(seg_list), thread_name_prefix="segment") as executor:
+            futures = [executor.submit(fetch_range, seg) for seg in seg_list]
+            try:
+                for future in futures:
+                    future.result()
+            except BaseException:
+                # 한 구간이 실패하면 나머지 구간도 멈춤
+                failed.set()
+                raise
+    finally:
+        if os.path.exists(part_path):
+            checkpoint()
+
+    if hasher:
+        hasher.catch_up(part_path, total_size)
+    finalize_part(file_path, total_size, timer)
+    return downloaded - already_downloaded
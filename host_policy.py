@@ -0,0 +1,358 @@
+import time
+import random
+import asyncio
+import threading
+import contextlib
+import urllib.parse
+import email.utils
+from collections import deque
+
+import requests
+import stage_metrics
+
+# 호스트별 초당 요청 수 (처음 값, 하한, 상한)와 버스트 크기
+INITIAL_RATE = 8.0
+MIN_RATE = 0.5
+MAX_RATE = 50.0
+BURST = 16
+# 호스트별 동시 요청 수 (처음 값, 하한, 상한)
+INITIAL_CONCURRENCY = 16
+MIN_CONCURRENCY = 1
+MAX_CONCURRENCY = 64
+# 첫 감소 전(slow start)에는 성공할 때마다 초당 요청 수를 이 비율만큼, 이후에는 RATE_STEP씩 늘림
+SLOW_START_GROWTH = 0.1
+RATE_STEP = 0.1
+# 최근 오류 비율(지수 이동 평균)이 이 값을 넘으면 줄임, 줄이는 비율, 연속 감소를 막는 간격(초)
+ERROR_EWMA_WEIGHT = 0.1
+ERROR_RATE_THRESHOLD = 0.25
+DECREASE_FACTOR = 0.5
+DECREASE_COOLDOWN = 2.0
+
+# 재시도 횟수와 지수 백오프 (base * 2^시도, 최대 cap초, full jitter)
+DEFAULT_MAX_ATTEMPTS = 5
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 30.0
+RETRY_AFTER_CAP = 120.0
+
+# 오류 종류: 재시도 여부와 호스트 속도를 줄일지 여부
+THROTTLED = 'throttled'    # 429/503 - 서버가 속도를 줄이라고 알림
+SERVER_ERROR = 'server'    # 그 밖의 5xx, 408
+NETWORK_ERROR = 'network'  # 연결 실패, 시간 초과, 전송 중 끊김
+CLIENT_ERROR = 'client'    # 4xx - 다시 요청해도 결과가 같음
+OTHER_ERROR = 'other'
+RETRYABLE = (THROTTLED, SERVER_ERROR, NETWORK_ERROR)
+THROTTLE_STATUS_CODES = (429, 503)
+
+
+def host_of(url):
+    return urllib.parse.urlsplit(url).netloc if url else ''
+
+
+def parse_retry_after(value):
+    """Retry-After 헤더(초 또는 HTTP 날짜)를 초로 변환 (없거나 잘못되면 None)"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return min(float(value), RETRY_AFTER_CAP)
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, min(when.timestamp() - time.time(), RETRY_AFTER_CAP))
+
+
+def classify_status(status_code):
+    if status_code in THROTTLE_STATUS_CODES:
+        return THROTTLED
+    if status_code >= 500 or status_code == 408:
+        return SERVER_ERROR
+    if status_code >= 400:
+        return CLIENT_ERROR
+    return None
+
+
+def classify_error(error):
+    """예외를 (오류 종류, Retry-After 초) 로 분류"""
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        response = error.response
+        return (classify_status(response.status_code) or OTHER_ERROR,
+                parse_retry_after(response.headers.get('retry-after')))
+    if isinstance(error, (requests.ConnectionError, requests.Timeout,
+                          requests.exceptions.ChunkedEncodingError,
+                          requests.exceptions.ContentDecodingError)):
+        return NETWORK_ERROR, None
+    return OTHER_ERROR, None
+
+
+def _wake(future):
+    if not future.done():
+        future.set_result(None)
+
+
+def backoff_delay(attempt, retry_after=None, base=BACKOFF_BASE, cap=BACKOFF_CAP):
+    """attempt번째 재시도 전 대기 시간 (Retry-After가 있으면 그 이상 대기)"""
+    delay = random.uniform(0, min(cap, base * (2 ** attempt)))
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+class HostPolicy:
+    """호스트 하나에 대한 토큰 버킷 속도 제한과 AIMD 동시 요청 수 조절
+
+    요청을 시작할 때마다 토큰을 하나 쓰고, 동시에 진행 중인 요청 수는
+    limit을 넘지 않게 합니다. 성공하면 속도와 limit을 조금씩(가산) 올리고
+    (처음 줄이기 전까지는 빠르게), 429/503을 받거나 최근 오류 비율이
+    ERROR_RATE_THRESHOLD를 넘으면 절반으로(승산) 줄입니다. 가끔 나는 오류는
+    재시도로만 처리하고, 한 번의 장애로 여러 요청이 동시에 실패해도
+    DECREASE_COOLDOWN 안에서는 한 번만 줄입니다. 스레드는 slot(), 코루틴은
+    async_slot()을 쓰며 두 방식이 같은 상태를 공유합니다.
+    """
+
+    def __init__(self, host, rate=INITIAL_RATE, max_rate=MAX_RATE,
+                 concurrency=INITIAL_CONCURRENCY, max_concurrency=MAX_CONCURRENCY):
+        self.host = host
+        self.max_rate = max_rate
+        self.rate = min(rate, max_rate)
+        self.max_concurrency = max_concurrency
+        self.limit = float(min(concurrency, max_concurrency))
+        self.active = 0
+        self.successes = 0
+        self.failures = 0
+        self.error_rate = 0.0
+        self._slow_start = True
+        self._tokens = float(BURST)
+        self._last_fill = time.monotonic()
+        self._last_decrease = 0.0
+        self._paused_until = 0.0
+        self._cond = threading.Condition()
+        self._async_waiters = deque()  # async_slot()에서 기다리는 (루프, future)
+
+    def _refill(self, now):
+        self._tokens = min(BURST, self._tokens + (now - self._last_fill) * self.rate)
+        self._last_fill = now
+
+    def _try_enter(self, is_running):
+        """자리를 얻으면 None, 아니면 기다릴 시간(초) 반환 (_cond 보유 중 호출, 중지되면 바로 들어감)"""
+        if is_running():
+            now = time.monotonic()
+            self._refill(now)
+            if now < self._paused_until:
+                return self._paused_until - now
+            if self.active >= int(self.limit):
+                return 0.5
+            if self._tokens < 1:
+                return (1 - self._tokens) / self.rate
+            self._tokens -= 1
+        self.active += 1
+        return None
+
+    def _notify(self):
+        """기다리는 스레드 하나와 코루틴 하나를 깨움 (_cond 보유 중 호출)"""
+        self._cond.notify()
+        while self._async_waiters:
+            loop, future = self._async_waiters.popleft()
+            if not future.done():
+                loop.call_soon_threadsafe(_wake, future)
+                break
+
+    @contextlib.contextmanager
+    def slot(self, is_running=lambda: True):
+        """토큰과 동시 요청 자리를 얻을 때까지 대기 (중지되면 기다리지 않고 바로 진행)"""
+        with self._cond:
+            wait = self._try_enter(is_running)
+            while wait is not None:
+                # 중지 요청을 놓치지 않도록 길게 잠들지 않음
+                self._cond.wait(min(wait, 0.5))
+                wait = self._try_enter(is_running)
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.active -= 1
+                self._notify()
+
+    @contextlib.asynccontextmanager
+    async def async_slot(self, is_running=lambda: True):
+        """slot()의 asyncio 버전 (이벤트 루프를 막지 않고 대기)"""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._cond:
+                wait = self._try_enter(is_running)
+                if wait is None:
+                    break
+                future = loop.create_future()
+                self._async_waiters.append((loop, future))
+            try:
+                await asyncio.wait_for(future, min(wait, 0.5))
+            except asyncio.TimeoutError:
+                pass
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.active -= 1
+                self._notify()
+
+    def on_success(self):
+        with self._cond:
+            self.successes += 1
+            self.error_rate *= 1 - ERROR_EWMA_WEIGHT
+            if self._slow_start:
+                self.rate = min(self.max_rate, self.rate * (1 + SLOW_START_GROWTH))
+                self.limit = min(self.max_concurrency, self.limit + 1)
+            else:
+                self.rate = min(self.max_rate, self.rate + RATE_STEP)
+                self.limit = min(self.max_concurrency, self.limit + 1 / max(1.0, self.limit))
+            self._notify()
+
+    def on_failure(self, kind, retry_after=None):
+        """오류를 기록하고 서버 과부하 신호면 속도와 동시 요청 수를 줄임"""
+        with self._cond:
+            self.failures += 1
+            if kind not in RETRYABLE:
+                return
+            self.error_rate = self.error_rate * (1 - ERROR_EWMA_WEIGHT) + ERROR_EWMA_WEIGHT
+            now = time.monotonic()
+            if retry_after:
+                # 서버가 알려준 시간 동안은 이 호스트로 새 요청을 보내지 않음
+                self._paused_until = max(self._paused_until, now + retry_after)
+            overloaded = kind == THROTTLED or self.error_rate > ERROR_RATE_THRESHOLD
+            if overloaded and now - self._last_decrease >= DECREASE_COOLDOWN:
+                self._last_decrease = now
+                self._slow_start = False
+                self.rate = max(MIN_RATE, self.rate * DECREASE_FACTOR)
+                self.limit = max(MIN_CONCURRENCY, self.limit * DECREASE_FACTOR)
+                print(f"=== 호스트 속도 감소 ({self.host}): {self.rate:.1f}회/초, "
+                      f"동시 {int(self.limit)}개 ===")
+
+    def snapshot(self):
+        with self._cond:
+            return {'host': self.host, 'rate': round(self.rate, 2), 'limit': int(self.limit),
+                    'active': self.active, 'successes': self.successes, 'failures': self.failures,
+                    'error_rate': round(self.error_rate, 3)}
+
+
+# 모든 앨범(스레드)이 공유하는 호스트별 정책
+_policies = {}
+_policies_lock = threading.Lock()
+_settings = {'max_rate': MAX_RATE, 'max_attempts': DEFAULT_MAX_ATTEMPTS,
+             'max_concurrency': MAX_CONCURRENCY}
+
+
+def configure_host_policies(max_rate=None, max_attempts=None, max_concurrency=None):
+    """호스트별 최대 초당 요청 수, 최대 동시 요청 수, 재시도 횟수 변경"""
+    with _policies_lock:
+        if max_concurrency:
+            _settings['max_concurrency'] = max(MIN_CONCURRENCY, int(max_concurrency))
+            for policy in _policies.values():
+                policy.max_concurrency = _settings['max_concurrency']
+                policy.limit = min(policy.limit, policy.max_concurrency)
+        if max_rate:
+            _settings['max_rate'] = max(MIN_RATE, float(max_rate))
+            for policy in _policies.values():
+                policy.max_rate = _settings['max_rate']
+                policy.rate = min(policy.rate, policy.max_rate)
+        if max_attempts:
+            _settings['max_attempts'] = max(1, int(max_attempts))
+
+
+def get_host_policy(url):
+    host = host_of(url)
+    with _policies_lock:
+        policy = _policies.get(host)
+        if policy is None:
+            max_rate = _settings['max_rate']
+            policy = _policies[host] = HostPolicy(host, rate=min(INITIAL_RATE, max_rate),
+                                                  max_rate=max_rate,
+                                                  max_concurrency=_settings['max_concurrency'])
+        return policy
+
+
+def host_snapshots():
+    with _policies_lock:
+        policies = list(_policies.values())
+    return [policy.snapshot() for policy in policies]
+
+
+def sleep_while_running(seconds, is_running):
+    """seconds초 동안 대기하다가 중지되면 False 반환"""
+    deadline = time.monotonic() + seconds
+    while is_running():
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return True
+        time.sleep(min(remaining, 0.2))
+    return False
+
+
+def call_with_retry(url, func, is_running=lambda: True, on_retry=None, max_attempts=None,
+                    timer=None):
+    """url의 호스트 정책을 지키며 func()를 호출하고, 일시적인 오류면 백오프 후 재시도
+
+    4xx처럼 다시 요청해도 소용없는 오류와 그 밖의 예외는 바로 다시 던집니다.
+    on_retry(시도 번호, 오류, 대기 시간)는 재시도하기 전에 호출됩니다.
+    timer(stage_metrics.StageTimer)를 주면 백오프로 기다린 시간을 기록합니다.
+    """
+    policy = get_host_policy(url)
+    max_attempts = max_attempts or _settings['max_attempts']
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            with policy.slot(is_running):
+                result = func()
+            policy.on_success()
+            return result
+        except Exception as e:
+            kind, retry_after = classify_error(e)
+            policy.on_failure(kind, retry_after)
+            if kind not in RETRYABLE or attempt >= max_attempts or not is_running():
+                raise
+            delay = backoff_delay(attempt, retry_after)
+            if on_retry:
+                on_retry(attempt, e, delay)
+            with stage_metrics.maybe_span(timer, 'backoff', url):
+                if not sleep_while_running(delay, is_running):
+                    raise
+
+
+async def async_sleep_while_running(seconds, is_running):
+    """sleep_while_running()의 asyncio 버전"""
+    deadline = time.monotonic() + seconds
+    while is_running():
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return True
+        await asyncio.sleep(min(remaining, 0.2))
+    return False
+
+
+async def async_call_with_retry(url, func, is_running=lambda: True, on_retry=None,
+                                max_attempts=None, timer=None, classify=classify_error):
+    """call_with_retry()의 asyncio 버전 (func는 코루틴을 돌려주는 함수)
+
+    classify로 HTTP 클라이언트에 맞는 오류 분류 함수를 넘길 수 있습니다.
+    """
+    policy = get_host_policy(url)
+    max_attempts = max_attempts or _settings['max_attempts']
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            async with policy.async_slot(is_running):
+                result = await func()
+            policy.on_success()
+            return result
+        except Exception as e:
+            kind, retry_after = classify(e)
+            policy.on_failure(kind, retry_after)
+            if kind not in RETRYABLE or attempt >= max_attempts or not is_running():
+                raise
+            delay = backoff_delay(attempt, retry_after)
+            if on_retry:
+                on_retry(attempt, e, delay)
+            with stage_metrics.maybe_span(timer, 'backoff', url):
+                if not await async_sleep_while_running(delay, is_running):
+                    raise
@@ -0,0 +1,198 @@
+import os
+import json
+import shutil
+import hashlib
+import threading
+import subprocess
+
+try:
+    import xxhash
+except ImportError:
+    xxhash = None
+
+MANIFEST_FILE_NAME = ".khinsider_manifest.json"
+MANIFEST_VERSION = 1
+DEFAULT_ALGORITHMS = ('sha256',)
+READ_BLOCK_SIZE = 1024 * 1024
+
+
+class IntegrityError(IOError):
+    """받은 파일이 크기/해시/FLAC 검사를 통과하지 못함"""
+
+
+def available_algorithms():
+    algorithms = ['sha256', 'md5', 'sha1']
+    if xxhash is not None:
+        algorithms.append('xxh64')
+    return algorithms
+
+
+def _new_hash(name):
+    if name == 'xxh64':
+        if xxhash is None:
+            raise ValueError("xxh64 해시를 사용하려면 xxhash 패키지가 필요합니다.")
+        return xxhash.xxh64()
+    return hashlib.new(name)
+
+
+class StreamHasher:
+    """받는 바이트를 순서대로 받아 해시를 계산 (파일을 다시 읽지 않음)
+
+    position은 지금까지 해시한 바이트 수입니다. 이어받기처럼 앞부분이 이미
+    디스크에 있는 경우에는 catch_up()으로 그 부분만 읽어서 맞춥니다.
+    """
+
+    def __init__(self, algorithms=DEFAULT_ALGORITHMS):
+        self.algorithms = tuple(algorithms)
+        self.reset()
+
+    def reset(self):
+        self._hashes = {name: _new_hash(name) for name in self.algorithms}
+        self.position = 0
+
+    def update(self, chunk):
+        for digest in self._hashes.values():
+            digest.update(chunk)
+        self.position += len(chunk)
+
+    def catch_up(self, file_path, end):
+        """file_path의 [position, end) 구간을 읽어 해시에 반영"""
+        if self.position >= end:
+            return
+        with open(file_path, "rb") as f:
+            f.seek(self.position)
+            while self.position < end:
+                block = f.read(min(READ_BLOCK_SIZE, end - self.position))
+                if not block:
+                    raise IntegrityError(f"파일이 예상보다 짧습니다: {self.position} / {end} bytes")
+                self.update(block)
+
+    def hexdigests(self):
+        return {name: digest.hexdigest() for name, digest in self._hashes.items()}
+
+
+def file_digests(file_path, algorithms=DEFAULT_ALGORITHMS):
+    """파일 전체를 읽어 해시 계산 (검증용)"""
+    hasher = StreamHasher(algorithms)
+    hasher.catch_up(file_path, os.path.getsize(file_path))
+    return hasher.hexdigests()
+
+
+def read_flac_streaminfo_md5(file_path):
+    """FLAC STREAMINFO 블록의 오디오 MD5 반환 (기록되지 않았으면 None)"""
+    with open(file_path, "rb") as f:
+        magic = f.read(4)
+        if magic[:3] == b"ID3":
+            # 앞에 붙은 ID3v2 태그 건너뛰기 (크기는 7비트씩 나눠 저장됨)
+            tag_header = f.read(6)
+            size = 0
+            for byte in tag_header[2:6]:
+                size = (size << 7) | (byte & 0x7F)
+            f.seek(10 + size)
+            magic = f.read(4)
+        if magic != b"fLaC":
+            raise IntegrityError("FLAC 파일 헤더가 없습니다.")
+        header = f.read(4)
+        if len(header) < 4 or header[0] & 0x7F != 0:
+            raise IntegrityError("FLAC STREAMINFO 블록이 없습니다.")
+        length = int.from_bytes(header[1:4], 'big')
+        streaminfo = f.read(length)
+    if length != 34 or len(streaminfo) != 34:
+        raise IntegrityError("FLAC STREAMINFO 블록이 손상되었습니다.")
+    md5 = streaminfo[18:34]
+    return md5.hex() if any(md5) else None
+
+
+def check_flac(file_path):
+    """FLAC 헤더를 확인하고, flac 명령이 있으면 디코딩해 STREAMINFO MD5와 비교
+
+    반환값은 STREAMINFO의 MD5입니다. flac 명령이 없으면 헤더만 확인합니다.
+    """
+    md5 = read_flac_streaminfo_md5(file_path)
+    flac = shutil.which("flac")
+    if flac and md5:
+        result = subprocess.run([flac, "-t", "-s", file_path],
+                                stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        if result.returncode != 0:
+            message = result.stderr.decode('utf-8', 'replace').strip().splitlines()
+            raise IntegrityError(f"FLAC 검사 실패: {message[-1] if message else result.returncode}")
+    return md5
+
+
+class AlbumManifest:
+    """앨범 폴더의 파일별 크기, 수정 시각, 해시 목록 (.khinsider_manifest.json)
+
+    나중에 라이브러리를 검증할 때 크기와 수정 시각이 그대로인 파일은 다시
+    해시하지 않고 이 목록을 믿을 수 있습니다.
+    """
+
+    def __init__(self, folder):
+        self.folder = folder
+        self.path = os.path.join(folder, MANIFEST_FILE_NAME)
+        self._lock = threading.Lock()
+        self.files = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.files = json.load(f).get('files', {})
+        except (OSError, ValueError):
+            pass
+
+    def relpath(self, file_path):
+        return os.path.relpath(file_path, self.folder).replace(os.sep, '/')
+
+    def get(self, file_path):
+        return self.files.get(self.relpath(file_path))
+
+    def add(self, file_path, url, digests, flac_md5=None):
+        """파일 정보를 기록하고 목록을 원자적으로 저장"""
+        stat = os.stat(file_path)
+        entry = {'url': url, 'size': stat.st_size, 'mtime': stat.st_mtime}
+        entry.update(digests)
+        if flac_md5:
+            entry['flac_md5'] = flac_md5
+        with self._lock:
+            self.files[self.relpath(file_path)] = entry
+            self._save()
+
+    def _save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': MANIFEST_VERSION, 'files': self.files}, f,
+                      ensure_ascii=False, indent=1, sort_keys=True)
+        os.replace(tmp_path, self.path)
+
+
+def verify_manifest(folder, rehash=False):
+    """앨범 폴더를 목록과 비교해 (상대 경로, 문제) 목록 반환
+
+    크기가 다르거나 파일이 없으면 바로 문제로 보고, 수정 시각이 바뀌었거나
+    rehash=True인 파일만 다시 해시해 기록된 값과 비교합니다.
+    """
+    manifest = AlbumManifest(folder)
+    problems = []
+    for rel, entry in sorted(manifest.files.items()):
+        file_path = os.path.join(folder, *rel.split('/'))
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            problems.append((rel, "파일 없음"))
+            continue
+        if stat.st_size != entry['size']:
+            problems.append((rel, f"크기 불일치: {stat.st_size} / {entry['size']} bytes"))
+            continue
+        if not rehash and abs(stat.st_mtime - entry['mtime']) < 1.0:
+            continue
+        algorithms = [name for name in available_algorithms() if name in entry]
+        if not algorithms:
+            continue
+        digests = file_digests(file_path, algorithms)
+        if any(digests[name] != entry[name] for name in algorithms):
+            problems.append((rel, "해시 불일치"))
+    return problems
+
+
+def find_manifests(root):
+    """root 아래에서 목록 파일이 있는 앨범 폴더를 찾음"""
+    for folder, _, files in os.walk(root):
+        if MANIFEST_FILE_NAME in files:
+            yield folder
@@ -1,78 +1,567 @@
+"""KHInsider 앨범 다운로더 (명령줄 / 일괄 처리용)
+
+Tkinter 없이 DownloaderThread와 같은 앨범 처리 코드로 앨범을 받습니다.
+
+    python khinsider_downloader.py URL [URL ...] -o "D:\\Music"
+    python khinsider_downloader.py -i albums.txt -o /srv/music --json
+    cat albums.txt | python khinsider_downloader.py -o /srv/music
+    python khinsider_downloader.py --check -o /srv/music
+    python khinsider_downloader.py --sync letters -o /srv/music --albums 4
+    python khinsider_downloader.py --sync nintendo-switch A B -o /srv/music
+    python khinsider_downloader.py -i albums.txt -o /srv/music --bandwidth 2M \
+        --bandwidth-schedule "09:00-18:00=2M, 18:00-09:00=0" --control-file control.json
+    python khinsider_downloader.py -i huge_list.txt -o /srv/music --queue /srv/music/queue.sqlite3
+    python khinsider_downloader.py -o /srv/music --queue /srv/music/queue.sqlite3
+    python khinsider_downloader.py --sync letters -o /srv/music --queue q.sqlite3 --workers 4 \
+        --serve-queue 0.0.0.0:8765 --queue-token secret
+    python khinsider_downloader.py -o /mnt/music --queue http://coordinator:8765 --queue-token secret
+
+URL 목록의 각 줄에 "URL 가중치" 처럼 가중치를 적으면 그 앨범이 대역폭과
+전체 연결을 가중치 비율만큼 더(또는 덜) 가져갑니다.
+
+--queue를 주면 URL을 읽는 대로 디스크의 작업 대기열에 넣고 거기서 앨범을
+하나씩 가져가 받습니다. 중간에 멈춰도 대기열이 남아 있으므로 URL 없이
+같은 --queue로 다시 실행하면 남은 앨범부터 이어서 받습니다.
+
+--workers N을 주면 이 프로세스는 코디네이터가 되어 입력을 대기열에 넣고
+작업자 프로세스 N개를 띄운 뒤, 작업자들이 대기열에 기록하는 진행 정보를
+모아 출력합니다. --serve-queue로 대기열을 HTTP로 열면 다른 컴퓨터에서
+--queue http://호스트:포트 로 작업자를 더 붙일 수 있습니다.
+"""
 import os
+import sys
+import json
 import time
-import requests
-import urllib.parse
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-
-# 📌 앨범 페이지 URL
-ALBUM_URL = "https://downloads.khinsider.com/game-soundtracks/album/taiko-no-tatsujin-original-soundtrack-watagashi"
-
-# 📌 다운로드 폴더 지정 (사용자가 원하는 경로)
-DOWNLOAD_FOLDER = r"D:\Music\4. OST\MUSIC GAME OST\太鼓の達人\{CLRC-10006} Taiko no Tatsujin Original Soundtrack Watagashi [FLAC]"
-os.makedirs(DOWNLOAD_FOLDER, exist_ok=True)
-
-# 📌 Chrome 설정 (자동 다운로드 폴더 지정)
-chrome_options = Options()
-chrome_options.add_argument("--headless")  # 백그라운드 실행
-chrome_options.add_argument("--disable-gpu")
-chrome_options.add_argument("--log-level=3")
-
-# 📌 웹 드라이버 실행
-service = Service(ChromeDriverManager().install())
-driver = webdriver.Chrome(service=service, options=chrome_options)
-
-# 1️⃣ **앨범 페이지에서 MP3 다운로드 페이지 URL 가져오기 (중복 제거)**
-driver.get(ALBUM_URL)
-time.sleep(2)  # 페이지 로딩 대기
-
-soup = BeautifulSoup(driver.page_source, "html.parser")
-track_links = set()  # 중복 방지를 위해 set 사용
-
-# ✅ MP3 다운로드 페이지 링크 가져오기 (중복 제거)
-for a in soup.select("a"):
-    href = a.get("href", "")
-    if href.endswith(".mp3"):  # MP3 다운로드 페이지인지 확인
-        track_links.add("https://downloads.khinsider.com" + href)
-
-track_links = list(track_links)  # set을 list로 변환
-print(f"🔍 중복 제거 후 {len(track_links)}개의 트랙을 찾았습니다.")
-
-# 2️⃣ **각 MP3 다운로드 페이지에서 FLAC 직접 다운로드**
-for idx, track_url in enumerate(track_links):
-    driver.get(track_url)
-    time.sleep(1)
-
-    # MP3 다운로드 페이지에서 FLAC 다운로드 링크 찾기
-    soup = BeautifulSoup(driver.page_source, "html.parser")
-    flac_link = None
-
-    for a in soup.select("a"):
-        if a.get("href", "").endswith(".flac"):  # .flac으로 끝나는 링크 찾기
-            flac_link = a["href"]
-            break
-
-    if not flac_link:
-        print(f"[{idx+1}/{len(track_links)}] {track_url} - FLAC 파일 없음")
-        continue
-
-    # ✅ URL 디코딩하여 파일명 정리
-    file_name = os.path.basename(flac_link)
-    file_name = urllib.parse.unquote(file_name)  # URL 인코딩된 문자 변환
-    file_path = os.path.join(DOWNLOAD_FOLDER, file_name)
-    
-    print(f"[{idx+1}/{len(track_links)}] FLAC 다운로드 중: {file_name}")
-
-    with requests.get(flac_link, stream=True) as r:
-        with open(file_path, "wb") as f:
-            for chunk in r.iter_content(chunk_size=8192):
-                f.write(chunk)
-
-print("✅ 모든 다운로드가 완료되었습니다!")
-driver.quit()
+import argparse
+import threading
+import subprocess
+
+from downloader_core import DownloaderThread
+from host_policy import configure_host_policies, MAX_RATE, DEFAULT_MAX_ATTEMPTS
+from driver_pool import set_driver_pool_size, shutdown_driver_pool
+from download_scheduler import (set_global_download_limit, DEFAULT_DOWNLOAD_WORKERS,
+                                DEFAULT_GLOBAL_DOWNLOAD_LIMIT)
+from bandwidth import (set_bandwidth_limit, set_bandwidth_schedule, parse_rate, parse_schedule,
+                       format_schedule)
+from work_queue import default_owner, parse_entry, FAILED, WAITING, DOWNLOADING, COMPLETED
+from queue_broker import QueueBroker, QueueUnavailable, open_queue, parse_address, queue_status
+from track_resolver import DEFAULT_RESOLVE_WORKERS
+from metadata_cache import DEFAULT_TTL
+from integrity import find_manifests, verify_manifest
+from download_index import DownloadIndex
+from catalog_sync import CatalogSync, listing_urls, DEFAULT_MAX_PAGES
+from stage_metrics import start_metrics_server, start_json_dump, dump_json
+from progress_events import (LogMessage, FileStatus, FileProgress, TotalProgress, TotalFiles,
+                             event_to_dict)
+
+
+def iter_album_urls(urls, input_file=None, stdin=sys.stdin):
+    """인자, 파일, 표준 입력에서 앨범 URL을 하나씩 읽음 (빈 줄과 # 주석 제외)"""
+    for url in urls:
+        yield url.strip()
+
+    sources = []
+    if input_file == '-' or (input_file is None and not urls and not stdin.isatty()):
+        sources.append(stdin)
+    elif input_file:
+        sources.append(open(input_file, 'r', encoding='utf-8'))
+
+    for source in sources:
+        for line in source:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                yield line
+        if source is not stdin:
+            source.close()
+
+
+CONTROL_POLL_INTERVAL = 2.0
+# --queue 모드에서 받는 중인 앨범의 임대를 연장하는 간격(초) - 코디네이터가 모으는
+# 진행 정보도 함께 기록하므로 임대 시간보다 훨씬 짧게
+HEARTBEAT_INTERVAL = 5.0
+# 받을 작업이 없을 때 대기열을 다시 확인하는 간격(초)
+QUEUE_POLL_INTERVAL = 1.0
+# 코디네이터가 띄운 작업자의 출력을 남기는 폴더 (다운로드 루트 아래)
+WORKER_LOG_DIR = ".khinsider_workers"
+# 대기열이 빈 뒤 다른 컴퓨터의 작업자가 끝났음을 확인할 수 있도록 중개 서버를 유지하는 시간(초)
+BROKER_LINGER = 5.0
+
+
+class ControlFile:
+    """실행 중에 설정을 바꿀 수 있는 JSON 파일을 수정 시각이 바뀔 때마다 다시 읽음
+
+    {"bandwidth": "2M", "schedule": "09:00-18:00=2M", "global_limit": 8,
+     "weights": {"앨범 URL": 2}} 처럼 필요한 키만 적으면 됩니다.
+    weights는 실행 중인 앨범과 이후 시작하는 앨범에 적용됩니다.
+    """
+
+    def __init__(self, path, jobs, engine='thread'):
+        self.path = path
+        self.jobs = jobs  # 실행 중인 앨범 작업 목록 (main의 active)
+        self.engine = engine
+        self.weights = {}
+        self._mtime = None
+        self._stop = threading.Event()
+
+    def start(self):
+        self.poll()
+        threading.Thread(target=self._watch, name="control-file", daemon=True).start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def _watch(self):
+        while not self._stop.wait(CONTROL_POLL_INTERVAL):
+            self.poll()
+
+    def poll(self):
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return
+        if mtime == self._mtime:
+            return
+        self._mtime = mtime
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.apply(json.load(f))
+        except (OSError, ValueError) as e:
+            print(f"=== 제어 파일 적용 실패: {self.path} - {str(e)} ===")
+
+    def apply(self, control):
+        if 'bandwidth' in control:
+            set_bandwidth_limit(control['bandwidth'] or 0)
+        if 'schedule' in control:
+            set_bandwidth_schedule(control['schedule'] or '')
+        if control.get('global_limit'):
+            set_global_download_limit(control['global_limit'])
+            if self.engine == 'async':
+                from async_engine import set_async_transfer_limit
+                set_async_transfer_limit(control['global_limit'])
+        if 'weights' in control:
+            self.weights = {url: float(w) for url, w in control['weights'].items()}
+            for job in list(self.jobs):
+                if job.album_url in self.weights:
+                    job.set_weight(self.weights[job.album_url])
+        print(f"=== 제어 파일 적용: {self.path} ===")
+
+
+class Reporter:
+    """진행 상황을 사람이 읽는 로그 또는 JSON Lines로 출력"""
+
+    def __init__(self, stream, as_json=False, progress_interval=1.0):
+        self.stream = stream
+        self.as_json = as_json
+        self.progress_interval = progress_interval
+        self._lock = threading.Lock()
+        self._last_progress = {}
+
+    def emit(self, album_url, event):
+        if event['type'] == FileProgress.kind:
+            # 파일 진행률은 너무 잦으므로 앨범별로 간격을 두고 출력
+            now = time.monotonic()
+            if now - self._last_progress.get(album_url, 0) < self.progress_interval:
+                return
+            self._last_progress[album_url] = now
+            if not self.as_json:
+                return
+
+        with self._lock:
+            if self.as_json:
+                record = {'time': round(time.time(), 3), 'album': album_url}
+                record.update(event)
+                self.stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+            elif event['type'] == LogMessage.kind:
+                if event['text'].strip():
+                    self.stream.write(event['text'].strip() + "\n")
+            elif event['type'] == FileStatus.kind and event['status'] not in ('대기 중', '다운로드 중'):
+                self.stream.write(f"  {event['filename']}: {event['status']}\n")
+            elif event['type'] == 'queue_status':
+                self.stream.write(format_queue_status(event) + "\n")
+            self.stream.flush()
+
+    def callback_for(self, album_url):
+        return lambda event: self.emit(album_url, event_to_dict(event))
+
+
+def format_queue_status(status):
+    """코디네이터가 모은 대기열 상태를 사람이 읽는 여러 줄로"""
+    counts = status['counts']
+    lines = [f"📊 대기 {counts[WAITING]} · 받는 중 {counts[DOWNLOADING]} · 완료 {counts[COMPLETED]}"
+             f" · 실패 {counts[FAILED]} · 작업자 {len(status['workers'])}개"]
+    for owner, info in sorted(status['workers'].items()):
+        lines.append(f"  {owner}: 받는 중 {info[DOWNLOADING]}, 완료 {info[COMPLETED]}, 실패 {info[FAILED]}")
+    for job in status['running']:
+        album = job['album'] or job['url'].split("/album/")[-1].strip("/")
+        lines.append(f"    {album} - {job['progress_text']} ({job['owner']})")
+    return "\n".join(lines)
+
+
+def track_progress(callback, state):
+    """앨범 이벤트를 callback에 넘기면서 대기열에 기록할 진행 정보를 state에 모음"""
+    def track(event):
+        if isinstance(event, TotalFiles):
+            state['total_files'] = event.count
+        elif isinstance(event, TotalProgress):
+            total = state.get('total_files', 0)
+            state['progress_text'] = f"{event.percent:.1f}% [{int(total * event.percent / 100)}/{total}]"
+        elif isinstance(event, LogMessage) and event.text.startswith("💿 앨범 제목:"):
+            state['album'] = event.text.split(":", 1)[1].strip()
+        callback(event)
+    return track
+
+
+def worker_command(args, count):
+    """코디네이터가 띄울 작업자 프로세스의 명령줄 (대역폭과 전체 연결 수는 작업자 수로 나눔)"""
+    rate = parse_rate(args.bandwidth) // count
+    schedule = [(start, end, r // count) for start, end, r in parse_schedule(args.bandwidth_schedule)]
+    command = [sys.executable, os.path.abspath(__file__), '-o', args.output, '--queue', args.queue,
+               '-f', args.format, '--albums', str(args.albums),
+               '--download-workers', str(args.download_workers),
+               '--resolve-workers', str(args.resolve_workers),
+               '--global-limit', str(max(1, args.global_limit // count)),
+               '--engine', args.engine, '--max-rate', str(args.max_rate),
+               '--retries', str(args.retries), '--bandwidth', str(rate),
+               '--bandwidth-schedule', format_schedule(schedule),
+               '--cache-ttl', str(args.cache_ttl), '--progress-interval', str(args.progress_interval)]
+    for flag in ('verify', 'verify_flac', 'json'):
+        if getattr(args, flag):
+            command.append('--' + flag.replace('_', '-'))
+    return command
+
+
+def run_coordinator(args, jobs, ingest, reporter):
+    """작업자 프로세스를 띄우고 대기열이 빌 때까지 진행 정보를 모아 출력. 실패한 앨범 수 반환"""
+    broker = None
+    if args.serve_queue:
+        host, port = parse_address(args.serve_queue)
+        broker = QueueBroker(jobs, host, port, token=args.queue_token).start()
+        print(f"=== 작업 대기열 중개 서버 시작: {broker.url} ===")
+
+    procs = []
+    log_dir = os.path.join(args.output, WORKER_LOG_DIR)
+    command = worker_command(args, args.workers) if args.workers else None
+
+    def spawn(index):
+        with open(os.path.join(log_dir, f"worker-{index + 1}.log"), 'a', encoding='utf-8') as log:
+            return subprocess.Popen(command, stdin=subprocess.DEVNULL, stdout=log,
+                                    stderr=subprocess.STDOUT)
+
+    if args.workers:
+        os.makedirs(log_dir, exist_ok=True)
+        procs = [spawn(index) for index in range(args.workers)]
+        print(f"=== 작업자 {len(procs)}개 시작 (출력: {log_dir}) ===")
+
+    try:
+        while True:
+            status = queue_status(jobs)
+            reporter.emit('coordinator', {'type': 'queue_status', **status})
+            if not status['pending'] and not ingest.is_alive():
+                break
+            if ingest.is_alive():
+                # 입력을 읽는 동안 끝난 작업자는 나중에 들어올 앨범을 위해 다시 띄움
+                for index, proc in enumerate(procs):
+                    if proc.poll() is not None:
+                        print(f"=== 작업자 {index + 1} 종료 (코드 {proc.returncode}), 다시 시작 ===")
+                        procs[index] = spawn(index)
+            elif procs and not broker and all(proc.poll() is not None for proc in procs):
+                print("=== 남은 작업이 있지만 모든 작업자가 끝났습니다 ===")
+                break
+            time.sleep(args.status_interval)
+    finally:
+        # Ctrl+C는 작업자에게도 전달되므로 받던 앨범을 대기열에 돌려줄 때까지 기다림
+        for proc in procs:
+            proc.wait()
+        if broker:
+            time.sleep(BROKER_LINGER)
+            broker.shutdown()
+    return jobs.counts()[FAILED]
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="KHInsider 앨범 다운로더 (명령줄)")
+    parser.add_argument('urls', nargs='*', help="앨범 페이지 URL")
+    parser.add_argument('-i', '--input', help="URL 목록 파일 (- 이면 표준 입력)")
+    parser.add_argument('-o', '--output', required=True, help="다운로드 루트 폴더")
+    parser.add_argument('-f', '--format', choices=['auto', 'flac', 'mp3'], default='auto',
+                        help="받을 음원 형식 (기본: FLAC이 있으면 FLAC)")
+    parser.add_argument('--albums', type=int, default=1, help="동시에 받을 앨범 수")
+    parser.add_argument('--download-workers', type=int, default=DEFAULT_DOWNLOAD_WORKERS,
+                        help="앨범별 동시 파일 다운로드 수")
+    parser.add_argument('--resolve-workers', type=int, default=DEFAULT_RESOLVE_WORKERS,
+                        help="앨범별 동시 트랙 페이지 요청 수")
+    parser.add_argument('--global-limit', type=int, default=DEFAULT_GLOBAL_DOWNLOAD_LIMIT,
+                        help="전체 동시 파일 다운로드 수")
+    parser.add_argument('--engine', choices=['thread', 'async'], default='thread',
+                        help="앨범마다 스레드 하나(thread) 또는 모든 앨범을 이벤트 루프 하나에서(async, aiohttp 필요)")
+    parser.add_argument('--max-rate', type=float, default=MAX_RATE,
+                        help="호스트별 최대 초당 요청 수 (오류가 나면 자동으로 낮춤)")
+    parser.add_argument('--retries', type=int, default=DEFAULT_MAX_ATTEMPTS,
+                        help="일시적인 오류 시 요청당 최대 시도 횟수")
+    parser.add_argument('--bandwidth', default='0',
+                        help="전체 대역폭 제한 (예: 2M, 500K, 0은 무제한)")
+    parser.add_argument('--bandwidth-schedule', default='',
+                        help="시간대별 대역폭 제한 (예: '09:00-18:00=2M, 18:00-09:00=0')")
+    parser.add_argument('--control-file',
+                        help="실행 중에 대역폭/시간대/연결 수/가중치를 바꿀 JSON 파일 (바뀌면 다시 읽음)")
+    parser.add_argument('--sync', nargs='+', metavar='LISTING',
+                        help="목록 동기화: 알파벳(A, #), letters(전체 알파벳), 플랫폼 이름 또는 목록 URL을 "
+                             "훑어 라이브러리에 없거나 바뀐 앨범만 받음")
+    parser.add_argument('--max-pages', type=int, default=DEFAULT_MAX_PAGES,
+                        help="--sync 한 번에 불러올 최대 목록 페이지 수 (남은 페이지는 다음에 이어서)")
+    parser.add_argument('--queue', metavar='PATH|URL',
+                        help="작업 대기열 파일(SQLite) 또는 중개 서버 URL - URL을 읽는 대로 대기열에 넣고 "
+                             "거기서 가져가 받음 (URL 없이 실행하면 남은 작업만 이어서 받음)")
+    parser.add_argument('--queue-token', help="작업 대기열 중개 서버의 공유 토큰")
+    parser.add_argument('--workers', type=int, default=0,
+                        help="작업자 프로세스 수 - 이 프로세스는 코디네이터가 되어 진행 상황만 모음 (--queue 필요)")
+    parser.add_argument('--serve-queue', metavar='[HOST:]PORT',
+                        help="--queue 파일을 HTTP로 열어 다른 컴퓨터의 작업자가 --queue http://호스트:포트 로 "
+                             "함께 받게 함")
+    parser.add_argument('--status-interval', type=float, default=5.0,
+                        help="코디네이터가 대기열 상태를 출력하는 간격(초)")
+    parser.add_argument('--verify', action='store_true', help="기존 파일을 해시로 검증한 뒤 건너뜀")
+    parser.add_argument('--verify-flac', action='store_true',
+                        help="받은 FLAC의 STREAMINFO 확인 (flac 명령이 있으면 디코딩 검사)")
+    parser.add_argument('--check', action='store_true',
+                        help="다운로드 없이 앨범 폴더의 파일 목록으로 라이브러리 검증 (--verify면 모두 다시 해시)")
+    parser.add_argument('--cache-ttl', type=int, default=DEFAULT_TTL, help="앨범 정보 캐시 유지 시간(초)")
+    parser.add_argument('--json', action='store_true', help="진행 상황을 JSON Lines로 출력")
+    parser.add_argument('--progress-interval', type=float, default=1.0,
+                        help="파일 진행률 출력 간격(초)")
+    parser.add_argument('--metrics-port', type=int,
+                        help="단계별 시간 측정값을 이 포트의 /metrics(Prometheus 형식)로 제공")
+    parser.add_argument('--metrics-json', help="단계별 시간 측정값을 주기적으로 저장할 JSON 파일")
+    parser.add_argument('--metrics-interval', type=float, default=10.0,
+                        help="--metrics-json 저장 간격(초)")
+    return parser
+
+
+def check_library(root, reporter, rehash=False):
+    """root 아래 모든 앨범 폴더를 목록과 비교하고 문제가 있는 앨범 수 반환"""
+    failed = 0
+    for folder in find_manifests(root):
+        problems = verify_manifest(folder, rehash=rehash)
+        for rel, problem in problems:
+            reporter.emit(folder, {'type': 'check_problem', 'filename': rel, 'problem': problem})
+            if not reporter.as_json:
+                reporter.stream.write(f"{os.path.join(folder, rel)}: {problem}\n")
+        reporter.emit(folder, {'type': 'check_done', 'problems': len(problems)})
+        if problems:
+            failed += 1
+    return failed
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    # 출력 스트림은 진행 상황 전용으로 두고 디버그 출력은 stderr로 보냄
+    out = sys.stdout
+    sys.stdout = sys.stderr
+
+    os.makedirs(args.output, exist_ok=True)
+    set_global_download_limit(args.global_limit)
+    set_driver_pool_size(max(1, args.albums))
+    configure_host_policies(max_rate=args.max_rate, max_attempts=args.retries)
+    try:
+        set_bandwidth_limit(args.bandwidth)
+        set_bandwidth_schedule(args.bandwidth_schedule)
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        return 2
+    reporter = Reporter(out, as_json=args.json, progress_interval=args.progress_interval)
+    preferred_format = None if args.format == 'auto' else args.format.upper()
+
+    if args.check:
+        return 1 if check_library(args.output, reporter, rehash=args.verify) else 0
+
+    remote_queue = bool(args.queue) and args.queue.startswith(('http://', 'https://'))
+    coordinator = bool(args.workers or args.serve_queue)
+    if coordinator and (not args.queue or remote_queue):
+        print("--workers와 --serve-queue에는 --queue 파일 경로가 필요합니다", file=sys.stderr)
+        return 2
+
+    job_class = DownloaderThread
+    async_engine = None
+    if args.engine == 'async':
+        # aiohttp를 불러오는 데 시간이 걸리므로 asyncio 엔진을 쓸 때만 불러옴
+        import async_engine
+        if not async_engine.is_available():
+            print("asyncio 엔진을 사용하려면 aiohttp를 설치하세요: pip install aiohttp", file=sys.stderr)
+            return 2
+        async_engine.set_async_transfer_limit(args.global_limit)
+        job_class = async_engine.AsyncAlbumJob
+
+    if args.metrics_port:
+        start_metrics_server(args.metrics_port)
+    if args.metrics_json:
+        start_json_dump(args.metrics_json, args.metrics_interval)
+
+    catalog = None
+    album_entries = iter_album_urls(args.urls, args.input)
+    if args.queue and not args.urls and args.input is None:
+        # 대기열 작업자는 nohup 등으로 실행해 표준 입력이 터미널이 아닐 수 있으므로
+        # -i - 로 지정했을 때만 표준 입력을 읽음
+        album_entries = iter(())
+    if args.sync:
+        # 목록에서 찾은 앨범을 받는 속도에 맞춰 다음 목록 페이지를 불러옴
+        catalog = CatalogSync(args.output, DownloadIndex(args.output), max_pages=args.max_pages,
+                              progress_callback=reporter.callback_for('catalog'))
+        catalog.start([url for spec in args.sync for url in listing_urls(spec)])
+        # 대기열 파일이 있으면 지난번에 찾은 앨범은 이미 대기열에 있음
+        album_entries = catalog.crawl(requeue_pending=not args.queue)
+
+    active = []
+    failed = 0
+    control = ControlFile(args.control_file, active, args.engine).start() if args.control_file else None
+    jobs = open_queue(args.queue, token=args.queue_token) if args.queue else None
+    owner = default_owner()
+    job_ids = {}  # 작업자 -> 작업 대기열 ID
+    progress = {}  # 작업자 -> 대기열에 기록할 진행 정보
+    last_heartbeat = time.monotonic()
+
+    def heartbeat():
+        """받는 중인 작업의 임대 연장 (다른 작업자에게 넘어갔으면 중지)"""
+        nonlocal last_heartbeat
+        if not jobs or time.monotonic() - last_heartbeat < HEARTBEAT_INTERVAL:
+            return
+        last_heartbeat = time.monotonic()
+        for worker in active:
+            if worker in job_ids and not jobs.heartbeat(job_ids[worker], owner, **progress[worker]):
+                print(f"=== 작업 임대 만료, 중지: {worker.album_url} ===")
+                del job_ids[worker]
+                worker.stop()
+
+    def reap(limit):
+        """완료된 앨범을 정리하고 실행 중인 앨범 수가 limit 미만이 될 때까지 대기"""
+        nonlocal failed
+        while active:
+            for worker in [w for w in active if not w.is_alive()]:
+                active.remove(worker)
+                status = worker.status or 'stopped'
+                reporter.emit(worker.album_url, {'type': 'album_done', 'status': status,
+                                                 'failed_files': worker.failed_files})
+                ok = status == 'completed' and not worker.failed_files
+                job_id = job_ids.pop(worker, None)
+                progress.pop(worker, None)
+                if job_id is not None and ok:
+                    jobs.ack(job_id, owner)
+                elif job_id is not None:
+                    # 시도 횟수가 남았으면 나중에 다시 받으므로 최종 실패만 셈
+                    jobs.nack(job_id, owner, error=f"{status} (실패한 파일 {worker.failed_files}개)")
+                    job = jobs.get(job_id)
+                    if job and job.status == FAILED:
+                        failed += 1
+                elif not ok:
+                    failed += 1
+            if len(active) < limit:
+                return
+            heartbeat()
+            active[0].join(timeout=0.2)
+
+    def start_worker(album_url, folder, weight, state=None):
+        if control:
+            weight = control.weights.get(album_url, weight)
+        reporter.emit(album_url, {'type': 'album_start'})
+        callback = reporter.callback_for(album_url)
+        if state is not None:
+            callback = track_progress(callback, state)
+        worker = job_class(album_url, folder, callback,
+                           resolve_workers=args.resolve_workers,
+                           download_workers=args.download_workers,
+                           verify_existing=args.verify,
+                           cache_ttl=args.cache_ttl,
+                           preferred_format=preferred_format,
+                           verify_flac=args.verify_flac,
+                           weight=weight)
+        worker.daemon = True
+        worker.start()
+        active.append(worker)
+        return worker
+
+    ingest = None
+    ingest_running = True
+    if jobs:
+        # 입력은 별도 스레드에서 읽는 대로 대기열에 넣음 (목록 크기와 상관없이 메모리 일정)
+        def run_ingest():
+            try:
+                added = jobs.enqueue_many((parse_entry(entry) for entry in album_entries), args.output,
+                                          is_running=lambda: ingest_running)
+                print(f"=== 작업 대기열에 {added}개 추가 ===")
+            except QueueUnavailable as e:
+                print(f"=== 작업 대기열에 추가하지 못함: {str(e)} ===")
+
+        ingest = threading.Thread(target=run_ingest, name="queue-ingest", daemon=True)
+        ingest.start()
+
+    try:
+        if coordinator:
+            failed = run_coordinator(args, jobs, ingest, reporter)
+        elif jobs:
+            while True:
+                reap(max(1, args.albums))
+                heartbeat()
+                job = jobs.claim(owner)
+                if job is not None:
+                    # 다른 컴퓨터의 대기열에 적힌 폴더는 이 컴퓨터에 없으므로 -o 폴더에 받음
+                    state = {}
+                    worker = start_worker(job.url, args.output if remote_queue else job.folder,
+                                          job.weight, state)
+                    job_ids[worker], progress[worker] = job.id, state
+                    continue
+                # 재시도를 기다리는 작업이나 다른 작업자가 받는 중인 작업이 남았으면 계속 확인
+                if not active and not ingest.is_alive() and not jobs.has_pending():
+                    break
+                if active:
+                    active[0].join(timeout=QUEUE_POLL_INTERVAL)
+                else:
+                    time.sleep(QUEUE_POLL_INTERVAL)
+        else:
+            for entry in album_entries:
+                album_url, weight = parse_entry(entry)
+                reap(max(1, args.albums))
+                start_worker(album_url, args.output, weight)
+            reap(1)
+    except KeyboardInterrupt:
+        ingest_running = False
+        for worker in active:
+            worker.stop()
+        for worker in active:
+            worker.join(timeout=5.0)
+            if worker in job_ids:
+                # 다음 실행이 이어받도록 다시 대기 상태로
+                jobs.release(job_ids[worker], owner, requeue=True)
+        failed += len(active)
+    except QueueUnavailable as e:
+        # 중개 서버가 없어졌으면 받던 앨범은 임대가 만료되어 다른 작업자에게 넘어감
+        print(str(e), file=sys.stderr)
+        ingest_running = False
+        for worker in active:
+            worker.stop()
+        for worker in active:
+            worker.join(timeout=5.0)
+        failed += len(active) or 1
+    finally:
+        if catalog:
+            reporter.callback_for('catalog')(LogMessage(catalog.summary()))
+            catalog.index.close()
+            catalog.close()
+        if control:
+            control.stop()
+        if jobs:
+            if ingest:
+                ingest.join(timeout=5.0)
+            print(f"=== 작업 대기열 상태: {jobs.counts()} ===")
+            jobs.close()
+        shutdown_driver_pool()
+        if async_engine:
+            async_engine.shutdown_async_engine()
+
+    if args.metrics_json:
+        dump_json(args.metrics_json)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
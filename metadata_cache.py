@@ -0,0 +1,86 @@
+import os
+import time
+import json
+import sqlite3
+import threading
+
+CACHE_FILE_NAME = ".khinsider_metadata.sqlite3"
+DEFAULT_TTL = 24 * 60 * 60
+DEFAULT_MAX_ENTRIES = 20000
+# 최대 개수를 넘었는지는 이 횟수만큼 저장할 때마다 한 번 확인
+EVICT_INTERVAL = 100
+# 마지막 사용 시각은 ttl의 이 비율보다 오래되었을 때만 갱신 (읽을 때마다 커밋하지 않도록)
+TOUCH_FRACTION = 0.1
+
+
+class MetadataCache:
+    """파싱한 앨범/트랙 페이지 정보를 저장하는 영구 캐시 (SQLite)
+
+    항목은 저장 후 ttl초가 지나면 만료되고, 전체 항목 수가 max_entries를
+    넘으면 가장 오래 사용하지 않은 항목부터 삭제합니다(LRU). 사용 시각은
+    ttl의 일부만큼 지났을 때만 기록하고 개수는 EVICT_INTERVAL번 저장할 때마다
+    확인하므로, 순서는 대략적이고 잠시 max_entries를 조금 넘을 수 있습니다.
+    """
+
+    def __init__(self, root, ttl=DEFAULT_TTL, max_entries=DEFAULT_MAX_ENTRIES):
+        os.makedirs(root, exist_ok=True)
+        self.path = os.path.join(root, CACHE_FILE_NAME)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._puts = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                stored_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)")
+        self._conn.commit()
+
+    def get(self, key):
+        """만료되지 않은 항목을 반환 (없으면 None)"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data, stored_at, accessed_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if not row:
+                return None
+            if now - row[1] > self.ttl:
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            if now - row[2] > self.ttl * TOUCH_FRACTION:
+                self._conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+                self._conn.commit()
+        return json.loads(row[0])
+
+    def put(self, key, data):
+        """항목 저장 (EVICT_INTERVAL번마다 최대 개수를 넘은 만큼 오래된 항목 정리)"""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, data, stored_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(data, ensure_ascii=False), now, now))
+            self._puts += 1
+            if self._puts % EVICT_INTERVAL == 0:
+                excess = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0] - self.max_entries
+                if excess > 0:
+                    self._conn.execute(
+                        "DELETE FROM entries WHERE key IN ("
+                        " SELECT key FROM entries ORDER BY accessed_at LIMIT ?)", (excess,))
+            self._conn.commit()
+
+    def invalidate(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
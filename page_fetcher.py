@@ -0,0 +1,154 @@
+import time
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from stage_metrics import maybe_span
+from host_policy import call_with_retry, get_host_policy, classify_status, RETRYABLE
+
+DEFAULT_HEADERS = {
+    'User-Agent': ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+                   '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'),
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9,ko;q=0.8',
+}
+
+# 차단/챌린지 페이지로 판단하는 상태 코드와 본문 표식
+BLOCKED_STATUS_CODES = (403, 429, 503)
+CHALLENGE_MARKERS = (
+    'cf-browser-verification',
+    'challenge-platform',
+    'cf_chl_opt',
+    'Just a moment...',
+    'Attention Required! | Cloudflare',
+)
+
+# Chrome으로 불러온 페이지가 준비됐는지 확인하는 최대 시간과 확인 간격(초)
+DEFAULT_READY_TIMEOUT = 15.0
+DEFAULT_POLL_INTERVAL = 0.1
+# 선택자가 모두 있으면 준비 완료, 선택자가 없으면 문서 로드 완료를 기다림
+READY_SCRIPT = """
+var selectors = arguments[0];
+if (!selectors.length) return document.readyState === 'complete';
+for (var i = 0; i < selectors.length; i++) {
+    if (!document.querySelector(selectors[i])) return false;
+}
+return true;
+"""
+
+
+def create_session(pool_size=16):
+    """keep-alive 연결을 재사용하는 requests 세션 생성"""
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+def has_challenge_marker(text):
+    head = text[:4096]
+    return any(marker in head for marker in CHALLENGE_MARKERS)
+
+
+def is_blocked_response(status_code, text):
+    """응답이 챌린지/차단 페이지인지 확인"""
+    return status_code in BLOCKED_STATUS_CODES or has_challenge_marker(text)
+
+
+class PageFetcher:
+    """페이지 HTML을 가져오는 클래스
+
+    기본적으로 requests 세션으로 페이지를 받고(호스트별 속도 제한을 지키며
+    일시적인 오류는 재시도), 챌린지/차단 응답을 받은 경우에만 driver_factory로 만든 Chrome 드라이버로 다시 불러옵니다.
+    한 번 차단이 감지되면 이후 요청은 바로 Chrome을 사용합니다.
+    Chrome으로 불러올 때는 고정 시간 동안 기다리지 않고 ready로 준 CSS
+    선택자가 모두 나타날 때까지(최대 ready_timeout초) poll_interval 간격으로
+    확인하므로, 챌린지 페이지는 통과될 때까지 기다리고 일반 페이지는 바로 반환합니다.
+    """
+
+    def __init__(self, session=None, driver_factory=None, timeout=30,
+                 ready_timeout=DEFAULT_READY_TIMEOUT, poll_interval=DEFAULT_POLL_INTERVAL,
+                 is_running=lambda: True):
+        self.session = session or create_session()
+        self.driver_factory = driver_factory
+        self.timeout = timeout
+        self.ready_timeout = ready_timeout
+        self.poll_interval = poll_interval
+        self.is_running = is_running  # 중지되면 재시도 대기를 멈춤
+        self.use_browser = False
+        self.timer = None  # stage_metrics.StageTimer (단계별 시간 측정)
+        self._browser_lock = threading.Lock()
+
+    def fetch(self, url, ready=()):
+        """URL의 HTML 문자열 반환 (ready는 Chrome 사용 시 기다릴 CSS 선택자 목록)"""
+        if not self.use_browser:
+            try:
+                response = call_with_retry(url, lambda: self._get(url), self.is_running,
+                                           timer=self.timer)
+            except requests.RequestException as e:
+                # 연결 오류/시간 초과나 재시도가 끝난 429/5xx만 Chrome으로 다시 시도
+                if self.driver_factory is None:
+                    raise
+                print(f"=== HTTP 요청 실패, Chrome으로 재시도: {url} - {str(e)} ===")
+                return self.fetch_with_browser(url, ready)
+
+            if not is_blocked_response(response.status_code, response.text):
+                # 404 등 차단이 아닌 4xx는 Chrome으로 불러와도 같으므로 그대로 오류
+                response.raise_for_status()
+                return response.text
+            print(f"=== 차단 응답 감지 ({response.status_code}), Chrome으로 전환: {url} ===")
+
+            if self.driver_factory is None:
+                raise requests.HTTPError(f"차단된 응답: {url}", response=response)
+            self.use_browser = True
+
+        return self.fetch_with_browser(url, ready)
+
+    def _get(self, url):
+        """requests로 한 번 요청 (챌린지가 아닌 429/5xx는 재시도하도록 예외로 전달)"""
+        with maybe_span(self.timer, 'page_fetch', url):
+            response = self.session.get(url, timeout=self.timeout)
+        if classify_status(response.status_code) in RETRYABLE and not has_challenge_marker(response.text):
+            response.raise_for_status()
+        return response
+
+    def fetch_with_browser(self, url, ready=()):
+        """Chrome 드라이버로 페이지 로드"""
+        with self._browser_lock, get_host_policy(url).slot():
+            driver = self.driver_factory()
+            if driver is None:
+                raise RuntimeError("Chrome 드라이버를 사용할 수 없습니다.")
+            with maybe_span(self.timer, 'browser_fetch', url):
+                driver.get(url)
+                self._wait_until_ready(driver, url, ready)
+                html = driver.page_source
+        self._copy_browser_cookies(driver)
+        return html
+
+    def _wait_until_ready(self, driver, url, ready):
+        """ready 선택자가 모두 나타나면 True, ready_timeout이 지나면 False"""
+        deadline = time.monotonic() + self.ready_timeout
+        while True:
+            try:
+                if driver.execute_script(READY_SCRIPT, list(ready)):
+                    return True
+            except Exception:
+                # 챌린지 통과 후 페이지가 바뀌는 중에는 스크립트가 실패할 수 있음
+                pass
+            if time.monotonic() >= deadline:
+                print(f"=== 페이지 준비 대기 시간 초과 ({self.ready_timeout}초): {url} ===")
+                return False
+            time.sleep(self.poll_interval)
+
+    def _copy_browser_cookies(self, driver):
+        """챌린지 통과 쿠키를 세션에 복사해 파일 다운로드에도 사용"""
+        try:
+            for cookie in driver.get_cookies():
+                self.session.cookies.set(cookie['name'], cookie['value'],
+                                         domain=cookie.get('domain'), path=cookie.get('path', '/'))
+        except Exception:
+            pass
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,94 @@
+import queue
+import threading
+from dataclasses import dataclass, asdict
+
+
+@dataclass(frozen=True)
+class LogMessage:
+    """로그에 표시할 메시지"""
+    kind = 'log'
+    text: str
+
+
+@dataclass(frozen=True)
+class FileStatus:
+    """파일별 상태 변경 (대기 중, 다운로드 중, 완료, 건너뜀, 중단됨, 실패)"""
+    kind = 'file_status'
+    filename: str
+    status: str
+
+
+@dataclass(frozen=True)
+class FileProgress:
+    """현재 받고 있는 파일의 진행 바이트"""
+    kind = 'file_progress'
+    filename: str
+    downloaded: int
+    total: int
+
+    @property
+    def percent(self):
+        return (self.downloaded / self.total) * 100 if self.total else 0.0
+
+
+@dataclass(frozen=True)
+class TotalProgress:
+    """앨범 전체 진행률 (%)"""
+    kind = 'total_progress'
+    percent: float
+
+
+@dataclass(frozen=True)
+class TotalFiles:
+    """앨범에서 받을 전체 파일 수"""
+    kind = 'total_files'
+    count: int
+
+
+# 같은 작업에서 마지막 값만 의미가 있어 합쳐도 되는 이벤트
+COALESCED_KINDS = (FileProgress.kind, TotalProgress.kind)
+
+
+def event_to_dict(event):
+    """JSON 출력 등을 위해 이벤트를 dict로 변환"""
+    data = {'type': event.kind}
+    data.update(asdict(event))
+    return data
+
+
+class ProgressChannel:
+    """작업 스레드에서 UI 스레드로 진행 이벤트를 전달하는 채널
+
+    작업 스레드는 put()으로 이벤트를 넣기만 하고 기다리지 않습니다. 진행률처럼
+    마지막 값만 필요한 이벤트는 작업별로 최신 값 하나만 보관하고, 나머지
+    이벤트는 순서대로 쌓아 두었다가 UI 스레드가 drain()으로 한꺼번에 꺼냅니다.
+    """
+
+    def __init__(self):
+        self._events = queue.SimpleQueue()
+        self._latest = {}
+        self._latest_lock = threading.Lock()
+
+    def put(self, job, event):
+        if event.kind in COALESCED_KINDS:
+            with self._latest_lock:
+                self._latest[(job, event.kind)] = event
+        else:
+            self._events.put((job, event))
+
+    def callback_for(self, job):
+        """job의 이벤트를 채널에 넣는 콜백 반환"""
+        return lambda event: self.put(job, event)
+
+    def drain(self, limit=None):
+        """쌓인 이벤트를 (job, event) 목록으로 반환 (합친 진행률 이벤트는 마지막에)"""
+        events = []
+        while limit is None or len(events) < limit:
+            try:
+                events.append(self._events.get_nowait())
+            except queue.Empty:
+                break
+        with self._latest_lock:
+            latest, self._latest = self._latest, {}
+        events.extend((job, event) for (job, _), event in latest.items())
+        return events
@@ -0,0 +1,229 @@
+import json
+import time
+import uuid
+import threading
+from dataclasses import asdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from work_queue import WorkQueue, QueueJob, feed_batches
+
+DEFAULT_BROKER_PORT = 8765
+TOKEN_HEADER = 'X-Queue-Token'
+REQUEST_TIMEOUT = 30
+# 중개 서버에 연결하지 못할 때 다시 시도하는 횟수와 간격(초)
+BROKER_RETRIES = 5
+BROKER_RETRY_DELAY = 2.0
+# 여러 번 보내도 결과가 같아 다시 시도해도 되는 요청 (claim은 claim_id로 한 번만 가져감)
+IDEMPOTENT_CALLS = ('status', 'heartbeat', 'get', 'claim')
+
+
+class QueueUnavailable(Exception):
+    """작업 대기열 중개 서버에 연결할 수 없음"""
+
+
+def parse_address(text, default_host='127.0.0.1'):
+    """'8765', ':8765', '0.0.0.0:8765' 를 (호스트, 포트)로 변환"""
+    host, _, port = str(text).rpartition(':')
+    return host or default_host, int(port)
+
+
+def queue_status(queue, running_limit=20):
+    """대기열 전체 상태 (상태별 수, 남은 작업 여부, 작업자별 수, 받는 중인 작업)"""
+    return {
+        'counts': queue.counts(),
+        'pending': queue.has_pending(),
+        'workers': queue.workers(),
+        'running': [asdict(job) for job in queue.running(running_limit)],
+    }
+
+
+def open_queue(spec, token=None):
+    """http(s)://로 시작하면 중개 서버 클라이언트, 아니면 SQLite 파일 대기열"""
+    if spec.startswith(('http://', 'https://')):
+        return RemoteQueue(spec, token=token)
+    return WorkQueue(spec)
+
+
+class _BrokerHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def authorized(self):
+        token = self.server.broker.token
+        if token and self.headers.get(TOKEN_HEADER) != token:
+            self.send_json(403, {'error': "잘못된 토큰"})
+            return False
+        return True
+
+    def do_GET(self):
+        if not self.authorized():
+            return
+        if self.path.split('?')[0] == '/status':
+            self.send_json(200, self.server.broker.status())
+        else:
+            self.send_json(404, {'error': "없는 경로"})
+
+    def do_POST(self):
+        if not self.authorized():
+            return
+        name = self.path.strip('/')
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            args = json.loads(self.rfile.read(length) or b'{}')
+            result = self.server.broker.call(name, args)
+        except KeyError as e:
+            self.send_json(400, {'error': f"잘못된 요청: {str(e)}"})
+            return
+        except Exception as e:
+            self.send_json(500, {'error': str(e)})
+            return
+        self.send_json(200, {'result': result})
+
+    def send_json(self, status, data):
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class QueueBroker:
+    """SQLite 작업 대기열을 HTTP(JSON)로 다른 컴퓨터의 작업자에게 제공하는 중개 서버
+
+    SQLite 파일은 네트워크 드라이브에서 안전하게 잠글 수 없으므로, 대기열
+    파일은 코디네이터 한 곳에만 두고 다른 컴퓨터의 작업자는 이 서버를 통해
+    claim/heartbeat/ack/nack/release를 호출합니다. 인증은 선택적인 공유
+    토큰뿐이므로 신뢰할 수 있는 네트워크에서만 사용합니다.
+    """
+
+    def __init__(self, queue, host='127.0.0.1', port=DEFAULT_BROKER_PORT, token=None):
+        self.queue = queue
+        self.token = token
+        self.server = ThreadingHTTPServer((host, port), _BrokerHandler)
+        self.server.daemon_threads = True
+        self.server.broker = self
+        self._calls = {
+            'claim': lambda a: self._job(queue.claim(a['owner'], a.get('lease'), a.get('claim_id'))),
+            'heartbeat': lambda a: queue.heartbeat(a['job_id'], a['owner'], a.get('lease'),
+                                                   **a.get('fields', {})),
+            'ack': lambda a: queue.ack(a['job_id'], a['owner']),
+            'nack': lambda a: queue.nack(a['job_id'], a['owner'], error=a.get('error')),
+            'release': lambda a: queue.release(a['job_id'], a['owner'],
+                                               requeue=a.get('requeue', False)),
+            'get': lambda a: self._job(queue.get(a['job_id'])),
+            'enqueue': lambda a: queue.enqueue_batch([tuple(entry) for entry in a['entries']],
+                                                     a['folder'], a.get('ingest_id'),
+                                                     a.get('final', True)),
+        }
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @staticmethod
+    def _job(job):
+        return asdict(job) if job else None
+
+    def call(self, name, args):
+        return self._calls[name](args)
+
+    def status(self):
+        return queue_status(self.queue)
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, name="queue-broker", daemon=True).start()
+        return self
+
+    def shutdown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class RemoteQueue:
+    """QueueBroker에 연결하는 작업 대기열 클라이언트 (WorkQueue의 작업자 쪽 메서드와 같음)"""
+
+    def __init__(self, url, token=None, lease=None):
+        self.url = url.rstrip('/')
+        self.lease = lease
+        self.session = requests.Session()
+        if token:
+            self.session.headers[TOKEN_HEADER] = token
+
+    def _request(self, method, name, args=None):
+        # ack/nack/release/enqueue는 응답만 잃어버렸을 수 있으므로 다시 보내지 않음
+        retries = BROKER_RETRIES if name in IDEMPOTENT_CALLS else 1
+        last_error = None
+        for attempt in range(retries):
+            if attempt:
+                time.sleep(BROKER_RETRY_DELAY * attempt)
+            try:
+                response = self.session.request(method, f"{self.url}/{name}", json=args,
+                                                timeout=REQUEST_TIMEOUT)
+            except requests.RequestException as e:
+                last_error = e
+                continue
+            try:
+                data = response.json()
+            except ValueError:
+                # 프록시 등이 돌려준 JSON이 아닌 오류 페이지
+                data = {'error': response.text[:200] or response.reason}
+            if response.status_code == 200 and 'error' not in data:
+                return data
+            error = data.get('error')
+            if response.status_code < 500:
+                # 토큰이 틀렸거나 잘못된 요청 - 다시 시도해도 같음
+                raise QueueUnavailable(f"중개 서버가 요청을 거부했습니다 ({response.status_code}): {error}")
+            last_error = error
+        raise QueueUnavailable(f"작업 대기열 중개 서버에 연결할 수 없습니다: {self.url} - {str(last_error)}")
+
+    def _call(self, name, **args):
+        return self._request('POST', name, args)['result']
+
+    @staticmethod
+    def _job(data):
+        return QueueJob(**data) if data else None
+
+    def claim(self, owner, lease=None):
+        return self._job(self._call('claim', owner=owner, lease=lease or self.lease,
+                                    claim_id=uuid.uuid4().hex))
+
+    def heartbeat(self, job_id, owner, lease=None, **fields):
+        return self._call('heartbeat', job_id=job_id, owner=owner, lease=lease or self.lease,
+                          fields=fields)
+
+    def ack(self, job_id, owner):
+        return self._call('ack', job_id=job_id, owner=owner)
+
+    def nack(self, job_id, owner, error=None):
+        return self._call('nack', job_id=job_id, owner=owner, error=error)
+
+    def release(self, job_id, owner, requeue=False):
+        return self._call('release', job_id=job_id, owner=owner, requeue=requeue)
+
+    def get(self, job_id):
+        return self._job(self._call('get', job_id=job_id))
+
+    def enqueue_many(self, entries, folder, weight=1.0, on_batch=None, is_running=lambda: True):
+        """WorkQueue.enqueue_many()와 같지만 묶음마다 중개 서버로 보냄"""
+        ingest_id = uuid.uuid4().hex
+
+        def send(batch, final):
+            return self._call('enqueue', entries=batch, folder=folder, ingest_id=ingest_id, final=final)
+
+        return feed_batches(entries, send, weight, on_batch, is_running)
+
+    def status(self):
+        return self._request('GET', 'status')
+
+    def counts(self):
+        return self.status()['counts']
+
+    def has_pending(self):
+        return self.status()['pending']
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,203 @@
+import os
+import json
+import time
+import threading
+import contextlib
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# host_policy도 이 모듈을 불러오므로 모듈로 불러와 사용할 때 찾음
+import host_policy
+
+# 단계 이름과 앨범 요약에 쓰는 표시 이름 (표시 순서)
+STAGE_LABELS = {
+    'driver_start': "Chrome 시작",
+    'page_fetch': "페이지 요청",
+    'browser_fetch': "Chrome 페이지 로드",
+    'parse': "파싱",
+    'resolve': "트랙 해석",
+    'probe': "크기 확인",
+    'transfer': "전송",
+    'fsync': "fsync",
+    'backoff': "재시도 대기",
+}
+RECENT_ALBUMS = 100
+
+
+class StageStats:
+    """한 단계의 횟수, 누적/최대 시간, 바이트 수"""
+
+    __slots__ = ('count', 'seconds', 'max_seconds', 'bytes')
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.max_seconds = 0.0
+        self.bytes = 0
+
+    def add(self, seconds, nbytes=0):
+        self.count += 1
+        self.seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.bytes += nbytes
+
+    def to_dict(self):
+        return {'count': self.count, 'seconds': round(self.seconds, 6),
+                'max_seconds': round(self.max_seconds, 6), 'bytes': self.bytes}
+
+
+class MetricsRegistry:
+    """프로세스 전체의 단계별 측정값을 (단계, 호스트)별로 모으는 저장소
+
+    끝난 앨범의 단계별 요약도 최근 RECENT_ALBUMS개까지 보관합니다.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._albums = deque(maxlen=RECENT_ALBUMS)
+
+    def record(self, stage, host, seconds, nbytes=0):
+        with self._lock:
+            stats = self._stats.get((stage, host))
+            if stats is None:
+                stats = self._stats[(stage, host)] = StageStats()
+            stats.add(seconds, nbytes)
+
+    def add_album(self, summary):
+        with self._lock:
+            self._albums.append(summary)
+
+    def snapshot(self):
+        with self._lock:
+            stages = [dict(stage=stage, host=host, **stats.to_dict())
+                      for (stage, host), stats in sorted(self._stats.items())]
+            albums = list(self._albums)
+        return {'time': round(time.time(), 3), 'stages': stages, 'albums': albums}
+
+    def render_prometheus(self):
+        """Prometheus 텍스트 형식으로 변환"""
+        with self._lock:
+            items = sorted((key, stats.to_dict()) for key, stats in self._stats.items())
+        lines = []
+        for name, field, kind, help_text in (
+                ('khinsider_stage_seconds_total', 'seconds', 'counter', "단계별 누적 시간(초)"),
+                ('khinsider_stage_count_total', 'count', 'counter', "단계별 실행 횟수"),
+                ('khinsider_stage_seconds_max', 'max_seconds', 'gauge', "단계별 최대 시간(초)"),
+                ('khinsider_stage_bytes_total', 'bytes', 'counter', "단계별 처리 바이트")):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for (stage, host), stats in items:
+                lines.append(f'{name}{{stage="{stage}",host="{host}"}} {stats[field]}')
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+
+class StageTimer:
+    """앨범 하나의 단계별 시간을 재고 전역 저장소에도 호스트별로 기록
+
+    span()은 여러 스레드에서 동시에 써도 되며, 시간은 스레드마다 따로 재므로
+    병렬로 실행된 단계의 누적 시간은 실제 경과 시간보다 길 수 있습니다.
+    """
+
+    def __init__(self, album, registry=REGISTRY):
+        self.album = album
+        self.registry = registry
+        self.started = time.perf_counter()
+        self._lock = threading.Lock()
+        self._stages = {}
+
+    @contextlib.contextmanager
+    def span(self, stage, url=None):
+        """블록 실행 시간을 stage로 기록 (yield한 dict의 'bytes'로 바이트 수 지정)"""
+        info = {'bytes': 0}
+        start = time.perf_counter()
+        try:
+            yield info
+        finally:
+            self.record(stage, time.perf_counter() - start, url, info['bytes'])
+
+    def record(self, stage, seconds, url=None, nbytes=0):
+        with self._lock:
+            stats = self._stages.get(stage)
+            if stats is None:
+                stats = self._stages[stage] = StageStats()
+            stats.add(seconds, nbytes)
+        self.registry.record(stage, host_policy.host_of(url), seconds, nbytes)
+
+    def summary(self):
+        with self._lock:
+            stages = {stage: stats.to_dict() for stage, stats in self._stages.items()}
+        return {'album': self.album, 'elapsed': round(time.perf_counter() - self.started, 3),
+                'stages': stages}
+
+    def finish(self):
+        """앨범 요약을 전역 저장소에 넘기고 로그용 문장 목록 반환"""
+        summary = self.summary()
+        self.registry.add_album(summary)
+        lines = [f"⏱️ 단계별 시간 (전체 {summary['elapsed']:.2f}초, 병렬 단계는 누적):"]
+        for stage, label in STAGE_LABELS.items():
+            stats = summary['stages'].get(stage)
+            if not stats:
+                continue
+            line = f"   {label}: {stats['seconds']:.2f}초 / {stats['count']}회 (최대 {stats['max_seconds']:.2f}초)"
+            if stats['bytes'] and stats['seconds']:
+                line += f", {stats['bytes'] / stats['seconds'] / 1024 / 1024:.1f} MB/s"
+            lines.append(line)
+        return lines
+
+
+def maybe_span(timer, stage, url=None):
+    """timer가 없으면 아무것도 하지 않는 span"""
+    if timer is None:
+        return contextlib.nullcontext({'bytes': 0})
+    return timer.span(stage, url)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.split('?')[0] == '/metrics.json':
+            body = json.dumps(self.server.registry.snapshot(), ensure_ascii=False).encode('utf-8')
+            content_type = 'application/json'
+        else:
+            body = self.server.registry.render_prometheus().encode('utf-8')
+            content_type = 'text/plain; version=0.0.4; charset=utf-8'
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_metrics_server(port, host='127.0.0.1', registry=REGISTRY):
+    """/metrics(Prometheus 텍스트)와 /metrics.json을 제공하는 서버를 백그라운드로 시작"""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    server.registry = registry
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
+
+
+def dump_json(path, registry=REGISTRY):
+    """현재 측정값을 JSON 파일로 원자적으로 저장"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(registry.snapshot(), f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, path)
+
+
+def start_json_dump(path, interval=10.0, registry=REGISTRY):
+    """interval초마다 측정값을 path에 저장하는 스레드 시작 (반환한 Event를 set하면 중지)"""
+    stop = threading.Event()
+
+    def loop():
+        while not stop.wait(interval):
+            dump_json(path, registry)
+
+    threading.Thread(target=loop, name="metrics-dump", daemon=True).start()
+    return stop
@@ -0,0 +1,181 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+
+STATE_FILE_NAME = "downloader_state.sqlite3"
+LEGACY_STATE_FILE_NAME = "downloader_state.json"
+DEFAULT_MAX_LOG_LINES = 2000
+DEFAULT_MAX_FILE_ROWS = 1000
+DEFAULT_FLUSH_INTERVAL = 1.0
+
+# 이전 버전의 대기열 항목 필드 (작업 대기열로 옮길 때만 읽음)
+QUEUE_FIELDS = ('album', 'progress_text', 'url', 'folder', 'status', 'total_files', 'weight')
+
+
+class StateStore:
+    """데스크톱 앱의 설정, 파일 상태, 로그를 조금씩 기록하는 저장소 (SQLite WAL)
+
+    변경 사항은 바로 기록하고 flush_interval마다 한 번씩 커밋하므로 프로그램이
+    강제 종료되어도 마지막 커밋까지의 상태가 남습니다. 커밋할 때 로그와 파일
+    목록은 최근 항목만 남기고 정리해 오래 사용해도 시작 시 읽는 양이 일정합니다.
+    대기열은 work_queue.WorkQueue에 있으며, queue 테이블은 이전 버전의 항목을
+    작업 대기열로 옮길 때까지만 남아 있습니다.
+    """
+
+    def __init__(self, path=STATE_FILE_NAME, max_log_lines=DEFAULT_MAX_LOG_LINES,
+                 max_file_rows=DEFAULT_MAX_FILE_ROWS, flush_interval=DEFAULT_FLUSH_INTERVAL):
+        self.path = path
+        self.max_log_lines = max_log_lines
+        self.max_file_rows = max_file_rows
+        self.flush_interval = flush_interval
+        self._dirty = False
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS settings (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS queue (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                album TEXT NOT NULL,
+                progress_text TEXT NOT NULL,
+                url TEXT NOT NULL,
+                folder TEXT NOT NULL,
+                status TEXT NOT NULL,
+                total_files INTEGER NOT NULL DEFAULT 0,
+                weight REAL NOT NULL DEFAULT 1
+            );
+            CREATE TABLE IF NOT EXISTS files (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                job INTEGER,
+                filename TEXT NOT NULL,
+                status TEXT NOT NULL,
+                UNIQUE (job, filename)
+            );
+            CREATE TABLE IF NOT EXISTS log (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                text TEXT NOT NULL
+            );
+        """)
+        # 가중치 열이 없던 이전 버전의 저장소에 열 추가
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(queue)")]
+        if 'weight' not in columns:
+            self._conn.execute("ALTER TABLE queue ADD COLUMN weight REAL NOT NULL DEFAULT 1")
+        self._conn.commit()
+
+    def is_empty(self):
+        with self._lock:
+            for table in ('settings', 'queue', 'files', 'log'):
+                if self._conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone():
+                    return False
+        return True
+
+    def _write(self, sql, params=()):
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+            self._dirty = True
+        return cursor
+
+    def set_setting(self, key, value):
+        self._write("INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
+                    (key, json.dumps(value, ensure_ascii=False)))
+
+    def settings(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT key, value FROM settings").fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    def _add_legacy_queue(self, album, progress_text, url, folder, status, total_files=0):
+        """이전 상태 파일의 대기열 항목 추가 (import_legacy_state에서만 사용)"""
+        self._write(
+            "INSERT INTO queue (album, progress_text, url, folder, status, total_files)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (album, progress_text, url, folder, status, total_files))
+
+    def legacy_queue_items(self):
+        """작업 대기열로 옮길 이전 버전의 대기열 항목을 추가한 순서대로 dict 목록으로 반환"""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id, {', '.join(QUEUE_FIELDS)} FROM queue ORDER BY id").fetchall()
+        return [dict(zip(('id',) + QUEUE_FIELDS, row)) for row in rows]
+
+    def clear_legacy_queue(self):
+        """이전 버전의 대기열 항목을 모두 삭제 (작업 대기열로 옮긴 뒤)"""
+        self._write("DELETE FROM queue")
+
+    def set_file(self, job, filename, status):
+        self._write(
+            "INSERT INTO files (job, filename, status) VALUES (?, ?, ?)"
+            " ON CONFLICT (job, filename) DO UPDATE SET status = excluded.status",
+            (job, filename, status))
+
+    def recent_files(self, limit=None):
+        """최근 파일 상태를 (job, filename, status) 목록으로 반환 (오래된 것부터)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT job, filename, status FROM files ORDER BY id DESC LIMIT ?",
+                (limit or self.max_file_rows,)).fetchall()
+        return rows[::-1]
+
+    def append_log(self, text):
+        self._write("INSERT INTO log (text) VALUES (?)", (text,))
+
+    def recent_log(self, limit=None):
+        """최근 로그 메시지 목록 반환 (오래된 것부터)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT text FROM log ORDER BY id DESC LIMIT ?",
+                (limit or self.max_log_lines,)).fetchall()
+        return [row[0] for row in reversed(rows)]
+
+    def flush(self, force=False):
+        """변경 사항이 있고 flush_interval이 지났으면 오래된 항목을 정리하고 커밋"""
+        now = time.monotonic()
+        if not self._dirty or (not force and now - self._last_flush < self.flush_interval):
+            return
+        with self._lock:
+            for table, limit in (('log', self.max_log_lines), ('files', self.max_file_rows)):
+                self._conn.execute(
+                    f"DELETE FROM {table} WHERE id IN ("
+                    f" SELECT id FROM {table} ORDER BY id DESC LIMIT -1 OFFSET ?)", (limit,))
+            self._conn.commit()
+            self._dirty = False
+            self._last_flush = now
+
+    def close(self):
+        self.flush(force=True)
+        with self._lock:
+            # WAL 파일을 본 파일에 합쳐 다음 시작 시 읽을 양을 줄임
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._conn.close()
+
+
+def import_legacy_state(store, path=LEGACY_STATE_FILE_NAME):
+    """이전 버전의 downloader_state.json 내용을 저장소로 옮기고 원본은 .bak으로 변경"""
+    if not os.path.exists(path):
+        return False
+    with open(path, 'r', encoding='utf-8') as f:
+        state = json.load(f)
+
+    for key in ('last_download_folder', 'max_albums', 'connection_limit', 'save_time'):
+        if key in state:
+            store.set_setting(key, state[key])
+    for info in state.get('queue_info', {}).values():
+        store._add_legacy_queue(info.get('album', ''), info.get('progress_text', ''),
+                                info.get('url', ''), info.get('folder', ''),
+                                info.get('status', ''), info.get('total_files', 0))
+    for file_info in state.get('file_list', [])[-store.max_file_rows:]:
+        store.set_file(None, file_info['filename'], file_info['status'])
+    log_lines = state.get('log_content', '').rstrip("\n").split("\n")
+    if log_lines != ['']:
+        store.append_log("\n".join(log_lines[-store.max_log_lines:]))
+    store.flush(force=True)
+
+    os.replace(path, path + ".bak")
+    return True
@@ -0,0 +1,98 @@
+"""work_queue.WorkQueue의 임대, 재시도, claim_id, 입력 읽는 중 기록 테스트"""
+import time
+import threading
+
+import pytest
+
+import work_queue
+from work_queue import WorkQueue, WAITING, DOWNLOADING, FAILED
+
+
+@pytest.fixture
+def make_queue(tmp_path):
+    queues = []
+
+    def make(**kwargs):
+        queue = WorkQueue(str(tmp_path / "queue.sqlite3"), **kwargs)
+        queues.append(queue)
+        return queue
+
+    yield make
+    for queue in queues:
+        queue.close()
+
+
+def test_expired_lease_returns_to_waiting(make_queue):
+    queue = make_queue(lease=0.05)
+    job_id = queue.enqueue("http://example.com/a", "out")
+    assert queue.claim("worker-a").id == job_id
+    time.sleep(0.1)
+
+    # 임대가 만료된 작업은 다음 claim에서 다시 대기 상태가 되어 다른 작업자가 가져감
+    job = queue.claim("worker-b")
+    assert job.id == job_id
+    assert job.owner == "worker-b"
+    assert job.attempts == 2
+    assert not queue.heartbeat(job_id, "worker-a")
+
+
+def test_repeated_claim_id_returns_same_job(make_queue):
+    queue = make_queue()
+    first = queue.enqueue("http://example.com/a", "out")
+    second = queue.enqueue("http://example.com/b", "out")
+
+    assert queue.claim("worker", claim_id="x").id == first
+    # 응답을 잃어버려 같은 claim_id로 다시 보내도 작업을 하나 더 가져가지 않음
+    again = queue.claim("worker", claim_id="x")
+    assert again.id == first
+    assert again.attempts == 1
+    assert queue.get(second).status == WAITING
+
+    # 다른 작업자는 같은 claim_id로도 이 작업을 받지 못함
+    assert queue.claim("other", claim_id="x").id == second
+    assert queue.claim("worker", claim_id="y") is None
+
+
+def test_nack_until_attempt_limit_fails(make_queue, monkeypatch):
+    monkeypatch.setattr(work_queue, 'RETRY_BASE', 0)
+    queue = make_queue(max_attempts=2)
+    job_id = queue.enqueue("http://example.com/a", "out")
+
+    assert queue.claim("worker").id == job_id
+    assert queue.nack(job_id, "worker", error="첫 실패")
+    assert queue.get(job_id).status == WAITING
+
+    assert queue.claim("worker").id == job_id
+    assert queue.nack(job_id, "worker", error="두 번째 실패")
+    job = queue.get(job_id)
+    assert job.status == FAILED
+    assert job.last_error == "두 번째 실패"
+    assert queue.claim("worker") is None
+    assert not queue.has_pending()
+
+
+def test_has_pending_while_ingest_is_idle(make_queue):
+    queue = make_queue(lease=0.3)
+    release = threading.Event()
+
+    def entries():
+        # 새 앨범 없이 목록 페이지를 오래 도는 입력
+        release.wait(5)
+        yield "http://example.com/a"
+
+    ingest = threading.Thread(target=queue.enqueue_many, args=(entries(), "out"))
+    ingest.start()
+    try:
+        time.sleep(1.0)
+        assert ingest.is_alive()
+        assert queue.has_pending()
+    finally:
+        release.set()
+        ingest.join()
+
+    assert queue.counts()[WAITING] == 1
+    job = queue.claim("worker")
+    assert job.status == DOWNLOADING
+    assert queue.ack(job.id, "worker")
+    # 입력을 다 읽은 뒤에는 읽는 중 기록이 남지 않음
+    assert not queue.has_pending()
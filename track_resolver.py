@@ -0,0 +1,88 @@
+import threading
+import urllib.parse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from album_parser import find_download_link, TRACK_PAGE_READY
+from stage_metrics import maybe_span
+from host_policy import get_host_policy
+
+DEFAULT_RESOLVE_WORKERS = 8
+DEFAULT_PER_HOST_LIMIT = 4
+
+
+class TrackResolver:
+    """트랙 상세 페이지를 스레드 풀에서 동시에 불러와 직접 링크로 변환하는 클래스
+
+    max_workers로 전체 동시 요청 수를, per_host_limit으로 호스트별 동시 요청
+    수를 제한합니다. resolve()는 완료되는 순서대로 결과를 돌려주므로 먼저
+    풀린 트랙부터 바로 다운로드를 시작할 수 있습니다.
+    """
+
+    def __init__(self, fetcher, max_workers=DEFAULT_RESOLVE_WORKERS,
+                 per_host_limit=DEFAULT_PER_HOST_LIMIT, probe_size=True, cache=None, timer=None):
+        self.fetcher = fetcher
+        self.probe_size = probe_size
+        self.cache = cache
+        self.timer = timer
+        self.max_workers = max(1, max_workers)
+        self.per_host_limit = max(1, per_host_limit)
+        self._host_slots = {}
+        self._host_lock = threading.Lock()
+
+    def _host_slot(self, url):
+        host = urllib.parse.urlsplit(url).netloc
+        with self._host_lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return self._host_slots[host]
+
+    def resolve_one(self, track_url, file_type):
+        """트랙 페이지 하나를 불러와 (다운로드 링크 또는 None, 파일 크기) 반환"""
+        with maybe_span(self.timer, 'resolve', track_url):
+            return self._resolve_one(track_url, file_type)
+
+    def _resolve_one(self, track_url, file_type):
+        cache_key = f"track:{file_type}:{track_url}"
+        if self.cache:
+            cached = self.cache.get(cache_key)
+            if cached:
+                return cached['link'], cached['size']
+
+        with self._host_slot(track_url):
+            html = self.fetcher.fetch(track_url, ready=TRACK_PAGE_READY)
+        with maybe_span(self.timer, 'parse', track_url):
+            link = find_download_link(html, file_type)
+        size = self._probe_size(link) if link and self.probe_size else 0
+        if self.cache and link:
+            self.cache.put(cache_key, {'link': link, 'size': size})
+        return link, size
+
+    def _probe_size(self, url):
+        """HEAD 요청으로 파일 크기 확인 (실패하면 0)"""
+        try:
+            with self._host_slot(url), get_host_policy(url).slot(), maybe_span(self.timer, 'probe', url):
+                response = self.fetcher.session.head(url, allow_redirects=True,
+                                                     timeout=self.fetcher.timeout)
+            return int(response.headers.get('content-length', 0))
+        except Exception:
+            return 0
+
+    def resolve(self, track_urls, file_type, is_running=lambda: True):
+        """(번호, 트랙 URL, 다운로드 링크 또는 None, 파일 크기, 오류) 를 완료 순서대로 생성"""
+        executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                      thread_name_prefix="track-resolver")
+        try:
+            futures = {
+                executor.submit(self.resolve_one, url, file_type): (idx, url)
+                for idx, url in enumerate(track_urls, 1)
+            }
+            for future in as_completed(futures):
+                if not is_running():
+                    break
+                idx, url = futures[future]
+                try:
+                    link, size = future.result()
+                    yield idx, url, link, size, None
+                except Exception as e:
+                    yield idx, url, None, 0, e
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
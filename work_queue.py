@@ -0,0 +1,431 @@
+import os
+import time
+import uuid
+import socket
+import sqlite3
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Optional
+
+QUEUE_FILE_NAME = "download_queue.sqlite3"
+# 작업을 가져간 작업자가 이 시간 안에 연장하지 않으면 다른 작업자가 다시 가져감
+DEFAULT_LEASE = 120.0
+# 앨범 하나를 최대 몇 번까지 시도할지 (임대 만료도 한 번으로 셈)
+DEFAULT_MAX_ATTEMPTS = 3
+RETRY_BASE = 30.0
+RETRY_CAP = 30 * 60.0
+# 대량으로 추가할 때 한 번에 커밋할 항목 수와 최대 간격(초) - 입력이 느려도 작업자가 바로 시작하도록
+INSERT_BATCH = 1000
+INSERT_INTERVAL = 5.0
+
+WAITING = 'waiting'
+DOWNLOADING = 'downloading'
+COMPLETED = 'completed'
+FAILED = 'failed'
+STOPPED = 'stopped'
+STATUSES = (WAITING, DOWNLOADING, COMPLETED, FAILED, STOPPED)
+
+_JOB_COLUMNS = ('id', 'url', 'folder', 'weight', 'album', 'progress_text', 'total_files',
+                'status', 'attempts', 'owner', 'last_error')
+UPDATE_FIELDS = ('album', 'progress_text', 'total_files', 'weight')
+
+
+def default_owner():
+    """작업자 이름 (호스트 이름:프로세스 ID)"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def parse_entry(line, weight=1.0):
+    """'URL' 또는 'URL 가중치' 한 줄을 (URL, 가중치)로 변환"""
+    parts = line.split()
+    if len(parts) == 2:
+        try:
+            return parts[0], max(0.1, float(parts[1]))
+        except ValueError:
+            pass
+    return line.strip(), weight
+
+
+def retry_delay(attempts):
+    """실패한 앨범을 다시 시도하기 전 대기 시간 (시도 횟수에 따라 두 배씩)"""
+    return min(RETRY_CAP, RETRY_BASE * (2 ** max(0, attempts - 1)))
+
+
+def feed_batches(entries, send, weight=1.0, on_batch=None, is_running=lambda: True,
+                 keepalive=DEFAULT_LEASE / 3):
+    """생성기에서 읽은 항목을 묶어 send(묶음, final)로 보내고 추가한 수 반환
+
+    INSERT_BATCH개가 모이거나 INSERT_INTERVAL초가 지나면 보내고, 마지막에는
+    final=True로 남은 묶음을 보내 입력을 다 읽었음을 알립니다. 입력이 오래
+    아무것도 내놓지 않아도(--sync로 새 앨범 없는 목록 페이지를 도는 중 등)
+    읽는 중 기록이 만료되지 않도록 keepalive초마다 빈 묶음을 따로 보냅니다.
+    """
+    added = seen = 0
+    batch = []
+    flushed = time.monotonic()
+    send([], False)
+    stop_keepalive = threading.Event()
+
+    def refresh():
+        while not stop_keepalive.wait(keepalive):
+            try:
+                send([], False)
+            except Exception as e:
+                print(f"=== 입력 읽는 중 기록 갱신 실패: {str(e)} ===")
+
+    keepalive_thread = threading.Thread(target=refresh, name="queue-ingest-keepalive", daemon=True)
+    keepalive_thread.start()
+    try:
+        for entry in entries:
+            if not is_running():
+                break
+            batch.append(entry if isinstance(entry, tuple) else (entry, weight))
+            seen += 1
+            if len(batch) >= INSERT_BATCH or time.monotonic() - flushed >= INSERT_INTERVAL:
+                added += send(batch, False)
+                batch = []
+                flushed = time.monotonic()
+                if on_batch:
+                    on_batch(added, seen)
+    finally:
+        # 갱신 스레드가 끝난 뒤에 마지막 묶음을 보내야 지운 기록이 다시 생기지 않음
+        stop_keepalive.set()
+        keepalive_thread.join()
+        added += send(batch, True)
+    if batch and on_batch:
+        on_batch(added, seen)
+    return added
+
+
+@dataclass
+class QueueJob:
+    """작업 대기열의 앨범 하나"""
+    id: int
+    url: str
+    folder: str
+    weight: float = 1.0
+    album: Optional[str] = None
+    progress_text: str = ''
+    total_files: int = 0
+    status: str = WAITING
+    attempts: int = 0
+    owner: Optional[str] = None
+    last_error: Optional[str] = None
+
+
+class WorkQueue:
+    """여러 작업자가 함께 쓰는 디스크 기반 앨범 작업 대기열 (SQLite WAL)
+
+    claim()으로 기다리는 작업을 하나 가져가면 lease초 동안 그 작업자의 것이
+    되고, heartbeat()로 임대를 연장하며, 끝나면 ack()(완료), nack()(실패 -
+    백오프 후 다시 대기, 시도 횟수를 넘으면 실패) 또는 release()(중지)로
+    돌려줍니다. 작업자가 죽어 임대가 만료된 작업은 다음 claim()에서 다시
+    대기 상태가 됩니다. 대기열은 DB에만 있으므로 항목이 수만 개여도 메모리
+    사용량은 일정하고, 같은 파일을 여러 프로세스가 열어 함께 쓸 수 있습니다.
+    """
+
+    def __init__(self, path=QUEUE_FILE_NAME, lease=DEFAULT_LEASE,
+                 max_attempts=DEFAULT_MAX_ATTEMPTS):
+        self.path = path
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self._lock = threading.Lock()
+        # 트랜잭션을 직접 관리 (claim은 BEGIN IMMEDIATE로 다른 프로세스와 겹치지 않게)
+        self._conn = sqlite3.connect(path, timeout=30, check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT NOT NULL,
+                folder TEXT NOT NULL,
+                weight REAL NOT NULL DEFAULT 1,
+                album TEXT,
+                progress_text TEXT NOT NULL DEFAULT '',
+                total_files INTEGER NOT NULL DEFAULT 0,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                owner TEXT,
+                lease_expires REAL,
+                available_at REAL NOT NULL DEFAULT 0,
+                last_error TEXT,
+                claim_id TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS ingest (
+                id TEXT PRIMARY KEY,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, available_at, id);
+            CREATE UNIQUE INDEX IF NOT EXISTS jobs_active_url ON jobs (url, folder)
+                WHERE status IN ('waiting', 'downloading');
+        """)
+        # claim_id 열이 없던 이전 버전의 대기열 파일에 열 추가
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")]
+        if 'claim_id' not in columns:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN claim_id TEXT")
+
+    @contextmanager
+    def _transaction(self, immediate=False):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE" if immediate else "BEGIN")
+            try:
+                yield self._conn
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._conn.execute("COMMIT")
+
+    # 추가
+
+    def enqueue(self, url, folder, weight=1.0, album=None):
+        """앨범 추가 후 작업 ID 반환 (같은 앨범이 이미 대기 중이거나 받는 중이면 None)"""
+        now = time.time()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO jobs (url, folder, weight, album, progress_text, status,"
+                " created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, folder, weight, album, "대기 중", WAITING, now, now))
+            return cursor.lastrowid if cursor.rowcount else None
+
+    def enqueue_many(self, entries, folder, weight=1.0, on_batch=None, is_running=lambda: True):
+        """(URL, 가중치) 또는 URL을 생성기에서 읽으면서 INSERT_BATCH개씩 추가
+
+        입력을 한꺼번에 읽지 않으므로 목록 크기와 상관없이 메모리가 일정합니다.
+        on_batch(추가한 수, 읽은 수)는 커밋할 때마다 호출됩니다. 추가한 수 반환.
+        """
+        ingest_id = uuid.uuid4().hex
+        return feed_batches(entries,
+                            lambda batch, final: self.enqueue_batch(batch, folder, ingest_id, final),
+                            weight, on_batch, is_running, keepalive=self.lease / 3)
+
+    def enqueue_batch(self, entries, folder, ingest_id=None, final=True):
+        """(URL, 가중치) 목록을 한 트랜잭션으로 추가하고 추가한 수 반환
+
+        ingest_id를 주면 final인 묶음이 올 때까지 입력을 읽는 중으로 기록해,
+        그동안 대기열이 잠깐 비어도 has_pending()이 True를 반환합니다.
+        (기록이 임대 시간보다 오래되면 읽던 프로세스가 죽은 것으로 보고 무시)
+        """
+        now = time.time()
+        added = 0
+        with self._transaction() as conn:
+            for url, job_weight in entries:
+                cursor = conn.execute(
+                    "INSERT OR IGNORE INTO jobs (url, folder, weight, progress_text, status,"
+                    " created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (url, folder, job_weight, "대기 중", WAITING, now, now))
+                added += cursor.rowcount
+            if ingest_id and final:
+                conn.execute("DELETE FROM ingest WHERE id = ?", (ingest_id,))
+            elif ingest_id:
+                conn.execute("INSERT OR REPLACE INTO ingest (id, updated_at) VALUES (?, ?)",
+                             (ingest_id, now))
+        return added
+
+    def restore(self, job_id, url, folder, status, weight=1.0, album=None, progress_text='',
+                total_files=0):
+        """이전 저장소의 항목을 같은 ID로 옮겨 옴"""
+        now = time.time()
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO jobs (id, url, folder, weight, album, progress_text,"
+                " total_files, status, created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, url, folder, weight, album, progress_text, total_files, status, now, now))
+
+    # 작업자 쪽 (claim / heartbeat / ack / nack / release)
+
+    def claim(self, owner, lease=None, claim_id=None):
+        """기다리는 작업 중 가장 먼저 추가된 것을 가져감 (없으면 None)
+
+        claim_id를 주면 같은 작업자가 같은 claim_id로 다시 요청했을 때 새 작업을
+        가져가지 않고 이미 가져간 작업을 임대를 연장해 돌려줍니다. 응답을 받지
+        못한 요청을 다시 보내도 작업이 임대 만료까지 묶이지 않습니다.
+        """
+        now = time.time()
+        lease = lease or self.lease
+        with self._transaction(immediate=True) as conn:
+            self._expire_leases(conn, now)
+            if claim_id:
+                row = conn.execute(
+                    "SELECT id FROM jobs WHERE owner = ? AND claim_id = ? AND status = ?",
+                    (owner, claim_id, DOWNLOADING)).fetchone()
+                if row:
+                    conn.execute("UPDATE jobs SET lease_expires = ?, updated_at = ? WHERE id = ?",
+                                 (now + lease, now, row[0]))
+                    return self._get(conn, row[0])
+            row = conn.execute(
+                "SELECT id FROM jobs WHERE status = ? AND available_at <= ? ORDER BY id LIMIT 1",
+                (WAITING, now)).fetchone()
+            if not row:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, owner = ?, lease_expires = ?, attempts = attempts + 1,"
+                " progress_text = ?, claim_id = ?, updated_at = ? WHERE id = ?",
+                (DOWNLOADING, owner, now + lease, "받는 중", claim_id, now, row[0]))
+            return self._get(conn, row[0])
+
+    def _expire_leases(self, conn, now):
+        """임대가 만료된 작업을 다시 대기 상태로 (시도 횟수를 넘었으면 실패)"""
+        conn.execute(
+            "UPDATE jobs SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END, owner = NULL,"
+            " lease_expires = NULL, last_error = ?, updated_at = ?"
+            " WHERE status = ? AND lease_expires < ?",
+            (self.max_attempts, FAILED, WAITING, "작업자 응답 없음 (임대 만료)", now,
+             DOWNLOADING, now))
+
+    def heartbeat(self, job_id, owner, lease=None, **fields):
+        """임대 연장 (진행 정보도 함께 기록). 다른 작업자에게 넘어갔으면 False"""
+        now = time.time()
+        fields = {key: value for key, value in fields.items() if key in UPDATE_FIELDS}
+        assignments = ''.join(f", {key} = ?" for key in fields)
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                f"UPDATE jobs SET lease_expires = ?, updated_at = ?{assignments}"
+                " WHERE id = ? AND owner = ? AND status = ?",
+                (now + (lease or self.lease), now, *fields.values(), job_id, owner, DOWNLOADING))
+            return cursor.rowcount > 0
+
+    def ack(self, job_id, owner, progress_text="완료"):
+        """완료 처리"""
+        return self._finish(job_id, owner, COMPLETED, progress_text, None)
+
+    def nack(self, job_id, owner, error=None, progress_text="실패"):
+        """실패 처리 - 시도 횟수가 남았으면 백오프 후 다시 대기"""
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute("SELECT attempts FROM jobs WHERE id = ? AND owner = ? AND status = ?",
+                               (job_id, owner, DOWNLOADING)).fetchone()
+            if not row:
+                return False
+            if row[0] < self.max_attempts:
+                delay = retry_delay(row[0])
+                conn.execute(
+                    "UPDATE jobs SET status = ?, owner = NULL, lease_expires = NULL, available_at = ?,"
+                    " progress_text = ?, last_error = ?, updated_at = ? WHERE id = ?",
+                    (WAITING, now + delay, f"재시도 대기 ({row[0]}/{self.max_attempts})",
+                     error, now, job_id))
+            else:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, lease_expires = NULL,"
+                    " progress_text = ?, last_error = ?, updated_at = ? WHERE id = ?",
+                    (FAILED, progress_text, error, now, job_id))
+            return True
+
+    def release(self, job_id, owner, progress_text="중단됨", requeue=False):
+        """사용자가 중지한 작업 (다시 대기열에 넣기 전까지 가져가지 않음)
+
+        requeue가 True이면 바로 다시 대기 상태로 돌려 다음 실행이 이어받게 합니다.
+        """
+        if requeue:
+            return self._finish(job_id, owner, WAITING, "대기 중", None)
+        return self._finish(job_id, owner, STOPPED, progress_text, None)
+
+    def _finish(self, job_id, owner, status, progress_text, error):
+        # owner는 남겨 두어 작업자별로 완료/실패한 수를 셀 수 있게 함
+        now = time.time()
+        with self._transaction() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, lease_expires = NULL, progress_text = ?,"
+                " last_error = ?, updated_at = ? WHERE id = ? AND owner = ? AND status = ?",
+                (status, progress_text, error, now, job_id, owner, DOWNLOADING))
+            return cursor.rowcount > 0
+
+    # 관리 (UI / 명령줄)
+
+    def update(self, job_id, **fields):
+        """작업의 표시 정보 변경 (album, progress_text, total_files, weight)"""
+        fields = {key: value for key, value in fields.items() if key in UPDATE_FIELDS}
+        if not fields:
+            return
+        assignments = ", ".join(f"{key} = ?" for key in fields)
+        with self._transaction() as conn:
+            conn.execute(f"UPDATE jobs SET {assignments}, updated_at = ? WHERE id = ?",
+                         (*fields.values(), time.time(), job_id))
+
+    def requeue(self, job_ids):
+        """중지/실패/완료한 작업을 다시 대기 상태로 (시도 횟수 초기화)"""
+        now = time.time()
+        with self._transaction() as conn:
+            for job_id in job_ids:
+                conn.execute(
+                    "UPDATE OR IGNORE jobs SET status = ?, attempts = 0, available_at = 0,"
+                    " progress_text = ?, last_error = NULL, updated_at = ?"
+                    " WHERE id = ? AND status != ?",
+                    (WAITING, "대기 중", now, job_id, DOWNLOADING))
+
+    def remove(self, job_ids):
+        """받는 중이 아닌 작업 삭제"""
+        with self._transaction() as conn:
+            conn.executemany("DELETE FROM jobs WHERE id = ? AND status != ?",
+                             [(job_id, DOWNLOADING) for job_id in job_ids])
+
+    def remove_finished(self):
+        """완료한 작업을 모두 삭제하고 삭제한 수 반환"""
+        with self._transaction() as conn:
+            return conn.execute("DELETE FROM jobs WHERE status = ?", (COMPLETED,)).rowcount
+
+    def get(self, job_id):
+        with self._lock:
+            return self._get(self._conn, job_id)
+
+    def _get(self, conn, job_id):
+        row = conn.execute(f"SELECT {', '.join(_JOB_COLUMNS)} FROM jobs WHERE id = ?",
+                           (job_id,)).fetchone()
+        return QueueJob(*row) if row else None
+
+    def page(self, offset=0, limit=100, status=None):
+        """추가한 순서대로 offset부터 limit개 (status로 거를 수 있음)"""
+        where, params = ("WHERE status = ?", (status,)) if status else ("", ())
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(_JOB_COLUMNS)} FROM jobs {where} ORDER BY id LIMIT ? OFFSET ?",
+                (*params, limit, offset)).fetchall()
+        return [QueueJob(*row) for row in rows]
+
+    def counts(self):
+        """상태별 작업 수"""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        counts = {status: 0 for status in STATUSES}
+        counts.update(rows)
+        return counts
+
+    def running(self, limit=100):
+        """받는 중인 작업 목록 (최근에 진행 정보를 기록한 순서)"""
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(_JOB_COLUMNS)} FROM jobs WHERE status = ?"
+                " ORDER BY updated_at DESC LIMIT ?", (DOWNLOADING, limit)).fetchall()
+        return [QueueJob(*row) for row in rows]
+
+    def workers(self):
+        """작업자별 {'downloading': 수, 'completed': 수, 'failed': 수, 'last_seen': 시각}"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT owner, status, COUNT(*), MAX(updated_at) FROM jobs"
+                " WHERE owner IS NOT NULL AND status IN (?, ?, ?) GROUP BY owner, status",
+                (DOWNLOADING, COMPLETED, FAILED)).fetchall()
+        workers = {}
+        for owner, status, count, updated_at in rows:
+            info = workers.setdefault(owner, {DOWNLOADING: 0, COMPLETED: 0, FAILED: 0,
+                                              'last_seen': 0.0})
+            info[status] = count
+            info['last_seen'] = max(info['last_seen'], updated_at)
+        return workers
+
+    def has_pending(self):
+        """기다리거나 받는 중인 작업이 남아 있거나 입력을 읽는 중이면 True (재시도 대기 포함)"""
+        with self._lock:
+            if self._conn.execute("SELECT 1 FROM ingest WHERE updated_at > ? LIMIT 1",
+                                  (time.time() - self.lease,)).fetchone():
+                return True
+            return self._conn.execute(
+                "SELECT 1 FROM jobs WHERE status IN (?, ?) LIMIT 1",
+                (WAITING, DOWNLOADING)).fetchone() is not None
+
+    def close(self):
+        with self._lock:
+            self._conn.close()